@@ -0,0 +1,150 @@
+"""
+Tiered Answer Engine
+Answers from the FAQ and company knowledge sections when retrieval is confident,
+and leaves only low-confidence queries to the LLM
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+from text_search import analyze
+
+# tier is "faq" or "section"; confidence is the query coverage of the match (0-1)
+LocalAnswer = namedtuple("LocalAnswer", ["text", "tier", "confidence", "context_type"])
+
+_MISS = object()
+
+
+class AnswerEngineMetrics:
+    """Thread-safe per-tier counters and latency"""
+
+    TIERS = ("faq", "section", "llm")
+
+    def __init__(self, assumed_llm_seconds=2.0):
+        """
+        Args:
+            assumed_llm_seconds: LLM latency used for "saved" until real calls are measured
+        """
+        self._lock = threading.Lock()
+        self.assumed_llm_seconds = assumed_llm_seconds
+        self.served = dict.fromkeys(self.TIERS, 0)
+        self.seconds = dict.fromkeys(self.TIERS, 0.0)
+
+    def record(self, tier, seconds):
+        with self._lock:
+            self.served[tier] += 1
+            self.seconds[tier] += seconds
+
+    def snapshot(self):
+        """Get a plain dict of requests and average latency per tier, plus estimated time saved"""
+        with self._lock:
+            served = dict(self.served)
+            seconds = dict(self.seconds)
+
+        llm_avg = seconds["llm"] / served["llm"] if served["llm"] else self.assumed_llm_seconds
+        local_count = served["faq"] + served["section"]
+        local_seconds = seconds["faq"] + seconds["section"]
+        total = sum(served.values())
+        return {
+            "served": served,
+            "avg_ms": {
+                tier: round(seconds[tier] / served[tier] * 1000, 2) if served[tier] else None
+                for tier in self.TIERS
+            },
+            "local_share": round(local_count / total, 3) if total else None,
+            "latency_saved_ms": round(max(local_count * llm_avg - local_seconds, 0.0) * 1000, 1),
+        }
+
+
+class TieredAnswerEngine:
+    """Scores local retrieval first and only defers to the LLM when it is not confident
+
+    Tier 1 is the FAQ index, tier 2 the company knowledge sections; a match is
+    answered directly when the share of the query it covers reaches the tier's
+    threshold. Lookups are cached per (language, analyzed query) until either
+    knowledge source reloads.
+    """
+
+    def __init__(self, knowledge_base, company_knowledge, faq_threshold=0.75, section_threshold=0.85,
+                 min_query_terms=2, max_section_chars=1500, cache_size=1024):
+        """
+        Args:
+            knowledge_base: HealthInsuranceKnowledgeBase (FAQ tier)
+            company_knowledge: CompanyKnowledge (section tier)
+            faq_threshold: Minimum query coverage to answer with an FAQ
+            section_threshold: Minimum query coverage to answer with a section
+            min_query_terms: Shorter queries (e.g. one keyword) are too ambiguous to answer directly
+            max_section_chars: Longer sections are too broad to be an answer
+            cache_size: Number of recent lookups kept
+        """
+        self.knowledge_base = knowledge_base
+        self.company_knowledge = company_knowledge
+        self.faq_threshold = faq_threshold
+        self.section_threshold = section_threshold
+        self.min_query_terms = min_query_terms
+        self.max_section_chars = max_section_chars
+        self.cache_size = cache_size
+        self.metrics = AnswerEngineMetrics()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear_cache(self, *_):
+        """Drop cached lookups (registered as a reload listener)"""
+        with self._lock:
+            self._cache.clear()
+
+    def lookup(self, query, language="ar"):
+        """Answer locally if confident; records the tier served
+
+        Returns:
+            LocalAnswer, or None when the query should go to the LLM
+            (the caller then times the call with llm_call())
+        """
+        start = time.perf_counter()
+        terms = sorted(set(analyze(query)))
+        if len(terms) < self.min_query_terms:
+            return None
+        key = (language, " ".join(terms))
+        with self._lock:
+            answer = self._cache.get(key, _MISS)
+            if answer is not _MISS:
+                self._cache.move_to_end(key)
+
+        if answer is _MISS:
+            answer = self._retrieve(query, language)
+            with self._lock:
+                self._cache[key] = answer
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        if answer is not None:
+            self.metrics.record(answer.tier, time.perf_counter() - start)
+        return answer
+
+    def _retrieve(self, query, language):
+        index = self.knowledge_base.faq_index.get(language)
+        if index:
+            hits = index.search_with_coverage(query, top_k=1)
+            if hits and hits[0][1] >= self.faq_threshold:
+                _, coverage, faq = hits[0]
+                return LocalAnswer(f"❓ {faq['q']}\n\n✅ {faq['a']}", "faq", coverage, "faq")
+
+        for _, coverage, section in self.company_knowledge.find_sections_with_coverage(query, top_k=1):
+            text = section.to_text()
+            if coverage >= self.section_threshold and len(text) <= self.max_section_chars:
+                return LocalAnswer(text, "section", coverage, None)
+        return None
+
+    @contextmanager
+    def llm_call(self):
+        """Time an LLM answer for the per-tier metrics"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.metrics.record("llm", time.perf_counter() - start)
+
+    def stats(self):
+        return self.metrics.snapshot()
@@ -0,0 +1,394 @@
+"""
+Batch Jobs
+Bulk summarize/enhance jobs: items are collected into a job, run through a batch
+model backend (Vertex AI batch prediction, or a local stand-in), tracked in
+SQLite and their results written back in bulk. Jobs interrupted by a restart
+are resumed from their heartbeat (see BatchRunner.resume and BatchRunner.watch)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from gemini_client import gemini_backend
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+
+# A queued/running job whose runner has not touched it for this long was interrupted (restart, crash)
+STALE_SECONDS = 600
+
+
+def prompt_hash(prompt):
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class BatchJobStore:
+    """Jobs, their items and the latest result per (kind, item) in a SQLite file"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''CREATE TABLE IF NOT EXISTS batch_jobs
+                        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                         kind TEXT NOT NULL,
+                         status TEXT NOT NULL,
+                         backend TEXT NOT NULL,
+                         remote_name TEXT,
+                         total INTEGER NOT NULL,
+                         succeeded INTEGER NOT NULL DEFAULT 0,
+                         failed INTEGER NOT NULL DEFAULT 0,
+                         error TEXT,
+                         created REAL NOT NULL,
+                         updated REAL NOT NULL)''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS batch_items
+                        (job_id INTEGER NOT NULL,
+                         item_id INTEGER NOT NULL,
+                         prompt TEXT NOT NULL,
+                         status TEXT NOT NULL,
+                         error TEXT,
+                         PRIMARY KEY (job_id, item_id))''')
+        # Latest result per item; prompt_hash ties it to the content it was generated from
+        conn.execute('''CREATE TABLE IF NOT EXISTS ai_results
+                        (kind TEXT NOT NULL,
+                         item_id INTEGER NOT NULL,
+                         prompt_hash TEXT NOT NULL,
+                         result TEXT NOT NULL,
+                         created REAL NOT NULL,
+                         PRIMARY KEY (kind, item_id))''')
+        conn.commit()
+
+    def create_job(self, kind, items, backend):
+        """Record a queued job for items [(item_id, prompt), ...]; returns the job id"""
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO batch_jobs (kind, status, backend, total, created, updated) VALUES (?, ?, ?, ?, ?, ?)',
+                (kind, "queued", backend, len(items), now, now)
+            )
+            job_id = cursor.lastrowid
+            conn.executemany(
+                'INSERT INTO batch_items (job_id, item_id, prompt, status) VALUES (?, ?, ?, ?)',
+                [(job_id, item_id, prompt, "queued") for item_id, prompt in items]
+            )
+        return job_id
+
+    def set_status(self, job_id, status, remote_name=None, error=None):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'UPDATE batch_jobs SET status = ?, remote_name = COALESCE(?, remote_name), error = ?, updated = ? '
+                'WHERE id = ?', (status, remote_name, error, time.time(), job_id)
+            )
+
+    def touch(self, job_id):
+        """Heartbeat: shows the job's runner is still alive"""
+        conn = self._connect()
+        with conn:
+            conn.execute('UPDATE batch_jobs SET updated = ? WHERE id = ?', (time.time(), job_id))
+
+    def claim_stale(self, backend, stale_seconds=STALE_SECONDS):
+        """Take over unfinished jobs whose runner stopped sending heartbeats
+
+        Claiming refreshes the heartbeat inside one write transaction, so when
+        several workers call this only one of them gets each job. Stale jobs
+        of another backend cannot be resumed and are marked failed.
+
+        Returns:
+            [(job_id, kind, remote_name), ...] for this backend
+        """
+        conn = self._connect()
+        now = time.time()
+        stale_query = 'SELECT id, kind, backend, remote_name FROM batch_jobs WHERE status IN (?, ?) AND updated < ?'
+        # Plain read first: the write lock is only taken when there is something to claim
+        if not conn.execute(stale_query, ("queued", "running", now - stale_seconds)).fetchone():
+            return []
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(stale_query, ("queued", "running", now - stale_seconds)).fetchall()
+            claimed = [(job_id, kind, remote_name) for job_id, kind, job_backend, remote_name in rows
+                       if job_backend == backend]
+            conn.executemany('UPDATE batch_jobs SET updated = ? WHERE id = ?',
+                             [(now, job_id) for job_id, _, _ in claimed])
+            conn.executemany(
+                'UPDATE batch_jobs SET status = ?, error = ?, updated = ? WHERE id = ?',
+                [("failed", f"Interrupted; the {job_backend} backend is no longer configured", now, job_id)
+                 for job_id, _, job_backend, _ in rows if job_backend != backend]
+            )
+        return claimed
+
+    def pending_items(self, job_id):
+        """Items of a job without a result yet: [(item_id, prompt), ...]"""
+        return self._connect().execute(
+            'SELECT item_id, prompt FROM batch_items WHERE job_id = ? AND status = ? ORDER BY item_id',
+            (job_id, "queued")
+        ).fetchall()
+
+    def save_results(self, job_id, kind, results):
+        """Write a batch of results back in one transaction
+
+        Args:
+            results: [(item_id, prompt, text or None, error or None), ...]
+        """
+        now = time.time()
+        succeeded = [(kind, item_id, prompt_hash(prompt), text, now)
+                     for item_id, prompt, text, error in results if text is not None]
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO ai_results (kind, item_id, prompt_hash, result, created) VALUES (?, ?, ?, ?, ?)',
+                succeeded
+            )
+            conn.executemany(
+                'UPDATE batch_items SET status = ?, error = ? WHERE job_id = ? AND item_id = ?',
+                [("succeeded" if text is not None else "failed", error, job_id, item_id)
+                 for item_id, _, text, error in results]
+            )
+            conn.execute(
+                'UPDATE batch_jobs SET succeeded = succeeded + ?, failed = failed + ?, updated = ? WHERE id = ?',
+                (len(succeeded), len(results) - len(succeeded), now, job_id)
+            )
+
+    def job(self, job_id):
+        """Job status and progress as a dict, or None"""
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT id, kind, status, backend, remote_name, total, succeeded, failed, error, created, updated '
+            'FROM batch_jobs WHERE id = ?', (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "kind", "status", "backend", "remote_name", "total", "succeeded", "failed",
+                "error", "created", "updated")
+        job = dict(zip(keys, row, strict=True))
+        job["failed_items"] = [
+            {"item_id": item_id, "error": error} for item_id, error in conn.execute(
+                'SELECT item_id, error FROM batch_items WHERE job_id = ? AND status = ?', (job_id, "failed")
+            ).fetchall()
+        ]
+        return job
+
+    def stored_result(self, kind, item_id, prompt):
+        """Stored result for this exact prompt, or None"""
+        row = self._connect().execute(
+            'SELECT result FROM ai_results WHERE kind = ? AND item_id = ? AND prompt_hash = ?',
+            (kind, item_id, prompt_hash(prompt))
+        ).fetchone()
+        return row[0] if row else None
+
+    def store_result(self, kind, item_id, prompt, text):
+        """Store one interactively generated result"""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO ai_results (kind, item_id, prompt_hash, result, created) VALUES (?, ?, ?, ?, ?)',
+                (kind, item_id, prompt_hash(prompt), text, time.time())
+            )
+
+
+class LocalBatchBackend:
+    """Stand-in for a batch model API: runs the items one by one on the shared quota
+
+    Results are written back every chunk_size items.
+    """
+
+    name = "local"
+
+    def __init__(self, generate, chunk_size=20):
+        """
+        Args:
+            generate: generate(kind, prompt) -> text (e.g. batch-priority model call)
+            chunk_size: Items per bulk write
+        """
+        self.generate = generate
+        self.chunk_size = chunk_size
+
+    def run(self, job_id, kind, items, store):
+        for start in range(0, len(items), self.chunk_size):
+            results = []
+            for item_id, prompt in items[start:start + self.chunk_size]:
+                try:
+                    results.append((item_id, prompt, self.generate(kind, prompt), None))
+                except Exception as e:
+                    results.append((item_id, prompt, None, str(e)))
+                store.touch(job_id)
+            store.save_results(job_id, kind, results)
+
+    def resume(self, job_id, kind, items, _remote_name, store):
+        """Continue an interrupted job with the items that have no result yet"""
+        self.run(job_id, kind, items, store)
+
+
+class VertexBatchBackend:
+    """Vertex AI batch prediction: one JSONL file in, one offline job, results read back together
+
+    Needs google-cloud-aiplatform (vertexai) and google-cloud-storage, and a
+    GCS bucket the service account can write to.
+    """
+
+    name = "vertex"
+
+    def __init__(self, bucket, model_for, validator_for=None, poll_seconds=30, prefix="smart-dms-batch"):
+        """
+        Args:
+            bucket: GCS bucket name for job input and output
+            model_for: model_for(kind) -> Gemini model name
+            validator_for: validator_for(kind) -> validator(text) -> bool, or None
+            poll_seconds: Seconds between job status checks
+            prefix: Object prefix inside the bucket
+        """
+        self.bucket = bucket
+        self.model_for = model_for
+        self.validator_for = validator_for
+        self.poll_seconds = poll_seconds
+        self.prefix = prefix
+
+    def run(self, job_id, kind, items, store):
+        from google.cloud import storage
+        from vertexai.batch_prediction import BatchPredictionJob
+
+        client = storage.Client()
+        bucket = client.bucket(self.bucket)
+        base = f"{self.prefix}/{job_id}"
+        lines = [json.dumps({"request": {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}},
+                            ensure_ascii=False) for _, prompt in items]
+        bucket.blob(f"{base}/input.jsonl").upload_from_string("\n".join(lines), content_type="application/jsonl")
+
+        job = BatchPredictionJob.submit(
+            source_model=self.model_for(kind),
+            input_dataset=f"gs://{self.bucket}/{base}/input.jsonl",
+            output_uri_prefix=f"gs://{self.bucket}/{base}/output",
+        )
+        store.set_status(job_id, "running", remote_name=job.resource_name)
+        self._collect(job, job_id, kind, items, store)
+
+    def resume(self, job_id, kind, items, remote_name, store):
+        """Wait for a job submitted before a restart and read its results"""
+        from vertexai.batch_prediction import BatchPredictionJob
+
+        self._collect(BatchPredictionJob(remote_name), job_id, kind, items, store)
+
+    def _collect(self, job, job_id, kind, items, store):
+        from google.cloud import storage
+
+        while not job.has_ended:
+            store.touch(job_id)
+            time.sleep(self.poll_seconds)
+            job.refresh()
+        if not job.has_succeeded:
+            raise RuntimeError(f"Batch prediction failed: {job.error}")
+
+        client = storage.Client()
+        # Output order is not guaranteed; each line echoes its request
+        items_by_prompt = {}
+        for item_id, prompt in items:
+            items_by_prompt.setdefault(prompt, []).append(item_id)
+        validator = self.validator_for(kind) if self.validator_for else None
+        results = []
+        output_prefix = job.output_location.replace(f"gs://{self.bucket}/", "", 1)
+        for blob in client.list_blobs(self.bucket, prefix=output_prefix):
+            if not blob.name.endswith(".jsonl"):
+                continue
+            for line in blob.download_as_text().splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                prompt = record["request"]["contents"][0]["parts"][0]["text"]
+                try:
+                    text = record["response"]["candidates"][0]["content"]["parts"][0]["text"]
+                    error = None
+                    if validator and not validator(text):
+                        text, error = None, "Response failed validation"
+                except (KeyError, IndexError):
+                    text, error = None, record.get("status") or "No response generated"
+                for item_id in items_by_prompt.pop(prompt, []):
+                    results.append((item_id, prompt, text, error))
+        for prompt, item_ids in items_by_prompt.items():
+            results.extend((item_id, prompt, None, "Missing from batch output") for item_id in item_ids)
+        store.save_results(job_id, kind, results)
+
+
+class BatchRunner:
+    """Submits jobs to a backend in background threads and tracks them in the store"""
+
+    def __init__(self, store, backend, stale_seconds=STALE_SECONDS):
+        """
+        Args:
+            store: BatchJobStore
+            backend: LocalBatchBackend or VertexBatchBackend
+            stale_seconds: Heartbeat age after which an unfinished job is resumed
+        """
+        self.store = store
+        self.backend = backend
+        self.stale_seconds = stale_seconds
+
+    def submit(self, kind, items):
+        """Start a job for items [(item_id, prompt), ...]; returns the job id immediately"""
+        job_id = self.store.create_job(kind, items, self.backend.name)
+        threading.Thread(target=self._run, args=(job_id, kind, items), daemon=True).start()
+        return job_id
+
+    def resume(self):
+        """Pick up jobs interrupted by a restart; safe to call from every worker, as often as needed"""
+        for job_id, kind, remote_name in self.store.claim_stale(self.backend.name, self.stale_seconds):
+            items = self.store.pending_items(job_id)
+            print(f"🔄 Resuming batch job {job_id} ({len(items)} items left)")
+            threading.Thread(target=self._run, args=(job_id, kind, items, remote_name), daemon=True).start()
+
+    def watch(self, interval=None):
+        """Call resume() now and then every interval seconds from a daemon thread
+
+        Args:
+            interval: Seconds between checks (default: half of stale_seconds)
+        """
+        interval = interval or self.stale_seconds / 2
+
+        def loop():
+            while True:
+                try:
+                    self.resume()
+                except Exception as e:
+                    print(f"⚠️ Batch resume check failed: {e}")
+                time.sleep(interval)
+
+        threading.Thread(target=loop, daemon=True).start()
+        return self
+
+    def _run(self, job_id, kind, items, remote_name=None):
+        self.store.set_status(job_id, "running")
+        try:
+            if remote_name:
+                self.backend.resume(job_id, kind, items, remote_name, self.store)
+            else:
+                self.backend.run(job_id, kind, items, self.store)
+        except Exception as e:
+            print(f"❌ Batch job {job_id} failed: {e}")
+            self.store.set_status(job_id, "failed", error=str(e))
+        else:
+            self.store.set_status(job_id, "completed")
+
+
+def create_batch_backend(generate, model_for, validator_for=None):
+    """Vertex AI batch prediction when BATCH_GCS_BUCKET is set on the Vertex backend, otherwise local
+
+    BATCH_GCS_BUCKET: GCS bucket for batch prediction input/output
+    """
+    bucket = os.getenv('BATCH_GCS_BUCKET')
+    if bucket and gemini_backend() == "vertex":
+        return VertexBatchBackend(bucket, model_for, validator_for)
+    return LocalBatchBackend(generate)
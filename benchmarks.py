@@ -0,0 +1,174 @@
+"""
+Micro-benchmarks for the bot's text-processing hot paths
+
+Usage:
+    python benchmarks.py [name ...]
+"""
+
+import random
+import re
+import sys
+import time
+
+from language_detector import LanguageDetector
+from response_formatter import ResponseFormatter
+
+
+def _timeit(fn, repeat=5):
+    """Best wall time of several runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _sample_messages(count, seed=42):
+    samples = [
+        "What does the premium plan cover?",
+        "كيف أقدم مطالبة للتأمين؟",
+        "ana 3ayez a3raf el coverage bta3ty",
+        "Hello, I need help with my claim please",
+        "أين أقرب مستشفى في الشبكة",
+        "insurance تأمين صحي شامل للعائلة",
+        "12345",
+        "Can I add my wife and kids to the policy? Thanks!",
+        "مرحبا، هل يغطي التأمين العلاج في الخارج؟ 🙏",
+    ]
+    rng = random.Random(seed)
+    return [rng.choice(samples) * rng.randint(1, 4) for _ in range(count)]
+
+
+def _legacy_detect_language(detector, text):
+    """The original two-regex + substring-scan detector, kept for comparison"""
+    text_lower = text.lower().strip()
+    if any(cmd in text_lower for cmd in ["english", "switch to english", "تحويل للإنجليزية"]):
+        return "en"
+    if any(cmd in text_lower for cmd in ["arabic", "عربي", "switch to arabic", "تحويل للعربية"]):
+        return "ar"
+    arabic_chars = len(re.findall(r'[؀-ۿ]', text))
+    total_chars = len(re.sub(r'\s', '', text))
+    if total_chars == 0:
+        return "ar"
+    if arabic_chars / total_chars > 0.3:
+        return "ar"
+    if any(word in text_lower for word in detector.english_words):
+        return "en"
+    if any(word in text for word in detector.arabic_words):
+        return "ar"
+    return "ar"
+
+
+def bench_language_detection(count=20000):
+    detector = LanguageDetector()
+    messages = _sample_messages(count)
+
+    legacy = _timeit(lambda: [_legacy_detect_language(detector, m) for m in messages])
+    batch = _timeit(lambda: detector.detect_batch(messages))
+
+    print(f"language detection ({count} messages)")
+    print(f"  legacy detect_language : {count / legacy:>12,.0f} msg/s")
+    print(f"  detect_batch           : {count / batch:>12,.0f} msg/s  ({legacy / batch:.1f}x)")
+
+
+def _long_model_output(paragraphs, seed=7):
+    """Model-like answer mixing Arabic, English, bullets, emoji and long paragraphs"""
+    sentences = [
+        "تغطي الخطة الذهبية العلاج داخل المستشفى والعمليات الجراحية بنسبة مئة بالمئة.",
+        "The premium plan covers outpatient visits, dental care and maternity.",
+        "🏥 يمكنك زيارة أي مستشفى في الشبكة دون دفع مسبق 👨‍👩‍👧‍👦",
+        "• Claims are processed within 5-7 business days.",
+        "يُرجى الاحتفاظ بالفواتير الأصلية وتقديمها خلال ثلاثين يوماً.",
+    ]
+    rng = random.Random(seed)
+    return "\n\n".join(
+        " ".join(rng.choice(sentences) for _ in range(rng.randint(3, 120)))
+        for _ in range(paragraphs)
+    )
+
+
+def _legacy_split_long_message(text, max_length=4000):
+    """The original paragraph-only splitter, kept for comparison"""
+    if len(text) <= max_length:
+        return [text]
+    messages = []
+    current_message = ""
+    for para in text.split('\n\n'):
+        if len(current_message) + len(para) + 2 <= max_length:
+            current_message += para + '\n\n'
+        else:
+            if current_message:
+                messages.append(current_message.strip())
+            current_message = para + '\n\n'
+    if current_message:
+        messages.append(current_message.strip())
+    return messages
+
+
+def bench_message_splitting(paragraphs=400):
+    formatter = ResponseFormatter()
+    text = _long_model_output(paragraphs)
+
+    legacy_parts = _legacy_split_long_message(text)
+    parts = formatter.split_long_message(text, channel="telegram")
+    legacy = _timeit(lambda: _legacy_split_long_message(text))
+    current = _timeit(lambda: formatter.split_long_message(text, channel="telegram"))
+    oversized = sum(len(part.encode("utf-16-le")) // 2 > 4096 for part in legacy_parts)
+
+    print(f"message splitting ({len(text):,} chars)")
+    print(f"  legacy split_long_message : {legacy * 1000:>8.2f} ms  {len(legacy_parts)} parts, {oversized} over the Telegram limit")
+    print(f"  split_long_message        : {current * 1000:>8.2f} ms  {len(parts)} parts")
+
+
+def _legacy_format_chain(formatter, text, language):
+    """The original per-call-compiled cleanup followed by the separate formatting passes"""
+    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
+    text = text.replace('**', '*')
+    text = formatter.format_for_whatsapp(text, language)
+    text = formatter.add_context_header(text, "general", language)
+    return formatter.add_footer(text, language)
+
+
+def bench_formatting(count=2000):
+    formatter = ResponseFormatter()
+    rng = random.Random(3)
+    markdown_answers = [
+        "## Coverage\n\n" + "\n".join(
+            f"* **Item {i}**: covered at *{rng.randint(50, 100)}%* - see [policy](https://example.com/p/{i})"
+            for i in range(rng.randint(5, 30))
+        )
+        for _ in range(count)
+    ]
+    plain_answers = [
+        " ".join(f"Visit {i} is covered at {rng.randint(50, 100)}% - call 19123 for details." for i in range(rng.randint(5, 30)))
+        for _ in range(count)
+    ]
+
+    print(f"formatting ({count} answers)")
+    # WhatsApp gets the same conversion as the legacy chain; Telegram HTML also converts
+    # lists, links, italics and code, so it is shown for reference only
+    for label, answers in (("markdown", markdown_answers), ("plain text", plain_answers)):
+        legacy = _timeit(lambda answers=answers: [_legacy_format_chain(formatter, a, "en") for a in answers])
+        current = _timeit(lambda answers=answers: [
+            formatter.format_response(a, "en", "whatsapp", context_type="general", footer=True) for a in answers
+        ])
+        html_time = _timeit(lambda answers=answers: [
+            formatter.format_response(a, "en", "telegram_html", context_type="general", footer=True) for a in answers
+        ])
+        print(f"  {label}")
+        print(f"    legacy chain    : {count / legacy:>10,.0f} answers/s")
+        print(f"    format_response : {count / current:>10,.0f} answers/s  ({legacy / current:.2f}x legacy chain)")
+        print(f"    telegram_html   : {count / html_time:>10,.0f} answers/s")
+
+
+BENCHMARKS = {
+    "language": bench_language_detection,
+    "splitting": bench_message_splitting,
+    "formatting": bench_formatting,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -0,0 +1,58 @@
+"""
+Canned Responses
+Precomputed, already-split bot messages for static knowledge base answers
+"""
+
+
+class CannedResponses:
+    """Formatted message lists per (topic, language, channel), built once up front"""
+
+    LANGUAGES = ("ar", "en")
+    CHANNELS = ("telegram", "whatsapp")
+
+    def __init__(self, knowledge_base, formatter):
+        """
+        Args:
+            knowledge_base: HealthInsuranceKnowledgeBase with the static answers
+            formatter: ResponseFormatter used for headers and splitting
+        """
+        self.kb = knowledge_base
+        self.formatter = formatter
+        self._messages = {}
+        self.rebuild()
+
+    def _topics(self, language):
+        """Raw (text, header context type) for every static topic"""
+        kb = self.kb
+        basic = kb.get_coverage_info("basic", language)
+        premium = kb.get_coverage_info("premium", language)
+        return {
+            "coverage": (f"{basic}\n\n{premium}", "coverage"),
+            "coverage_premium": (premium, "coverage"),
+            "claim": (kb.get_claims_process(language), "claim"),
+            "provider": (kb.get_providers(language), "provider"),
+            "contact": (kb.get_contact_info(language), None),
+            "faq": (kb.get_all_faqs(language), "faq"),
+        }
+
+    def _render(self, text, context_type, language, channel):
+        """Run the full formatting chain once"""
+        text = self.formatter.format_response(text, language, channel, context_type)
+        return tuple(self.formatter.split_long_message(text, channel=channel))
+
+    def rebuild(self):
+        """Recompute every canned response (call after the knowledge base reloads)"""
+        messages = {}
+        for language in self.LANGUAGES:
+            for topic, (text, context_type) in self._topics(language).items():
+                for channel in self.CHANNELS:
+                    messages[(topic, language, channel)] = self._render(text, context_type, language, channel)
+
+        # Swap in one assignment so readers never see a half-built table
+        self._messages = messages
+        return len(messages)
+
+    def get(self, topic, language="ar", channel="telegram"):
+        """Get the pre-split messages for a topic (falls back to Arabic)"""
+        messages = self._messages
+        return messages.get((topic, language, channel)) or messages[(topic, "ar", channel)]
@@ -3,19 +3,139 @@ Company Knowledge Loader
 Loads company information from Markdown file for easy customization
 """
 
-import os
+import hashlib
 from pathlib import Path
 
+from file_watcher import FileWatcher, file_signature
+from text_search import BM25Index
+
+class Section:
+    """A markdown heading with its body lines and nested subsections"""
+
+    def __init__(self, title, level, parent=None):
+        self.title = title
+        self.level = level
+        self.parent = parent
+        self.lines = []
+        self.children = []
+
+    @property
+    def heading(self):
+        return f"{'#' * self.level} {self.title}"
+
+    @property
+    def path(self):
+        """Titles from the top-level section down to this one"""
+        titles = []
+        section = self
+        while section is not None and section.level > 0:
+            titles.append(section.title)
+            section = section.parent
+        return list(reversed(titles))
+
+    @property
+    def body(self):
+        return '\n'.join(self.lines).strip()
+
+    def is_within(self, other):
+        """True if this section is other or nested inside it"""
+        section = self
+        while section is not None:
+            if section is other:
+                return True
+            section = section.parent
+        return False
+
+    def to_text(self):
+        """Heading and body including all subsections"""
+        parts = [f"{self.heading}\n{self.body}".strip()]
+        parts.extend(child.to_text() for child in self.children)
+        return '\n\n'.join(parts)
+
+def parse_sections(content):
+    """Parse markdown into a section tree
+
+    Returns:
+        (root, sections) where sections lists every heading in document order
+    """
+    root = Section("", 0)
+    sections = []
+    current = root
+
+    for line in content.split('\n'):
+        stripped = line.lstrip()
+        if stripped.startswith('#'):
+            level = len(stripped) - len(stripped.lstrip('#'))
+            title = stripped[level:].strip()
+            if 1 <= level <= 6 and title:
+                parent = current
+                while parent.level >= level:
+                    parent = parent.parent
+                section = Section(title, level, parent)
+                parent.children.append(section)
+                sections.append(section)
+                current = section
+                continue
+        if line.strip() != '---':
+            current.lines.append(line)
+
+    return root, sections
+
+class KnowledgeSnapshot:
+    """Everything derived from one version of the file, swapped in as a unit"""
+
+    def __init__(self, company_info, signature):
+        content = company_info["full_content"]
+        self.company_info = company_info
+        self.signature = signature
+        self.digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        self.root, self.sections = parse_sections(content)
+
+        # Titles (and parent titles) weighted above body text
+        self.index = BM25Index().build(
+            self.sections,
+            lambda s: f"{' '.join(s.path)} {s.title} {s.title} {s.body}"
+        )
+        self.summary = self._build_summary(content)
+
+    @staticmethod
+    def _build_summary(content):
+        lines = content.split('\n')
+
+        # Extract key sections
+        summary = []
+        in_section = False
+
+        for line in lines[:100]:  # First 100 lines for summary
+            if line.startswith('##'):
+                summary.append(line)
+                in_section = True
+            elif in_section and line.strip() and not line.startswith('#'):
+                summary.append(line)
+                in_section = False
+
+        return '\n'.join(summary[:20])  # First 20 relevant lines
+
 class CompanyKnowledge:
     def __init__(self, knowledge_file="company_knowledge.md"):
         """Initialize with company knowledge file"""
         self.knowledge_file = knowledge_file
-        self.company_info = self._load_knowledge()
+        self._reload_listeners = []
+        self._watcher = None
+        self._state = self._build_snapshot()
+
+    def _file_path(self):
+        return Path(__file__).parent / self.knowledge_file
+
+    def _build_snapshot(self):
+        # Stat before reading: a write in between is caught by the next check
+        signature = file_signature(self._file_path())
+        return KnowledgeSnapshot(self._load_knowledge(), signature)
     
     def _load_knowledge(self):
         """Load knowledge from Markdown file"""
         try:
-            file_path = Path(__file__).parent / self.knowledge_file
+            file_path = self._file_path()
             
             if not file_path.exists():
                 print(f"Warning: {self.knowledge_file} not found. Using default knowledge.")
@@ -41,56 +161,84 @@ class CompanyKnowledge:
             "loaded": False
         }
     
+    @property
+    def company_info(self):
+        return self._state.company_info
+
+    @property
+    def sections(self):
+        return self._state.sections
+
+    @property
+    def version(self):
+        """SHA-256 of the loaded content"""
+        return self._state.digest
+
     def get_full_knowledge(self):
         """Get complete knowledge base"""
-        return self.company_info["full_content"]
+        return self._state.company_info["full_content"]
     
     def get_summary(self):
-        """Get knowledge base summary"""
-        content = self.company_info["full_content"]
-        lines = content.split('\n')
+        """Get knowledge base summary (computed once per load)"""
+        return self._state.summary
         
-        # Extract key sections
-        summary = []
-        in_section = False
+    def find_sections(self, query, top_k=3):
+        """Ranked section lookup
         
-        for line in lines[:100]:  # First 100 lines for summary
-            if line.startswith('##'):
-                summary.append(line)
-                in_section = True
-            elif in_section and line.strip() and not line.startswith('#'):
-                summary.append(line)
-                in_section = False
+        Returns:
+            List of (score, Section) pairs, best first
+        """
+        return self._state.index.search(query, top_k)
         
-        return '\n'.join(summary[:20])  # First 20 relevant lines
+    def find_sections_with_coverage(self, query, top_k=3):
+        """Ranked section lookup with the share of the query each section covers
     
-    def search_section(self, keyword):
+        Returns:
+            List of (score, coverage, Section) triples, best first
+        """
+        return self._state.index.search_with_coverage(query, top_k)
+
+    def search_section(self, keyword, top_k=3):
         """Search for specific section in knowledge base"""
-        content = self.company_info["full_content"]
-        lines = content.split('\n')
-        
-        results = []
-        capture = False
-        section_lines = []
-        
-        for line in lines:
-            if keyword.lower() in line.lower():
-                capture = True
-                section_lines = [line]
-            elif capture:
-                if line.startswith('##') or line.startswith('---'):
-                    results.append('\n'.join(section_lines))
-                    capture = False
-                    section_lines = []
-                else:
-                    section_lines.append(line)
-        
-        if section_lines:
-            results.append('\n'.join(section_lines))
+        selected = []
+        for _, section in self.find_sections(keyword, top_k):
+            # Skip subsections already included in a higher-ranked parent
+            if not any(section.is_within(s) or s.is_within(section) for s in selected):
+                selected.append(section)
         
+        results = [section.to_text() for section in selected]
         return '\n\n'.join(results) if results else None
     
+    def has_changed(self):
+        """Cheap check (stat only) whether the file differs from what is loaded"""
+        return file_signature(self._file_path()) != self._state.signature
+
     def reload(self):
-        """Reload knowledge from file (useful when file is updated)"""
-        self.company_info = self._load_knowledge()
-        return self.company_info["loaded"]
+        """Reload knowledge from file (useful when file is updated)
+
+        The new snapshot is built off to the side and swapped in with one
+        assignment, so in-flight requests finish on the version they started
+        with. Reload listeners run only when the content hash changed.
+        """
+        if not self.has_changed():
+            return self.company_info["loaded"]
+
+        previous = self._state
+        snapshot = self._build_snapshot()
+        self._state = snapshot
+
+        if snapshot.digest != previous.digest:
+            print(f"📚 Company knowledge reloaded from {snapshot.company_info['file_path']}")
+            for listener in list(self._reload_listeners):
+                listener(self)
+        return snapshot.company_info["loaded"]
+
+    def add_reload_listener(self, callback):
+        """Call callback(company_knowledge) after the content changes, e.g. to drop caches"""
+        self._reload_listeners.append(callback)
+
+    def watch(self, interval=2.0):
+        """Reload in the background whenever the file changes"""
+        if self._watcher is None:
+            self._watcher = FileWatcher(self._file_path(), lambda _: self.reload(), interval).start()
+        return self._watcher
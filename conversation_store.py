@@ -0,0 +1,89 @@
+"""
+Conversation History Store
+Per-user chat history kept in process memory or in a shared SQLite file
+"""
+
+import json
+import sqlite3
+import threading
+
+
+class InMemoryHistoryStore:
+    """History held in a dict; fine for a single process or a sharded worker"""
+
+    def __init__(self, max_messages=10):
+        self.max_messages = max_messages
+        self._history = {}
+
+    def get(self, user_id):
+        """Get a copy of the user's recent messages"""
+        return list(self._history.get(user_id, []))
+
+    def add(self, user_id, role, content):
+        """Append a message, keeping only the last max_messages"""
+        history = self._history.setdefault(user_id, [])
+        history.append({"role": role, "content": content})
+        if len(history) > self.max_messages:
+            self._history[user_id] = history[-self.max_messages:]
+
+    def clear(self, user_id):
+        """Forget a user's history"""
+        self._history.pop(user_id, None)
+
+
+class SQLiteHistoryStore:
+    """History in a SQLite file shared by every process on the host"""
+
+    def __init__(self, db_path, max_messages=10):
+        self.db_path = db_path
+        self.max_messages = max_messages
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''CREATE TABLE IF NOT EXISTS conversation_history
+                        (user_id TEXT PRIMARY KEY,
+                         messages TEXT NOT NULL)''')
+        conn.commit()
+
+    def get(self, user_id):
+        row = self._connect().execute(
+            'SELECT messages FROM conversation_history WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def add(self, user_id, role, content):
+        conn = self._connect()
+        with conn:
+            # BEGIN IMMEDIATE serializes read-modify-write across processes
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT messages FROM conversation_history WHERE user_id = ?', (user_id,)
+            ).fetchone()
+            history = json.loads(row[0]) if row else []
+            history.append({"role": role, "content": content})
+            conn.execute(
+                'INSERT OR REPLACE INTO conversation_history (user_id, messages) VALUES (?, ?)',
+                (user_id, json.dumps(history[-self.max_messages:], ensure_ascii=False))
+            )
+
+    def clear(self, user_id):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM conversation_history WHERE user_id = ?', (user_id,))
+
+
+def create_history_store(db_path=None, max_messages=10):
+    """SQLite store when a path is given, otherwise in-memory"""
+    if db_path:
+        return SQLiteHistoryStore(db_path, max_messages)
+    return InMemoryHistoryStore(max_messages)
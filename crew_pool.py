@@ -0,0 +1,219 @@
+"""
+CrewAI Worker Pool
+Runs crew kickoffs on a dedicated, bounded thread pool and reuses per-language crew templates
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from crewai import Crew, Process
+
+logger = logging.getLogger(__name__)
+
+# Placeholders interpolated by crew.kickoff(inputs=...)
+QUERY_PLACEHOLDER = "{user_query}"
+FAQ_PLACEHOLDER = "{faq_context}"
+
+
+class CrewPoolBusy(Exception):
+    """Raised when the pending kickoff queue is full"""
+
+
+class CrewPoolMetrics:
+    """Thread-safe counters for crew construction vs. execution time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.crews_built = 0
+        self.build_seconds = 0.0
+        self.kickoffs = 0
+        self.execution_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+        self.timeouts = 0
+        self.rejected = 0
+        self.errors = 0
+
+    def record_build(self, seconds):
+        with self._lock:
+            self.crews_built += 1
+            self.build_seconds += seconds
+
+    def record_kickoff(self, queue_wait, seconds):
+        with self._lock:
+            self.kickoffs += 1
+            self.queue_wait_seconds += queue_wait
+            self.execution_seconds += seconds
+
+    def increment(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self):
+        """Get a plain dict of the current counters and averages"""
+        with self._lock:
+            kickoffs = self.kickoffs or 1
+            crews_built = self.crews_built or 1
+            return {
+                "crews_built": self.crews_built,
+                "avg_build_ms": round(self.build_seconds / crews_built * 1000, 1),
+                "kickoffs": self.kickoffs,
+                "avg_execution_ms": round(self.execution_seconds / kickoffs * 1000, 1),
+                "avg_queue_wait_ms": round(self.queue_wait_seconds / kickoffs * 1000, 1),
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+                "errors": self.errors,
+            }
+
+
+class CrewWorkerPool:
+    """Bounded pool of worker threads, each holding one reusable crew per language.
+
+    Crews are not safe to kick off concurrently, so every worker thread lazily
+    builds its own crew per language (at most max_workers * languages crews in
+    total) and reuses it for every message through kickoff(inputs=...).
+    """
+
+    def __init__(self, agent_config, tasks_config, max_workers=4, max_pending=32, timeout_seconds=120):
+        """
+        Args:
+            agent_config: HealthInsuranceAgentConfig used to build agents
+            tasks_config: HealthInsuranceTasks used to build task templates
+            max_workers: Number of threads running kickoffs
+            max_pending: Max kickoffs queued or running before new ones are rejected
+            timeout_seconds: Max seconds a caller waits for a kickoff result
+        """
+        self.agent_config = agent_config
+        self.tasks_config = tasks_config
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.metrics = CrewPoolMetrics()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew-worker")
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._local = threading.local()
+        self._generation = 0
+
+    def _build_crew(self, language, intent=None):
+        """Build the crew template for a language with placeholder inputs
+
+        Without an intent the crew runs Classify -> Answer; with an intent
+        resolved by the local router, only the matching answer task runs.
+        """
+        start = time.perf_counter()
+
+        insurance_agent = self.agent_config.create_insurance_agent(language)
+        answer_task = self._build_answer_task(insurance_agent, language, intent)
+
+        if intent is None:
+            classifier_agent = self.agent_config.create_query_classifier_agent(language)
+            classify_task = self.tasks_config.classify_query_task(classifier_agent, QUERY_PLACEHOLDER, language)
+            agents = [classifier_agent, insurance_agent]
+            tasks = [classify_task, answer_task]
+        else:
+            agents = [insurance_agent]
+            tasks = [answer_task]
+
+        crew = Crew(
+            agents=agents,
+            tasks=tasks,
+            process=Process.sequential,
+            verbose=True
+        )
+
+        self.metrics.record_build(time.perf_counter() - start)
+        return crew
+
+    def _build_answer_task(self, agent, language, intent):
+        """Specialized answer task template for a routed intent"""
+        if intent == "coverage":
+            return self.tasks_config.answer_coverage_task(agent, QUERY_PLACEHOLDER, language)
+        if intent == "claim":
+            return self.tasks_config.answer_claims_task(agent, QUERY_PLACEHOLDER, language)
+        if intent == "provider":
+            return self.tasks_config.answer_provider_task(agent, QUERY_PLACEHOLDER, language)
+        return self.tasks_config.answer_general_task(
+            agent, QUERY_PLACEHOLDER, language, faq_context=FAQ_PLACEHOLDER
+        )
+
+    def _get_crew(self, language, intent=None):
+        """Get (or lazily build) this worker thread's crew for a language and intent"""
+        crews = getattr(self._local, "crews", None)
+        if crews is None or self._local.generation != self._generation:
+            crews = self._local.crews = {}
+            self._local.generation = self._generation
+        key = (language, intent)
+        if key not in crews:
+            crews[key] = self._build_crew(language, intent)
+        return crews[key]
+
+    def _run(self, message_text, language, intent, submitted_at):
+        """Executed on a worker thread"""
+        queue_wait = time.perf_counter() - submitted_at
+        try:
+            crew = self._get_crew(language, intent)
+            start = time.perf_counter()
+            result = crew.kickoff(inputs={
+                "user_query": message_text,
+                "faq_context": self.tasks_config.get_faq_context(message_text, language),
+            })
+            self.metrics.record_kickoff(queue_wait, time.perf_counter() - start)
+            return str(result)
+        except Exception:
+            self.metrics.increment("errors")
+            raise
+
+    def invalidate(self):
+        """Drop every cached crew; workers rebuild on their next kickoff
+
+        Task templates embed knowledge base text, so call this after a reload.
+        """
+        self._generation += 1
+
+    def warm_up(self, languages=("ar", "en")):
+        """Build crew templates on every worker ahead of the first message"""
+        barrier = threading.Barrier(self.max_workers)
+
+        def build_all():
+            # The barrier makes sure each worker thread takes exactly one job
+            barrier.wait()
+            for language in languages:
+                self._get_crew(language)
+
+        futures = [self._executor.submit(build_all) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    async def kickoff(self, message_text, language, intent=None):
+        """Run the crew for a message without blocking the event loop
+
+        Pass the intent from the local IntentRouter to skip the classifier agent.
+
+        Raises:
+            CrewPoolBusy: too many kickoffs are already queued
+            asyncio.TimeoutError: the kickoff did not finish within timeout_seconds
+        """
+        if not self._pending.acquire(blocking=False):
+            self.metrics.increment("rejected")
+            raise CrewPoolBusy("Crew worker pool queue is full")
+
+        try:
+            future = self._executor.submit(self._run, message_text, language, intent, time.perf_counter())
+        except Exception:
+            self._pending.release()
+            raise
+        # Runs on completion, failure or cancellation of a still-queued kickoff
+        future.add_done_callback(lambda _: self._pending.release())
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            # The worker thread cannot be interrupted; it frees its slot when done
+            self.metrics.increment("timeouts")
+            raise
+
+    def shutdown(self, wait=True):
+        """Stop accepting work and release worker threads"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        logger.info(f"📊 Crew pool metrics: {self.metrics.snapshot()}")
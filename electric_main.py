@@ -1,7 +1,8 @@
-from crewai import Crew, Process, LLM
+from crewai import Crew, Process
 from electric_agents import SaudiElectricAgents
 from electric_tasks import SaudiElectricTasks
 from electric_file_io import save_service_report
+from rate_limited_llm import RateLimitedLLM
 import os
 from dotenv import load_dotenv
 
@@ -27,9 +28,10 @@ def main():
     tasks = SaudiElectricTasks()
     
     # Initialize Gemini LLM
-    gemini_llm = LLM(
+    gemini_llm = RateLimitedLLM(
         model="gemini/gemini-flash-latest",
-        api_key=os.environ.get("GOOGLE_API_KEY")
+        api_key=os.environ.get("GOOGLE_API_KEY"),
+        priority="batch"  # Offline crew run: leave the reserve to chat
     )
     
     # Create agents
@@ -19,7 +19,7 @@ from flask_socketio import SocketIO, emit
 print("  ✓ flask_socketio imported")
 from flask_cors import CORS
 print("  ✓ flask_cors imported")
-from crewai import Crew, Process, LLM
+from crewai import Crew, Process
 print("  ✓ crewai imported")
 from electric_agents import SaudiElectricAgents
 print("  ✓ electric_agents imported")
@@ -27,6 +27,12 @@ from electric_tasks import SaudiElectricTasks
 print("  ✓ electric_tasks imported")
 from electric_file_io import save_service_report
 print("  ✓ electric_file_io imported")
+from gemini_client import get_crewai_llm
+print("  ✓ gemini_client imported")
+from llm_metrics import get_llm_metrics
+print("  ✓ llm_metrics imported")
+from model_router import get_model_router
+print("  ✓ model_router imported")
 from dotenv import load_dotenv
 print("  ✓ dotenv imported")
 import threading
@@ -91,49 +97,16 @@ def run_customer_service_workflow(request_text):
         # Initialize Gemini LLM
         update_agent_status('call_receiver', 'working', 'Connecting to AI system...', 20)
         
-        api_key = os.environ.get("GOOGLE_API_KEY") or os.environ.get("GEMINI_API_KEY")
-        use_vertex = os.environ.get("USE_VERTEX_AI", "false").lower() == "true"
-        
-        gemini_llm = None
-        
-        if use_vertex:
-            print("☁️ Using Google Cloud Vertex AI (Service Account)")
-            project_id = os.environ.get("GOOGLE_CLOUD_PROJECT", "eg-konecta-sandbox")
-            location = os.environ.get("VERTEX_AI_LOCATION", "us-central1")
-            
-            # Initialize Vertex AI first
-            try:
-                import vertexai
-                vertexai.init(project=project_id, location=location)
-                print(f"✅ Vertex AI initialized: {project_id} / {location}")
-            except Exception as e:
-                print(f"⚠️ Vertex AI init warning: {e}")
-            
-            # Use Vertex AI model with CrewAI (optimized for speed)
-            gemini_llm = LLM(
-                model="vertex_ai/gemini-2.0-flash-001",
-                vertex_project=project_id,
-                vertex_location=location,
-                max_rpm=60  # 60 requests per minute for faster processing
-            )
-            print("✅ Vertex AI LLM ready (optimized)!")
-        
-        # Fallback to API Key if Vertex AI not configured or failed
-        if gemini_llm is None and api_key:
-            print("🔑 Using Gemini API Key")
-            gemini_llm = LLM(
-                model="gemini/gemini-2.0-flash-001",
-                api_key=api_key,
-                max_rpm=60  # 60 requests per minute
-            )
-        
-        if gemini_llm is None:
-            raise Exception("No AI model available. Set USE_VERTEX_AI=true or provide GEMINI_API_KEY.")
-
+        # Shared clients for the configured backend (API key or Vertex AI), model per route;
+        # customer requests share the backend's quota at interactive priority. That quota
+        # replaces the old per-agent max_rpm=60: Vertex AI defaults to 60 requests/minute,
+        # API keys to the free tier's 10 (override with GEMINI_VERTEX_RPM / GEMINI_API_KEY_RPM)
+        gemini_llm = get_crewai_llm(priority="interactive", route="chat")
+        triage_llm = get_crewai_llm(priority="interactive", route="classification")
         
         # Create agents
         update_agent_status('call_receiver', 'working', 'Preparing service team...', 30)
-        call_receiver = agents.call_receiver_agent(llm=gemini_llm)
+        call_receiver = agents.call_receiver_agent(llm=triage_llm)
         billing_specialist = agents.billing_specialist_agent(llm=gemini_llm)
         technical_support = agents.technical_support_agent(llm=gemini_llm)
         service_coordinator = agents.service_coordinator_agent(llm=gemini_llm)
@@ -199,6 +172,16 @@ def get_status():
         'results': crew_results
     })
 
+@app.route('/api/metrics/models')
+def get_model_metrics():
+    """Calls, latency and estimated cost per model route"""
+    return jsonify(get_model_router().stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """LLM call counters and latency histograms in Prometheus text format"""
+    return get_llm_metrics().prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
@@ -0,0 +1,69 @@
+"""
+File Watcher
+Polls files for changes in a background thread and calls back on modification
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class FileWatcher:
+    """Calls callback(path) whenever the file's mtime or size changes
+
+    Polling keeps this dependency-free and works on network/container
+    filesystems where inotify events are not delivered.
+    """
+
+    def __init__(self, path, callback, interval=2.0):
+        """
+        Args:
+            path: File to watch
+            callback: Called with the path after each detected change
+            interval: Seconds between polls
+        """
+        self.path = str(path)
+        self.callback = callback
+        self.interval = interval
+        self._signature = file_signature(self.path)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Poll once; returns True if a change was detected and handled"""
+        signature = file_signature(self.path)
+        if signature == self._signature:
+            return False
+
+        self._signature = signature
+        try:
+            self.callback(self.path)
+        except Exception as e:
+            # Keep watching: the next save usually fixes a half-written file
+            logger.error(f"❌ Reload after change to {self.path} failed: {e}")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """Start polling in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"watch-{os.path.basename(self.path)}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
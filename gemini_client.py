@@ -0,0 +1,203 @@
+"""
+Gemini Client Factory
+One place that picks the backend (API key, Vertex AI or a local fake) and hands out
+shared model clients, so every app reuses the same configured SDK connections
+"""
+
+import os
+import threading
+import time
+
+from model_router import get_model_router
+
+DEFAULT_MODEL = "gemini-2.0-flash-001"
+
+# Seconds before a model whose initialization failed (network, credentials) is tried again
+INIT_RETRY_SECONDS = 30
+
+# LiteLLM (CrewAI) model prefix per backend
+_CREWAI_PREFIX = {
+    "api_key": "gemini/",
+    "vertex": "vertex_ai/",
+    "fake": "gemini/",
+}
+
+_lock = threading.Lock()
+_initialized = set()
+_models = {}
+_failed_at = {}
+_crewai_llms = {}
+
+
+def gemini_settings():
+    """Backend and credentials from the environment (nothing is initialized)
+
+    GEMINI_BACKEND: "api_key", "vertex" or "fake" (default: decided from the variables below)
+    GEMINI_API_KEY / GOOGLE_API_KEY: Gemini API key
+    USE_VERTEX_AI: "true" to prefer Vertex AI (service account) over the API key
+    GOOGLE_CLOUD_PROJECT / VERTEX_AI_LOCATION: Vertex AI project and region
+
+    Returns:
+        dict with backend (None when nothing is configured), api_key, project, location
+
+    Raises:
+        ValueError: When GEMINI_BACKEND is not a known backend
+    """
+    api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
+    use_vertex_ai = os.getenv('USE_VERTEX_AI', 'false').lower() == 'true'
+    backend = os.getenv('GEMINI_BACKEND')
+    if not backend:
+        if api_key and not use_vertex_ai:
+            backend = "api_key"
+        elif use_vertex_ai or os.getenv('GOOGLE_CLOUD_PROJECT'):
+            backend = "vertex"
+    if backend and backend not in _CREWAI_PREFIX:
+        raise ValueError(f"Unknown GEMINI_BACKEND: {backend!r} (expected one of: {', '.join(_CREWAI_PREFIX)})")
+    return {
+        "backend": backend,
+        "api_key": api_key,
+        "project": os.getenv('GOOGLE_CLOUD_PROJECT', 'eg-konecta-sandbox'),
+        "location": os.getenv('VERTEX_AI_LOCATION', 'us-central1'),
+    }
+
+
+def gemini_backend():
+    """Name of the configured backend, or None"""
+    return gemini_settings()["backend"]
+
+
+def _init_backend(settings):
+    """Configure the SDK once per process (clients and channels are then reused)"""
+    backend = settings["backend"]
+    if backend in _initialized:
+        return
+    if backend == "api_key":
+        import google.generativeai as genai
+        genai.configure(api_key=settings["api_key"])
+        print("🔑 Using Gemini API Key")
+    elif backend == "vertex":
+        import vertexai
+        vertexai.init(project=settings["project"], location=settings["location"])
+        print(f"✅ Vertex AI initialized: {settings['project']} / {settings['location']}")
+    _initialized.add(backend)
+
+
+def get_generative_model(model_name=DEFAULT_MODEL):
+    """Shared GenerativeModel for the configured backend, created on first use
+
+    Returns:
+        google.generativeai / Vertex AI GenerativeModel, FakeGenerativeModel,
+        or None when no backend is configured or initialization failed
+        (retried on calls made INIT_RETRY_SECONDS or more after the failure)
+
+    Raises:
+        ValueError: When GEMINI_BACKEND is not a known backend
+    """
+    settings = gemini_settings()
+    backend = settings["backend"]
+    if not backend:
+        return None
+
+    key = (backend, model_name)
+    with _lock:
+        if key in _models:
+            return _models[key]
+        if time.time() - _failed_at.get(key, 0) < INIT_RETRY_SECONDS:
+            return None
+        try:
+            _init_backend(settings)
+            if backend == "api_key":
+                import google.generativeai as genai
+                model = genai.GenerativeModel(model_name)
+            elif backend == "vertex":
+                from vertexai.preview.generative_models import GenerativeModel
+                model = GenerativeModel(model_name)
+            else:
+                model = FakeGenerativeModel(model_name)
+        except Exception as e:
+            print(f"❌ AI Error ({backend}): {e}")
+            _failed_at[key] = time.time()
+            return None
+        print(f"✅ AI Model: {model_name} ({backend})")
+        _failed_at.pop(key, None)
+        _models[key] = model
+        return model
+
+
+def get_crewai_llm(model_name=None, priority="batch", route=None, **llm_kwargs):
+    """Shared RateLimitedLLM for CrewAI agents on the configured backend
+
+    Args:
+        model_name: Gemini model without a provider prefix (default: the route's model)
+        priority: "interactive" or "batch" class on the shared quota
+        route: Call type in the model router (e.g. "newsletter_compile"); calls are accounted to it
+        **llm_kwargs: Passed to crewai.LLM (e.g. temperature)
+
+    Raises:
+        ValueError: When no backend is configured or GEMINI_BACKEND is unknown
+    """
+    from rate_limited_llm import RateLimitedLLM
+
+    if model_name is None:
+        model_name = get_model_router().model_for(route) if route else DEFAULT_MODEL
+    settings = gemini_settings()
+    backend = settings["backend"]
+    if not backend:
+        raise ValueError("No AI model available. Set USE_VERTEX_AI=true or provide GEMINI_API_KEY")
+
+    key = (backend, model_name, priority, route, tuple(sorted(llm_kwargs.items())))
+    with _lock:
+        if key not in _crewai_llms:
+            if backend == "vertex":
+                try:
+                    _init_backend(settings)
+                except Exception as e:
+                    print(f"⚠️ Vertex AI init warning: {e}")
+                llm_kwargs.update(vertex_project=settings["project"], vertex_location=settings["location"])
+            elif backend == "api_key":
+                llm_kwargs["api_key"] = settings["api_key"]
+            elif backend == "fake":
+                # LiteLLM answers mock_response locally without an API call
+                llm_kwargs.update(api_key="fake", mock_response=FakeGenerativeModel.RESPONSE)
+            _crewai_llms[key] = RateLimitedLLM(model=_CREWAI_PREFIX[backend] + model_name,
+                                               priority=priority, route=route, backend=backend, **llm_kwargs)
+        return _crewai_llms[key]
+
+
+class FakeResponse:
+    """Response/chunk with the .text attribute the SDK responses have"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeStream:
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+class FakeGenerativeModel:
+    """Offline stand-in for GenerativeModel (GEMINI_BACKEND=fake), for tests and local runs"""
+
+    RESPONSE = "This is a placeholder answer from the offline Gemini backend."
+
+    def __init__(self, model_name=DEFAULT_MODEL):
+        self.model_name = model_name
+        self.calls = 0
+
+    def generate_content(self, _prompt, stream=False, **_kwargs):
+        self.calls += 1
+        if stream:
+            words = self.RESPONSE.split(" ")
+            return _FakeStream([FakeResponse(word + " ") for word in words[:-1]] + [FakeResponse(words[-1])])
+        return FakeResponse(self.RESPONSE)
+
+    async def generate_content_async(self, _prompt, stream=False, **_kwargs):
+        return self.generate_content(_prompt, stream=stream)
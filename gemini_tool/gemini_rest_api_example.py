@@ -7,27 +7,89 @@ This approach provides:
 - Useful for debugging or custom integrations
 """
 
+import datetime
 import json
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from google.oauth2 import service_account
 import google.auth.transport.requests
 
+SCOPES = ['https://www.googleapis.com/auth/cloud-platform']
 
-def get_access_token(service_account_file):
-    """Get an access token from service account credentials."""
-    credentials = service_account.Credentials.from_service_account_file(
-        service_account_file,
-        scopes=['https://www.googleapis.com/auth/cloud-platform']
-    )
+
+class CachedTokenProvider:
+    """
+    Service-account access tokens reused until shortly before they expire.
+    
+    Tokens live about an hour; minting one costs a round trip to the OAuth
+    server, so it is done once and then again only when a caller finds the
+    token within refresh_margin of expiry. No background thread is started.
+    """
+    
+    def __init__(self, service_account_file, refresh_margin=300):
+        """
+        Args:
+            service_account_file: Path to the service account JSON key
+            refresh_margin: Seconds before expiry at which a token is refreshed
+        """
+        self.credentials = service_account.Credentials.from_service_account_file(
+            service_account_file, scopes=SCOPES
+        )
+        self.refresh_margin = refresh_margin
+        # Own session, only used under the lock: requests.Session is not thread-safe,
+        # so the token endpoint must not share the API calls' session
+        self._auth_request = google.auth.transport.requests.Request(requests.Session())
+        self._lock = threading.Lock()
+    
+    def _seconds_left(self):
+        if not self.credentials.token or not self.credentials.expiry:
+            return 0.0
+        # google-auth keeps expiry as a naive UTC datetime
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return (self.credentials.expiry - now).total_seconds()
     
-    # Refresh to get an access token
-    auth_req = google.auth.transport.requests.Request()
-    credentials.refresh(auth_req)
+    def refresh(self):
+        """Mint a new token now."""
+        with self._lock:
+            self.credentials.refresh(self._auth_request)
     
-    return credentials.token
+    def token(self):
+        """A valid access token, refreshed only when it is about to expire."""
+        if self._seconds_left() <= self.refresh_margin:
+            with self._lock:
+                # Another thread may have refreshed while we waited for the lock
+                if self._seconds_left() <= self.refresh_margin:
+                    self.credentials.refresh(self._auth_request)
+        return self.credentials.token
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_access_token(service_account_file):
+    """Get an access token from service account credentials (cached per key file)."""
+    with _providers_lock:
+        # Checked and set under the lock so concurrent first calls share one provider
+        provider = _providers.get(service_account_file)
+        if provider is None:
+            provider = _providers[service_account_file] = CachedTokenProvider(service_account_file)
+    return provider.token()
+
 
+def _keep_alive_session(pool_size=10):
+    """HTTP session that keeps TLS connections open between requests."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    return session
 
-def call_gemini_api(access_token, project_id, prompt, location="us-central1"):
+
+_session = _keep_alive_session()
+
+
+def call_gemini_api(access_token, project_id, prompt, location="us-central1", session=None):
     """
     Call Gemini API using REST endpoint.
     
@@ -36,9 +98,13 @@ def call_gemini_api(access_token, project_id, prompt, location="us-central1"):
         project_id: GCP project ID
         prompt: Text prompt for Gemini
         location: GCP region
+        session: requests.Session to send with (default: shared keep-alive session)
         
     Returns:
         Generated text response
+        
+    Raises:
+        requests.HTTPError: On a non-200 response (the response is on the exception)
     """
     # Gemini API endpoint
     url = f"https://{location}-aiplatform.googleapis.com/v1/projects/{project_id}/locations/{location}/publishers/google/models/gemini-2.0-flash-001:generateContent"
@@ -61,7 +127,7 @@ def call_gemini_api(access_token, project_id, prompt, location="us-central1"):
         }
     }
     
-    response = requests.post(url, headers=headers, json=payload)
+    response = (session or _session).post(url, headers=headers, json=payload)
     
     if response.status_code == 200:
         result = response.json()
@@ -70,21 +136,54 @@ def call_gemini_api(access_token, project_id, prompt, location="us-central1"):
         else:
             return "No response generated"
     else:
-        raise Exception(f"API Error {response.status_code}: {response.text}")
+        raise requests.HTTPError(f"API Error {response.status_code}: {response.text}", response=response)
+
+
+class GeminiRestClient:
+    """
+    Reusable REST client: cached token plus one keep-alive session.
+    
+    Usage:
+        client = GeminiRestClient("service-account-key.json")
+        text = client.generate("Hello!")
+    """
+    
+    def __init__(self, service_account_file, project_id=None, location="us-central1"):
+        """
+        Args:
+            service_account_file: Path to the service account JSON key
+            project_id: GCP project ID (default: the key's project)
+            location: GCP region
+        """
+        if project_id is None:
+            with open(service_account_file, 'r') as f:
+                project_id = json.load(f)['project_id']
+        self.project_id = project_id
+        self.location = location
+        self.session = _keep_alive_session()
+        self.tokens = CachedTokenProvider(service_account_file)
+    
+    def generate(self, prompt, location=None):
+        """Generated text for prompt; an expired token is refreshed and the call retried once."""
+        location = location or self.location
+        try:
+            return call_gemini_api(self.tokens.token(), self.project_id, prompt, location, self.session)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 401:
+                raise
+            self.tokens.refresh()
+            return call_gemini_api(self.tokens.token(), self.project_id, prompt, location, self.session)
 
 
 def main():
     """Main function demonstrating Gemini API usage with service account."""
     SERVICE_ACCOUNT_KEY_FILE = "service-account-key.json"
     
-    # Load project ID
-    with open(SERVICE_ACCOUNT_KEY_FILE, 'r') as f:
-        sa_data = json.load(f)
-        PROJECT_ID = sa_data['project_id']
-    
     print(f"🔐 Loading service account credentials...")
-    access_token = get_access_token(SERVICE_ACCOUNT_KEY_FILE)
+    client = GeminiRestClient(SERVICE_ACCOUNT_KEY_FILE)
+    client.tokens.token()
     print(f"✅ Access token obtained")
+    PROJECT_ID = client.project_id
     
     print(f"🚀 Calling Gemini API for project: {PROJECT_ID}\n")
     
@@ -98,7 +197,7 @@ def main():
     print("⏳ Generating response...")
     
     try:
-        response1 = call_gemini_api(access_token, PROJECT_ID, prompt1)
+        response1 = client.generate(prompt1)
         print(f"\n🤖 Gemini Response:\n{response1}")
         print("\n" + "="*60)
         print("✅ Success!")
@@ -108,7 +207,7 @@ def main():
         
         # Try europe-west1 as alternative
         try:
-            response1 = call_gemini_api(access_token, PROJECT_ID, prompt1, location="europe-west1")
+            response1 = client.generate(prompt1, location="europe-west1")
             print(f"\n🤖 Gemini Response:\n{response1}")
             print("\n" + "="*60)
             print("✅ Success with europe-west1 region!")
@@ -126,7 +225,7 @@ def main():
     print("⏳ Generating response...")
     
     try:
-        response2 = call_gemini_api(access_token, PROJECT_ID, prompt2)
+        response2 = client.generate(prompt2)
         print(f"\n🤖 Gemini Response:\n{response2}")
         print("\n" + "="*60)
     except Exception as e:
@@ -143,7 +242,7 @@ def main():
     print("⏳ Generating response...")
     
     try:
-        response3 = call_gemini_api(access_token, PROJECT_ID, prompt3)
+        response3 = client.generate(prompt3)
         print(f"\n🤖 Gemini Response:\n{response3}")
         print("\n" + "="*60)
         print("✅ All examples completed successfully!")
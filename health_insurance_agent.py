@@ -5,7 +5,6 @@ CrewAI agent specialized in health insurance support
 
 from crewai import Agent
 from langchain_google_genai import ChatGoogleGenerativeAI
-import os
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,18 +15,9 @@ class HealthInsuranceAgentConfig:
     
     def _setup_llm(self):
         """Setup Gemini LLM"""
-        api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
-        
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY or GOOGLE_API_KEY not found in environment variables")
-        
-        # Using the standard LLM class from CrewAI for better compatibility
-        from crewai import LLM
-        return LLM(
-            model="gemini/gemini-1.5-flash",
-            api_key=api_key,
-            temperature=0.7
-        )
+        # Standard CrewAI LLM, throttled by the quota shared with the other apps
+        from gemini_client import get_crewai_llm
+        return get_crewai_llm(priority="interactive", route="chat", temperature=0.7)
     
     def create_insurance_agent(self, language="ar"):
         """Create health insurance support agent"""
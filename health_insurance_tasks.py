@@ -170,15 +170,19 @@ Provide a clear and helpful answer in English.
             expected_output=expected_output
         )
     
-    def answer_general_task(self, agent, user_query, language="ar"):
-        """Task to answer general questions"""
+    def answer_general_task(self, agent, user_query, language="ar", faq_context=None):
+        """Task to answer general questions
+        
+        faq_context may be passed explicitly (e.g. a "{faq_context}" placeholder
+        when the task is built once as a reusable template).
+        """
         
         contact_info = self.kb.get_contact_info(language)
         context = self.kb.get_context_for_agent(language)
         
         # Try to find relevant FAQ
-        faq_answer = self.kb.search_faq(user_query, language)
-        faq_context = f"\n\nRelevant FAQ:\n{faq_answer}" if faq_answer else ""
+        if faq_context is None:
+            faq_context = self.get_faq_context(user_query, language)
         
         if language == "ar":
             description = f"""
@@ -217,3 +221,8 @@ Provide a helpful answer in English. If you don't have sufficient information, d
             agent=agent,
             expected_output=expected_output
         )
+    
+    def get_faq_context(self, user_query, language="ar"):
+        """Relevant FAQ snippet appended to the general answer task"""
+        faq_answer = self.kb.search_faq(user_query, language)
+        return f"\n\nRelevant FAQ:\n{faq_answer}" if faq_answer else ""
@@ -0,0 +1,203 @@
+"""
+Local Intent Router
+Bilingual (Arabic/English) query classifier shared by the Telegram bots.
+Routes common queries without an LLM round trip and reports when it is unsure.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict, namedtuple
+from collections.abc import Mapping
+
+IntentResult = namedtuple("IntentResult", ["intent", "confidence", "source"])
+
+# Priority order matters: the first intent whose keyword matches wins ties,
+# which mirrors the order of the original keyword checks in telegram_bot.py
+INTENT_KEYWORDS = {
+    "coverage": ["coverage", "package", "تغطية", "باقة", "باقات"],
+    "claim": ["claim", "مطالبة", "تقديم"],
+    "provider": ["provider", "hospital", "مستشفى", "مستشفيات", "مقدم", "عيادة"],
+    "contact": ["contact", "phone", "تواصل", "هاتف", "رقم"],
+    "faq": ["faq", "questions", "أسئلة"],
+}
+
+# Extra labelled phrases for intents the knowledge base text does not describe well
+SEED_PHRASES = {
+    "coverage": [
+        "what does my plan cover", "is this covered", "premium plan benefits", "basic plan",
+        "ماذا يغطي التأمين", "هل هذا مغطى", "مزايا الباقة الممتازة", "الباقة الأساسية",
+    ],
+    "claim": [
+        "how do i get reimbursed", "submit invoice", "refund my bill", "claim status",
+        "كيف أسترد المبلغ", "تقديم الفواتير", "استرداد", "حالة المطالبة",
+    ],
+    "provider": [
+        "nearest hospital", "which pharmacy", "lab near me", "doctor network",
+        "أقرب مستشفى", "أي صيدلية", "معمل قريب", "شبكة الأطباء",
+    ],
+    "contact": [
+        "call you", "email address", "working hours", "customer service number",
+        "اتصل بكم", "البريد الإلكتروني", "مواعيد العمل", "رقم خدمة العملاء",
+    ],
+    "faq": [
+        "add my family", "waiting period", "treatment abroad", "renew subscription",
+        "إضافة عائلتي", "فترة الانتظار", "العلاج في الخارج", "تجديد الاشتراك",
+    ],
+    "general": [
+        "hello", "hi", "thanks", "thank you", "good morning", "who are you", "tell me more",
+        "مرحبا", "السلام عليكم", "شكرا", "صباح الخير", "من أنت", "أخبرني المزيد",
+    ],
+}
+
+# Knowledge base sections used as training text for each intent
+KNOWLEDGE_SECTIONS = {
+    "coverage": "coverages",
+    "claim": "claims",
+    "provider": "providers",
+    "contact": "contact",
+    "faq": "faq",
+}
+
+_WORD_RE = re.compile(r"[a-zء-ي0-9]+")
+_DIACRITICS_RE = re.compile(r"[ً-ْـ]")
+
+
+def tokenize(text):
+    """Words plus character trigrams (robust to Arabic prefixes and typos)"""
+    text = _DIACRITICS_RE.sub("", text.lower())
+    features = []
+    for word in _WORD_RE.findall(text):
+        features.append(word)
+        padded = f"<{word}>"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+class NaiveBayesIntentModel:
+    """Multinomial Naive Bayes over word + character trigram features"""
+
+    def __init__(self, alpha=0.5):
+        self.alpha = alpha
+        self.class_counts = Counter()
+        self.feature_counts = defaultdict(Counter)
+        self.total_features = Counter()
+        self.vocabulary = set()
+
+    def train(self, samples):
+        """Train on an iterable of (text, intent) pairs"""
+        for text, intent in samples:
+            features = tokenize(text)
+            if not features:
+                continue
+            self.class_counts[intent] += 1
+            self.feature_counts[intent].update(features)
+            self.total_features[intent] += len(features)
+            self.vocabulary.update(features)
+        return self
+
+    def predict(self, text):
+        """Get (intent, probability) for the most likely intent, or (None, 0.0)"""
+        all_features = tokenize(text)
+        features = [f for f in all_features if f in self.vocabulary]
+        if not features or not self.class_counts:
+            return None, 0.0
+
+        total_docs = sum(self.class_counts.values())
+        vocab_size = len(self.vocabulary)
+        scores = {}
+        for intent, doc_count in self.class_counts.items():
+            counts = self.feature_counts[intent]
+            denominator = self.total_features[intent] + self.alpha * vocab_size
+            score = math.log(doc_count / total_docs)
+            for feature in features:
+                score += math.log((counts[feature] + self.alpha) / denominator)
+            scores[intent] = score
+
+        # Naive Bayes is overconfident on long inputs: soften the softmax by the
+        # square root of the feature count and discount queries made mostly of
+        # features never seen in training
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        temperature = math.sqrt(len(features))
+        normalizer = sum(math.exp((score - top) / temperature) for score in scores.values())
+        coverage = len(features) / len(all_features)
+        return best, coverage / normalizer
+
+
+class IntentRouter:
+    """Keyword automaton first, trained model second, LLM only when uncertain"""
+
+    def __init__(self, knowledge_base, threshold=0.7):
+        """
+        Args:
+            knowledge_base: HealthInsuranceKnowledgeBase used as training data
+            threshold: Minimum confidence to route without the LLM classifier
+        """
+        self.threshold = threshold
+        self.keyword_pattern = self._compile_keywords()
+        self.retrain(knowledge_base)
+
+    def retrain(self, knowledge_base):
+        """Retrain the model (e.g. after the knowledge base reloads)"""
+        self.model = NaiveBayesIntentModel().train(self._training_samples(knowledge_base))
+
+    @staticmethod
+    def _compile_keywords():
+        """Compile all keyword lists into a single alternation with one group per intent"""
+        groups = []
+        for intent, keywords in INTENT_KEYWORDS.items():
+            # Longest first so the regex prefers the most specific keyword
+            alternatives = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+            groups.append(f"(?P<{intent}>{alternatives})")
+        return re.compile("|".join(groups))
+
+    @staticmethod
+    def _training_samples(knowledge_base):
+        """Labelled samples from knowledge base sections, keywords and seed phrases"""
+        knowledge = knowledge_base.knowledge
+        for intent, section in KNOWLEDGE_SECTIONS.items():
+            for content in knowledge[section].values():
+                if isinstance(content, Mapping):
+                    content = "\n".join(content.values())
+                if isinstance(content, (list, tuple)):
+                    # FAQ entries: the questions are what users actually type
+                    content = "\n".join(faq["q"] for faq in content)
+                for line in content.split("\n"):
+                    if line.strip():
+                        yield line, intent
+
+        for intent, keywords in INTENT_KEYWORDS.items():
+            for keyword in keywords:
+                yield keyword, intent
+
+        for intent, phrases in SEED_PHRASES.items():
+            for phrase in phrases:
+                yield phrase, intent
+
+    def classify(self, text):
+        """Classify a query
+
+        Returns:
+            IntentResult with source 'keyword', 'model' or 'none'
+        """
+        text_lower = text.lower()
+
+        matched = []
+        for match in self.keyword_pattern.finditer(text_lower):
+            if match.lastgroup not in matched:
+                matched.append(match.lastgroup)
+        if matched:
+            # Keyword order follows INTENT_KEYWORDS priority
+            intent = min(matched, key=list(INTENT_KEYWORDS).index)
+            confidence = 1.0 if len(matched) == 1 else 0.75
+            return IntentResult(intent, confidence, "keyword")
+
+        intent, confidence = self.model.predict(text)
+        if intent is None:
+            return IntentResult("general", 0.0, "none")
+        return IntentResult(intent, confidence, "model")
+
+    def route(self, text):
+        """Get the intent if confident enough, otherwise None (fall back to the LLM)"""
+        result = self.classify(text)
+        return result.intent if result.confidence >= self.threshold else None
@@ -1,228 +1,147 @@
 """
 Health Insurance Knowledge Base
 Bilingual (Arabic/English) knowledge base for health insurance chatbot
+Content lives in knowledge_base.json and is hot-reloaded when the file changes
 """
 
-class HealthInsuranceKnowledgeBase:
-    def __init__(self):
-        self.knowledge = {
-            "coverages": {
-                "ar": {
-                    "basic": """
-التغطية الأساسية للتأمين الصحي الشامل:
-• الفحوصات الطبية والاستشارات
-• الأدوية الموصوفة
-• الإقامة في المستشفى
-• العمليات الجراحية
-• الفحوصات المخبرية والأشعة
-• رعاية الطوارئ
-• رعاية الأمومة (حسب الباقة)
-                    """,
-                    "premium": """
-التغطية الممتازة للتأمين الصحي الشامل:
-✨ جميع مزايا الباقة الأساسية
-• غرف خاصة في المستشفى
-• تغطية الأسنان الشاملة
-• النظارات والعدسات اللاصقة
-• العلاج الطبيعي
-• الطب البديل
-• فحوصات دورية مجانية
-• تأمين سفر دولي
-                    """
-                },
-                "en": {
-                    "basic": """
-Basic Comprehensive Health Insurance Coverage:
-• Medical examinations and consultations
-• Prescribed medications
-• Hospital accommodation
-• Surgical operations
-• Laboratory tests and X-rays
-• Emergency care
-• Maternity care (depending on package)
-                    """,
-                    "premium": """
-Premium Comprehensive Health Insurance Coverage:
-✨ All basic package benefits
-• Private hospital rooms
-• Comprehensive dental coverage
-• Glasses and contact lenses
-• Physiotherapy
-• Alternative medicine
-• Free periodic checkups
-• International travel insurance
-                    """
-                }
-            },
-            "claims": {
-                "ar": """
-خطوات تقديم مطالبة التأمين:
-
-1️⃣ احصل على التقارير الطبية
-   • تقرير الطبيب المعالج
-   • الفواتير الأصلية
-   • نتائج الفحوصات
-
-2️⃣ املأ نموذج المطالبة
-   • متوفر في الموقع الإلكتروني
-   • أو من مكاتب الخدمة
-
-3️⃣ قدم المستندات
-   • عبر البوابة الإلكترونية
-   • أو بالبريد الإلكتروني: claims@insurance.com
-   • أو شخصياً في الفروع
-
-4️⃣ المتابعة
-   • ستتلقى رقم مرجعي
-   • المراجعة خلال 3-5 أيام عمل
-   • الدفع خلال 10 أيام من الموافقة
-
-📞 للاستفسار: 19123
-                """,
-                "en": """
-Steps to File an Insurance Claim:
-
-1️⃣ Obtain Medical Reports
-   • Treating physician's report
-   • Original invoices
-   • Test results
-
-2️⃣ Fill Out Claim Form
-   • Available on website
-   • Or from service offices
-
-3️⃣ Submit Documents
-   • Via online portal
-   • Or email: claims@insurance.com
-   • Or in person at branches
-
-4️⃣ Follow Up
-   • You'll receive a reference number
-   • Review within 3-5 business days
-   • Payment within 10 days of approval
-
-📞 For inquiries: 19123
-                """
-            },
-            "providers": {
-                "ar": """
-شبكة مقدمي الخدمة الصحية:
-
-🏥 المستشفيات الرئيسية:
-• مستشفى النيل التخصصي
-• مستشفى السلام الدولي
-• مستشفى الشفاء المركزي
-• مستشفى دار الفؤاد
-
-🔬 المعامل والأشعة:
-• معامل البرج
-• الفا لاب
-• مختبرات المستقبل
-
-💊 الصيدليات:
-• صيدليات 19011
-• العزبي
-• صيدليات النهدي
-
-📍 للبحث عن أقرب مقدم خدمة:
-• الموقع الإلكتروني: www.insurance.com/providers
-• التطبيق المحمول
-• اتصل بـ 19123
-                """,
-                "en": """
-Healthcare Provider Network:
-
-🏥 Major Hospitals:
-• Al Nile Specialized Hospital
-• Al Salam International Hospital
-• Al Shifa Central Hospital
-• Dar Al Fouad Hospital
-
-🔬 Labs and Radiology:
-• Al Borg Laboratories
-• Alpha Lab
-• Future Laboratories
-
-💊 Pharmacies:
-• 19011 Pharmacies
-• Al Ezaby
-• Nahdi Pharmacies
-
-📍 To find the nearest provider:
-• Website: www.insurance.com/providers
-• Mobile app
-• Call 19123
-                """
-            },
-            "faq": {
-                "ar": [
-                    {
-                        "q": "كيف أضيف أفراد عائلتي للتأمين؟",
-                        "a": "يمكنك إضافة الزوج/الزوجة والأطفال حتى 21 سنة (أو 25 سنة إذا كانوا طلاباً). قدم طلب عبر الموقع الإلكتروني أو اتصل بخدمة العملاء."
-                    },
-                    {
-                        "q": "ما هي فترة الانتظار للأمراض المزمنة؟",
-                        "a": "فترة الانتظار 6 أشهر للأمراض المزمنة المُشخصة قبل التأمين. الحالات الطارئة مغطاة فوراً."
-                    },
-                    {
-                        "q": "هل يغطي التأمين العلاج في الخارج؟",
-                        "a": "الباقة الممتازة تشمل تغطية دولية في حالات الطوارئ أثناء السفر. للعلاج المخطط بالخارج، يلزم موافقة مسبقة."
-                    },
-                    {
-                        "q": "كيف أجدد اشتراكي؟",
-                        "a": "التجديد تلقائي قبل انتهاء الفترة بـ 30 يوم. ستصلك رسالة تأكيد. يمكنك أيضاً التجديد يدوياً عبر الموقع."
-                    }
-                ],
-                "en": [
-                    {
-                        "q": "How do I add family members to insurance?",
-                        "a": "You can add spouse and children up to 21 years (or 25 if students). Submit a request via website or call customer service."
-                    },
-                    {
-                        "q": "What is the waiting period for chronic diseases?",
-                        "a": "Waiting period is 6 months for chronic diseases diagnosed before insurance. Emergency cases are covered immediately."
-                    },
-                    {
-                        "q": "Does insurance cover treatment abroad?",
-                        "a": "Premium package includes international coverage for emergencies during travel. For planned treatment abroad, prior approval is required."
-                    },
-                    {
-                        "q": "How do I renew my subscription?",
-                        "a": "Renewal is automatic 30 days before expiration. You'll receive a confirmation message. You can also renew manually via website."
-                    }
-                ]
-            },
-            "contact": {
-                "ar": """
-📞 معلومات الاتصال:
-
-الخط الساخن: 19123
-📧 البريد: support@insurance.com
-💬 الدردشة المباشرة: www.insurance.com/chat
-
-⏰ أوقات العمل:
-الأحد - الخميس: 9 صباحاً - 6 مساءً
-السبت: 10 صباحاً - 3 مساءً
-الجمعة: مغلق
-
-🚨 الطوارئ: متاح 24/7
-                """,
-                "en": """
-📞 Contact Information:
-
-Hotline: 19123
-📧 Email: support@insurance.com
-💬 Live Chat: www.insurance.com/chat
-
-⏰ Working Hours:
-Sunday - Thursday: 9 AM - 6 PM
-Saturday: 10 AM - 3 PM
-Friday: Closed
+import hashlib
+import json
+import logging
+import marshal
+import mmap
+import sys
+from pathlib import Path
+from types import MappingProxyType
+
+from file_watcher import FileWatcher, file_signature
+from text_search import BM25Index
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+
+def _intern(value):
+    """Intern every string so repeated keys/values share one object"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(k): _intern(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_intern(v) for v in value]
+    return value
+
+def _freeze(value):
+    """Read-only view: dicts become mapping proxies, lists become tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def load_compiled_knowledge(data_file):
+    """Load the knowledge data file as an immutable, interned structure
+    
+    A marshal snapshot (<data_file>.snapshot) is read through mmap when
+    current, so every worker process on a host skips reading and parsing the
+    JSON and reads the same page-cached bytes. The snapshot is keyed by the
+    source's (mtime_ns, size), checked with one stat; only when those change
+    is the source read and hashed, and a touched but unchanged file just
+    re-stamps the snapshot.
+    
+    Returns:
+        (knowledge, digest) tuple, digest being the source's SHA-256
+    """
+    signature = file_signature(data_file)
+    snapshot_file = f"{data_file}.snapshot"
+    
+    snapshot_digest = None
+    try:
+        with open(snapshot_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            version, source_signature, source_digest, knowledge = marshal.loads(mm)
+        if version == SNAPSHOT_VERSION:
+            if source_signature == signature:
+                return _freeze(_intern(knowledge)), source_digest
+            snapshot_digest = source_digest
+    except (OSError, ValueError, EOFError, TypeError):
+        pass  # Missing, old-format or corrupt snapshot - rebuild below
+    
+    raw = Path(data_file).read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if digest != snapshot_digest:
+        knowledge = json.loads(raw.decode('utf-8'))
+    try:
+        tmp_file = Path(f"{snapshot_file}.tmp")
+        tmp_file.write_bytes(marshal.dumps((SNAPSHOT_VERSION, signature, digest, knowledge)))
+        tmp_file.replace(snapshot_file)
+    except OSError as e:
+        logger.warning(f"Could not write knowledge snapshot: {e}")
+    
+    return _freeze(_intern(knowledge)), digest
 
-🚨 Emergency: Available 24/7
-                """
-            }
+class HealthInsuranceKnowledgeBase:
+    def __init__(self, data_file="knowledge_base.json"):
+        """
+        Args:
+            data_file: JSON knowledge file (relative paths resolve next to this module)
+        """
+        path = Path(data_file)
+        if not path.is_absolute():
+            path = Path(__file__).parent / path
+        self.data_file = str(path)
+        self._reload_listeners = []
+        self._watcher = None
+        self._state = self._compile()
+    
+    def _compile(self):
+        """Load the data file and build its search index"""
+        knowledge, digest = load_compiled_knowledge(self.data_file)
+        
+        # Index FAQ questions (weighted twice) and answers per language
+        faq_index = {
+            language: BM25Index().build(faqs, lambda faq: f"{faq['q']} {faq['q']} {faq['a']}")
+            for language, faqs in knowledge["faq"].items()
         }
+        return knowledge, faq_index, digest
+    
+    @property
+    def knowledge(self):
+        return self._state[0]
+    
+    @property
+    def faq_index(self):
+        return self._state[1]
+    
+    @property
+    def version(self):
+        """SHA-256 of the loaded data file"""
+        return self._state[2]
+    
+    def reload(self):
+        """Reload the data file and swap it in atomically
+        
+        Returns:
+            True if the content changed (reload listeners are notified)
+        """
+        state = self._compile()
+        if state[2] == self._state[2]:
+            return False
+        
+        # Single assignment: in-flight lookups keep the state they started with
+        self._state = state
+        logger.info(f"📚 Knowledge base reloaded from {self.data_file} ({state[2][:12]})")
+        for listener in list(self._reload_listeners):
+            listener(self)
+        return True
+    
+    def add_reload_listener(self, callback):
+        """Call callback(knowledge_base) after each successful reload"""
+        self._reload_listeners.append(callback)
+    
+    def watch(self, interval=2.0):
+        """Hot-reload whenever the data file changes"""
+        if self._watcher is None:
+            self._watcher = FileWatcher(self.data_file, lambda _: self.reload(), interval).start()
+        return self._watcher
     
     def get_coverage_info(self, coverage_type="basic", language="ar"):
         """Get coverage information"""
@@ -240,17 +159,25 @@ Friday: Closed
         """Get contact information"""
         return self.knowledge["contact"].get(language, "معلومات غير متوفرة")
     
-    def search_faq(self, query, language="ar"):
-        """Search FAQ by query"""
-        faqs = self.knowledge["faq"].get(language, [])
-        query_lower = query.lower()
+    def search_faqs(self, query, language="ar", top_k=3):
+        """Ranked FAQ search
         
-        # Simple keyword matching
-        for faq in faqs:
-            if any(word in faq["q"].lower() for word in query_lower.split()):
-                return f"❓ {faq['q']}\n\n✅ {faq['a']}"
+        Returns:
+            List of (score, faq) pairs, best first; empty if nothing matches
+        """
+        index = self.faq_index.get(language)
+        if not index:
+            return []
+        return index.search(query, top_k)
+    
+    def search_faq(self, query, language="ar"):
+        """Search FAQ by query (best match only)"""
+        results = self.search_faqs(query, language, top_k=1)
+        if not results:
+            return None
         
-        return None
+        faq = results[0][1]
+        return f"❓ {faq['q']}\n\n✅ {faq['a']}"
     
     def get_all_faqs(self, language="ar"):
         """Get all FAQs"""
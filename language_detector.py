@@ -4,12 +4,140 @@ Detects Arabic vs English and maintains conversation context
 """
 
 import re
-from collections import defaultdict
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# UTF-8 lead bytes 0xD8-0xDB start exactly the code points U+0600-U+06FF (Arabic
+# block), so counting Arabic letters is one bytes.translate pass with this table
+_NON_ARABIC_LEAD_BYTES = bytes(b for b in range(256) if not 0xD8 <= b <= 0xDB)
+
+_WORD_RE = re.compile(r"[a-z0-9]+|[\u0600-\u06FF]+")
+
+# Arabizi: Arabic written in Latin letters, with digits standing in for Arabic sounds
+_ARABIZI_DIGIT_RE = re.compile(r"^(?=.*[a-z])[a-z]*[235789][a-z]+$|^[a-z]+[235789]$")
+ARABIZI_WORDS = {
+    "ana", "enta", "enti", "ezay", "ezayak", "ezayek", "keda", "mesh", "msh", "yalla",
+    "shukran", "shokran", "inshallah", "insha2allah", "habibi", "ahlan", "marhaba",
+    "salam", "3ayez", "3ayza", "leh", "eh", "ayez", "3ndy", "fe", "kam", "emta", "feen",
+}
+
+_SWITCH_TO_EN = ("english", "تحويل للإنجليزية")  # Also covers "switch to english"
+_SWITCH_TO_AR = ("arabic", "عربي", "تحويل للعربية")
+
+
+class LanguagePreferenceStore:
+    """Bounded LRU of per-user language preferences with TTL and optional SQLite persistence
+    
+    Each entry is a single int: (last_seen_seconds << 1) | language_bit, so a
+    preference costs one small int instead of a string plus a timestamp.
+    Reads never insert entries.
+    """
+    
+    LANGUAGES = ("ar", "en")  # Index = stored bit
+    
+    def __init__(self, max_users=100000, ttl_seconds=30 * 24 * 3600, db_path=None):
+        """
+        Args:
+            max_users: Entries kept in memory; least recently used are evicted
+            ttl_seconds: Preferences unused for this long are forgotten
+            db_path: Optional SQLite file; preferences then survive restarts
+        """
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute('''CREATE TABLE IF NOT EXISTS user_languages
+                                (user_id TEXT PRIMARY KEY,
+                                 packed INTEGER NOT NULL)''')
+            self._db.commit()
+            self.purge_expired()
+    
+    def _load(self, user_id):
+        """Read-through from SQLite on a memory miss (caller holds the lock)"""
+        if self._db is None:
+            return None
+        row = self._db.execute('SELECT packed FROM user_languages WHERE user_id = ?', (user_id,)).fetchone()
+        return row[0] if row else None
+    
+    def get(self, user_id, default="ar"):
+        """Get a user's language without creating an entry"""
+        key = str(user_id)
+        now = int(time.time())
+        with self._lock:
+            packed = self._entries.get(key)
+            if packed is None:
+                packed = self._load(key)
+            if packed is not None and now - (packed >> 1) > self.ttl_seconds:
+                self._forget(key)
+                packed = None
+            if packed is None:
+                return default
+            self._entries[key] = packed
+            self._entries.move_to_end(key)
+            self._evict()
+            return self.LANGUAGES[packed & 1]
+    
+    def set(self, user_id, language):
+        """Remember a user's language (refreshes its TTL)"""
+        key = str(user_id)
+        now = int(time.time())
+        packed = (now << 1) | self.LANGUAGES.index(language)
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = packed
+            self._entries.move_to_end(key)
+            self._evict()
+            # Only write through when the language changed or the TTL is half spent
+            if self._db is not None and (
+                previous is None or (previous & 1) != (packed & 1)
+                or now - (previous >> 1) > self.ttl_seconds // 2
+            ):
+                with self._db:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO user_languages (user_id, packed) VALUES (?, ?)',
+                        (key, packed)
+                    )
+    
+    def _forget(self, key):
+        """Drop an expired preference from memory and SQLite (caller holds the lock)"""
+        self._entries.pop(key, None)
+        if self._db is not None:
+            with self._db:
+                self._db.execute('DELETE FROM user_languages WHERE user_id = ?', (key,))
+    
+    def purge_expired(self):
+        """Delete every preference past its TTL; returns how many rows were removed from SQLite"""
+        # packed < cutoff  <=>  last_seen < now - ttl_seconds
+        cutoff = (int(time.time()) - self.ttl_seconds) << 1
+        with self._lock:
+            for key in [key for key, packed in self._entries.items() if packed < cutoff]:
+                del self._entries[key]
+            if self._db is None:
+                return 0
+            with self._db:
+                return self._db.execute('DELETE FROM user_languages WHERE packed < ?', (cutoff,)).rowcount
+    
+    def _evict(self):
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+    
+    def __contains__(self, user_id):
+        return self.get(user_id, default=None) is not None
+    
+    def __len__(self):
+        return len(self._entries)
+
 
 class LanguageDetector:
-    def __init__(self):
-        # Store language preference per user
-        self.user_languages = defaultdict(lambda: "ar")  # Default to Arabic
+    def __init__(self, preference_store=None):
+        # Store language preference per user (bounded; optionally persisted)
+        self.user_languages = preference_store if preference_store is not None else LanguagePreferenceStore()
         
         # Common English and Arabic words for detection
         self.english_words = {
@@ -24,63 +152,89 @@ class LanguageDetector:
             "على", "من", "إلى", "هذا", "هذه", "ذلك", "شكرا", "مساعدة"
         }
     
-    def detect_language(self, text, user_id=None):
+    def classify_text(self, text):
         """
-        Detect language of text
-        Returns: 'ar' for Arabic, 'en' for English
+        Classify a single text without touching user state
+        Returns: 'ar', 'en', or None when the text carries no signal
         """
-        if not text or not text.strip():
-            return self.user_languages.get(user_id, "ar") if user_id else "ar"
+        if not text:
+            return None
         
-        text_lower = text.lower().strip()
+        text_lower = text.lower()
         
-        # Check for explicit language switching commands
-        if any(cmd in text_lower for cmd in ["english", "switch to english", "تحويل للإنجليزية"]):
-            if user_id:
-                self.user_languages[user_id] = "en"
+        # Explicit language switching commands
+        if any(cmd in text_lower for cmd in _SWITCH_TO_EN):
             return "en"
+        if any(cmd in text_lower for cmd in _SWITCH_TO_AR):
+            return "ar"
         
-        if any(cmd in text_lower for cmd in ["arabic", "عربي", "switch to arabic", "تحويل للعربية"]):
-            if user_id:
-                self.user_languages[user_id] = "ar"
+        total_chars = len(text) - text.count(" ") - text.count("\n") - text.count("\t")
+        if total_chars <= 0:
+            return None
+        
+        # If more than 30% Arabic characters, it's Arabic
+        arabic_chars = len(text.encode("utf-8").translate(None, _NON_ARABIC_LEAD_BYTES))
+        if arabic_chars / total_chars > 0.3:
             return "ar"
         
-        # Detect Arabic characters
-        arabic_chars = len(re.findall(r'[\u0600-\u06FF]', text))
-        total_chars = len(re.sub(r'\s', '', text))
+        words = _WORD_RE.findall(text_lower)
+        if not words:
+            return None
         
-        if total_chars == 0:
-            return self.user_languages.get(user_id, "ar") if user_id else "ar"
+        # Arabizi (e.g. "ana 3ayez a3raf") is Arabic typed on a Latin keyboard
+        # Only words mixing letters and digits need the regex
+        arabizi = sum(1 for w in words if w in ARABIZI_WORDS or (not w.isalpha() and _ARABIZI_DIGIT_RE.match(w)))
+        if arabizi and arabizi / len(words) >= 0.3:
+            return "ar"
         
-        arabic_ratio = arabic_chars / total_chars
+        word_set = set(words)
+        if not word_set.isdisjoint(self.english_words):
+            return "en"
+        if not word_set.isdisjoint(self.arabic_words):
+            return "ar"
+        # Latin letters without an Arabizi signal are English ("hospital list");
+        # only digits and symbols carry no signal
+        if any(not w.isdigit() and w.isascii() for w in words):
+            return "en"
+        return None
+    
+    def detect_batch(self, texts, default="ar"):
+        """
+        Classify many texts at once (logs, backfills) without touching user state
+        Returns: list of 'ar' / 'en', using default where a text has no signal
+        """
+        classify = self.classify_text
+        return [classify(text) or default for text in texts]
+    
+    def detect_language(self, text, user_id=None):
+        """
+        Detect language of text
+        Returns: 'ar' for Arabic, 'en' for English
+        """
+        previous = self.user_languages.get(user_id) if user_id else "ar"
+        if not text or not text.strip():
+            return previous
         
-        # If more than 30% Arabic characters, it's Arabic
-        if arabic_ratio > 0.3:
-            detected = "ar"
-        # Check for English keywords
-        elif any(word in text_lower for word in self.english_words):
-            detected = "en"
-        # Check for Arabic keywords
-        elif any(word in text for word in self.arabic_words):
-            detected = "ar"
-        # Default to previous user language or Arabic
-        else:
-            detected = self.user_languages.get(user_id, "ar") if user_id else "ar"
+        detected = self.classify_text(text)
+        
+        # Texts without a clear signal (e.g. numbers, emoji) keep the previous language
+        if detected is None:
+            return previous
         
         # Store user preference
         if user_id:
-            self.user_languages[user_id] = detected
+            self.user_languages.set(user_id, detected)
         
         return detected
     
     def get_user_language(self, user_id):
         """Get stored language preference for user"""
-        return self.user_languages.get(user_id, "ar")
+        return self.user_languages.get(user_id)
     
     def set_user_language(self, user_id, language):
         """Manually set user language preference"""
         if language in ["ar", "en"]:
-            self.user_languages[user_id] = language
+            self.user_languages.set(user_id, language)
     
     def get_greeting(self, language):
         """Get greeting message in appropriate language"""
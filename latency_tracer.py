@@ -0,0 +1,156 @@
+"""
+Latency Tracer
+Lightweight per-update span tracing with OpenTelemetry-compatible JSON export
+and p50/p95 aggregation per pipeline stage
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger("latency")
+
+_current_trace = ContextVar("current_trace", default=None)
+
+
+def _new_id(num_bytes):
+    return os.urandom(num_bytes).hex()
+
+
+class Span:
+    """One timed stage of a trace"""
+
+    def __init__(self, name, trace_id, parent_span_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_span_id = parent_span_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def duration_ms(self):
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def to_otel(self):
+        """Span in the OTLP/JSON field layout"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+
+
+class LatencyTracer:
+    """Records spans per update, logs each finished trace as JSON and keeps stage percentiles"""
+
+    def __init__(self, service_name, window=1000, export_logs=True):
+        """
+        Args:
+            service_name: Reported as the OTel resource service.name
+            window: Number of recent durations kept per stage for percentiles
+            export_logs: Log every finished trace as one JSON line
+        """
+        self.service_name = service_name
+        self.export_logs = export_logs
+        self._durations = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name, **attributes):
+        """Root span for one update; nested span() calls attach to it"""
+        root = Span(name, _new_id(16), attributes=attributes)
+        spans = [root]
+        token = _current_trace.set((spans, root))
+        try:
+            yield root
+        except Exception as e:
+            root.error = repr(e)
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            _current_trace.reset(token)
+            self._finish(spans)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time a stage of the current trace (a no-op outside of trace())"""
+        current = _current_trace.get()
+        if current is None:
+            yield None
+            return
+
+        spans, parent = current
+        span = Span(name, parent.trace_id, parent.span_id, attributes)
+        spans.append(span)
+        token = _current_trace.set((spans, span))
+        try:
+            yield span
+        except Exception as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_trace.reset(token)
+
+    def _finish(self, spans):
+        with self._lock:
+            for span in spans:
+                self._durations[span.name].append(span.duration_ms)
+
+        if self.export_logs:
+            logger.info(json.dumps(self.to_otel(spans), ensure_ascii=False))
+
+    def to_otel(self, spans):
+        """Wrap spans in an OTLP/JSON resourceSpans envelope"""
+        return {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": "latency_tracer"},
+                    "spans": [span.to_otel() for span in spans],
+                }],
+            }]
+        }
+
+    def stats(self):
+        """Get count/p50/p95/max in milliseconds per stage"""
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self._durations.items()}
+
+        stats = {}
+        for name, values in durations.items():
+            if not values:
+                continue
+            stats[name] = {
+                "count": len(values),
+                "p50_ms": round(_percentile(values, 50), 2),
+                "p95_ms": round(_percentile(values, 95), 2),
+                "max_ms": round(values[-1], 2),
+            }
+        return stats
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
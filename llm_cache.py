@@ -0,0 +1,184 @@
+"""
+LLM Response Cache
+Disk-backed cache of model responses keyed by model, messages and call parameters,
+so reruns with identical inputs do not repeat API calls
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def cache_key(model, messages, temperature=None, tools=None, available_functions=None, **params):
+    """Stable SHA-256 of everything that determines a response
+
+    Args:
+        model: Model name
+        messages: Prompt messages (or a prompt string)
+        temperature: Sampling temperature
+        tools: Tool schemas offered to the model
+        available_functions: Functions the tools call, by name
+        **params: Other generation parameters (stop, max_tokens, top_p, seed, ...); None values are ignored
+    """
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "tools": tools,
+        # Functions themselves are not serializable; their names identify them
+        "functions": sorted(available_functions) if available_functions else None,
+        "params": {name: value for name, value in params.items() if value is not None},
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Responses in a SQLite file with a TTL and least-recently-used eviction by total size"""
+
+    def __init__(self, db_path, ttl_seconds=7 * 24 * 3600, max_bytes=64 * 1024 * 1024, bypass=False):
+        """
+        Args:
+            db_path: SQLite file (created if missing)
+            ttl_seconds: Entries older than this are treated as misses and removed
+            max_bytes: Least recently used entries are evicted beyond this total size
+            bypass: Skip lookups and writes (e.g. to force fresh answers)
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._counter_lock = threading.Lock()
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''CREATE TABLE IF NOT EXISTS llm_responses
+                        (key TEXT PRIMARY KEY,
+                         response TEXT NOT NULL,
+                         size INTEGER NOT NULL,
+                         created REAL NOT NULL,
+                         last_used REAL NOT NULL)''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used)')
+        conn.commit()
+
+    def _count(self, counter, amount=1):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, key):
+        """Cached response for key, or None"""
+        if self.bypass:
+            return None
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            row = conn.execute('SELECT response, created FROM llm_responses WHERE key = ?', (key,)).fetchone()
+            if row and now - row[1] > self.ttl_seconds:
+                conn.execute('DELETE FROM llm_responses WHERE key = ?', (key,))
+                row = None
+            if row is None:
+                self._count("misses")
+                return None
+            conn.execute('UPDATE llm_responses SET last_used = ? WHERE key = ?', (now, key))
+        self._count("hits")
+        return json.loads(row[0])
+
+    def put(self, key, response):
+        """Store a response (skipped if it is not JSON-serializable)"""
+        if self.bypass:
+            return
+        try:
+            encoded = json.dumps(response, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return
+
+        size = len(encoded.encode("utf-8"))
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_responses (key, response, size, created, last_used) VALUES (?, ?, ?, ?, ?)',
+                (key, encoded, size, now, now)
+            )
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM llm_responses').fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                for old_key, old_size in conn.execute(
+                    'SELECT key, size FROM llm_responses WHERE key != ? ORDER BY last_used', (key,)
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute('DELETE FROM llm_responses WHERE key = ?', (old_key,))
+                    total -= old_size
+                    evicted += 1
+        self._count("writes")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM llm_responses')
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        entries, size = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses'
+        ).fetchone()
+        with self._counter_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": size,
+                "bypass": self.bypass,
+            }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """The process-wide cache configured from the environment, or None when disabled
+
+    LLM_CACHE_DB: SQLite file to cache responses in (unset: no caching)
+    LLM_CACHE_TTL: Seconds a response stays valid (default: 7 days)
+    LLM_CACHE_MAX_MB: Size limit before LRU eviction (default: 64)
+    LLM_CACHE_BYPASS: "true" to ignore the cache without removing it
+    """
+    global _shared
+    db_path = os.getenv('LLM_CACHE_DB')
+    if not db_path:
+        return None
+    with _shared_lock:
+        if _shared is None:
+            _shared = LLMResponseCache(
+                db_path,
+                ttl_seconds=float(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600)),
+                max_bytes=int(float(os.getenv('LLM_CACHE_MAX_MB', 64)) * 1024 * 1024),
+                bypass=os.getenv('LLM_CACHE_BYPASS', 'false').lower() == 'true'
+            )
+        return _shared
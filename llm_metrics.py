@@ -0,0 +1,195 @@
+"""
+LLM Call Instrumentation
+One hook around every model call in every app: token counts, latency, limiter wait,
+cache hits and errors, emitted as structured log lines and Prometheus metrics
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("llm_calls")
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class LLMCallMetrics:
+    """Thread-safe counters per (app, model, route) with a Prometheus text rendering"""
+
+    def __init__(self, app):
+        """
+        Args:
+            app: Name of the service making the calls (label on every metric)
+        """
+        self.app = app
+        self._lock = threading.Lock()
+        self._series = {}
+
+    @contextmanager
+    def track(self, model, route=None, prompt_tokens=0):
+        """Time one model call and record it when the block exits
+
+        Yields a dict the caller may fill in: "completion_tokens",
+        "cache_hit", and "wait"/"retries" (pass it as timing= to
+        AdaptiveRateController.call). Exceptions are recorded by type and re-raised.
+        """
+        call = {"wait": 0.0, "retries": 0, "completion_tokens": 0, "cache_hit": False}
+        start = time.perf_counter()
+        error = None
+        try:
+            yield call
+        except BaseException as e:
+            # A consumer closing a stream early is not a failed call
+            if not isinstance(e, GeneratorExit):
+                error = type(e).__name__
+            raise
+        finally:
+            self.observe(model, route, time.perf_counter() - start, call["wait"], prompt_tokens,
+                         call["completion_tokens"], call["cache_hit"], error, call["retries"])
+
+    def observe(self, model, route, latency, wait=0.0, prompt_tokens=0, completion_tokens=0,
+                cache_hit=False, error=None, retries=0):
+        """Record one finished call and log it as a JSON line"""
+        model = str(model).split("/")[-1]
+        route = route or "default"
+        key = (model, route)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "calls": 0, "errors": {}, "cache_hits": 0, "retries": 0,
+                    "prompt_tokens": 0, "completion_tokens": 0,
+                    "latency_sum": 0.0, "wait_sum": 0.0,
+                    "buckets": [0] * len(LATENCY_BUCKETS),
+                }
+            series["calls"] += 1
+            series["cache_hits"] += bool(cache_hit)
+            series["retries"] += retries
+            series["prompt_tokens"] += prompt_tokens
+            series["completion_tokens"] += completion_tokens
+            series["latency_sum"] += latency
+            series["wait_sum"] += wait
+            if error:
+                series["errors"][error] = series["errors"].get(error, 0) + 1
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    series["buckets"][index] += 1
+
+        logger.info(json.dumps({
+            "event": "llm_call",
+            "app": self.app,
+            "model": model,
+            "route": route,
+            "latency_ms": round(latency * 1000, 1),
+            "wait_ms": round(wait * 1000, 1),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cache_hit": bool(cache_hit),
+            "retries": retries,
+            "error": error,
+        }))
+
+    def snapshot(self):
+        """Plain dict of the counters per "model/route" """
+        with self._lock:
+            return {
+                f"{model}/{route}": {
+                    "calls": series["calls"],
+                    "errors": dict(series["errors"]),
+                    "cache_hits": series["cache_hits"],
+                    "retries": series["retries"],
+                    "prompt_tokens": series["prompt_tokens"],
+                    "completion_tokens": series["completion_tokens"],
+                    "avg_latency_ms": round(series["latency_sum"] / series["calls"] * 1000, 1),
+                    "avg_wait_ms": round(series["wait_sum"] / series["calls"] * 1000, 1),
+                }
+                for (model, route), series in self._series.items()
+            }
+
+    def prometheus(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP llm_calls_total Model calls made",
+            "# TYPE llm_calls_total counter",
+        ]
+        with self._lock:
+            series_items = [(key, dict(series, errors=dict(series["errors"]), buckets=list(series["buckets"])))
+                            for key, series in self._series.items()]
+
+        samples = {name: [] for name in (
+            "llm_calls_total", "llm_call_errors_total", "llm_cache_hits_total", "llm_retries_total",
+            "llm_tokens_total", "llm_limiter_wait_seconds", "llm_call_latency_seconds")}
+        for (model, route), series in series_items:
+            base = {"app": self.app, "model": model, "route": route}
+            samples["llm_calls_total"].append(f"llm_calls_total{{{_labels(**base)}}} {series['calls']}")
+            for error, count in series["errors"].items():
+                samples["llm_call_errors_total"].append(
+                    f"llm_call_errors_total{{{_labels(**base, error=error)}}} {count}")
+            samples["llm_cache_hits_total"].append(f"llm_cache_hits_total{{{_labels(**base)}}} {series['cache_hits']}")
+            samples["llm_retries_total"].append(f"llm_retries_total{{{_labels(**base)}}} {series['retries']}")
+            for direction in ("prompt", "completion"):
+                samples["llm_tokens_total"].append(
+                    f"llm_tokens_total{{{_labels(**base, direction=direction)}}} {series[direction + '_tokens']}")
+            samples["llm_limiter_wait_seconds"].extend([
+                f"llm_limiter_wait_seconds_sum{{{_labels(**base)}}} {series['wait_sum']:.6f}",
+                f"llm_limiter_wait_seconds_count{{{_labels(**base)}}} {series['calls']}",
+            ])
+            for bound, count in zip(LATENCY_BUCKETS, series["buckets"], strict=True):
+                samples["llm_call_latency_seconds"].append(
+                    f"llm_call_latency_seconds_bucket{{{_labels(**base, le=bound)}}} {count}")
+            samples["llm_call_latency_seconds"].extend([
+                f"llm_call_latency_seconds_bucket{{{_labels(**base, le='+Inf')}}} {series['calls']}",
+                f"llm_call_latency_seconds_sum{{{_labels(**base)}}} {series['latency_sum']:.6f}",
+                f"llm_call_latency_seconds_count{{{_labels(**base)}}} {series['calls']}",
+            ])
+
+        lines.extend(samples.pop("llm_calls_total"))
+        described = {
+            "llm_call_errors_total": ("counter", "Model calls that raised, by exception type"),
+            "llm_cache_hits_total": ("counter", "Calls answered from the response cache"),
+            "llm_retries_total": ("counter", "Rate-limited attempts that were retried"),
+            "llm_tokens_total": ("counter", "Estimated prompt and completion tokens"),
+            "llm_limiter_wait_seconds": ("summary", "Time spent waiting for quota or backoff"),
+            "llm_call_latency_seconds": ("histogram", "End-to-end model call latency"),
+        }
+        for name, (kind, description) in described.items():
+            lines.extend([f"# HELP {name} {description}", f"# TYPE {name} {kind}"])
+            lines.extend(samples[name])
+        return "\n".join(lines) + "\n"
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_metrics():
+    """The process-wide instrumentation, created on first use
+
+    LLM_METRICS_APP: Service name on every metric (default: the script name)
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            app = os.getenv('LLM_METRICS_APP') or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+            _shared = LLMCallMetrics(app)
+            # Apps that never configure logging still get the structured call log
+            if not logging.getLogger().handlers and not logger.handlers:
+                handler = logging.StreamHandler()
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+        return _shared
@@ -20,13 +20,14 @@ if not api_key:
     print("Please check your .env file.")
     exit(1)
 
-# Use RateLimitedLLM to add 6-second delay between API calls
-# This prevents quota exhaustion (10 requests/minute limit)
-print("⚙️ Using rate-limited LLM (6s delay between calls to avoid quota limits)")
+# Use RateLimitedLLM to stay within the API quota shared with the other apps
+# GEMINI_API_KEY_RPM / GEMINI_API_KEY_TPM should match your key's quota (free tier: 10 requests/minute);
+# apps on one host share it through a temp file; set GEMINI_QUOTA_DB to move it (e.g. to a shared volume)
+print("⚙️ Using rate-limited LLM (shared quota, batch priority)")
 gemini_llm = RateLimitedLLM(
     model="gemini/gemini-2.0-flash-exp",
     api_key=api_key,
-    delay_seconds=6  # Wait 6 seconds between each API call
+    priority="batch"
 )
 
 
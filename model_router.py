@@ -0,0 +1,191 @@
+"""
+Model Router
+Picks the Gemini model per call type from a config, escalates to a stronger model
+only when the answer fails its check, and accounts latency and cost per route
+"""
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+from rate_limiter import estimate_tokens
+
+# escalate_to is tried once when the first answer fails the caller's validator (None: never)
+Route = namedtuple("Route", ["model", "escalate_to"])
+
+DEFAULT_ROUTES = {
+    "classification": Route("gemini-2.0-flash-lite-001", "gemini-2.0-flash-001"),
+    "summary": Route("gemini-2.0-flash-lite-001", "gemini-2.0-flash-001"),
+    "enhance": Route("gemini-2.0-flash-lite-001", "gemini-2.0-flash-001"),
+    "chat": Route("gemini-2.0-flash-001", None),
+    "newsletter_compile": Route("gemini-2.0-flash-001", None),
+}
+
+# USD per million (input, output) tokens, for cost estimates
+MODEL_PRICES = {
+    "gemini-2.0-flash-lite-001": (0.075, 0.30),
+    "gemini-2.0-flash-001": (0.10, 0.40),
+    "gemini-2.0-flash-exp": (0.10, 0.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+
+def load_routes(config=None):
+    """DEFAULT_ROUTES updated from a config
+
+    Args:
+        config: dict, JSON string or path to a JSON file mapping call type to
+            a model name or {"model": ..., "escalate_to": ...}
+
+    Returns:
+        dict of call type to Route
+    """
+    routes = dict(DEFAULT_ROUTES)
+    if not config:
+        return routes
+    if isinstance(config, str):
+        if os.path.isfile(config):
+            with open(config, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        else:
+            config = json.loads(config)
+    for call_type, entry in config.items():
+        if isinstance(entry, str):
+            entry = {"model": entry}
+        routes[call_type] = Route(entry["model"], entry.get("escalate_to"))
+    return routes
+
+
+class ModelRouter:
+    """Call-type to model mapping with escalation and per-route accounting"""
+
+    def __init__(self, routes=None, prices=None):
+        """
+        Args:
+            routes: Call type to Route (default: DEFAULT_ROUTES)
+            prices: Model to USD per million (input, output) tokens (default: MODEL_PRICES)
+        """
+        self.routes = routes or dict(DEFAULT_ROUTES)
+        self.prices = prices or MODEL_PRICES
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _route(self, route):
+        if route not in self.routes:
+            raise ValueError(f"Unknown model route: {route}")
+        return self.routes[route]
+
+    def model_for(self, route):
+        """First-choice model for a call type"""
+        return self._route(route).model
+
+    def cost(self, model, input_tokens, output_tokens):
+        """Estimated USD cost of one call (0 for models without a price)"""
+        input_price, output_price = self.prices.get(model.split("/")[-1], (0.0, 0.0))
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def record(self, route, model, seconds, input_tokens=0, output_tokens=0, escalated=False):
+        """Account one model call to a route"""
+        model = model.split("/")[-1]
+        with self._lock:
+            entry = self._stats.setdefault(route, {"calls": 0, "escalations": 0, "seconds": 0.0, "models": {}})
+            entry["calls"] += 1
+            entry["escalations"] += escalated
+            entry["seconds"] += seconds
+            per_model = entry["models"].setdefault(
+                model, {"calls": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0}
+            )
+            per_model["calls"] += 1
+            per_model["seconds"] += seconds
+            per_model["input_tokens"] += input_tokens
+            per_model["output_tokens"] += output_tokens
+
+    def _plan(self, route):
+        route_config = self._route(route)
+        models = [route_config.model]
+        if route_config.escalate_to:
+            models.append(route_config.escalate_to)
+        return models
+
+    def run(self, route, call, tokens=0, validator=None, text=None):
+        """Call the route's model, escalating once if validator rejects the result
+
+        Args:
+            route: Call type (e.g. "summary")
+            call: call(model_name) -> result
+            tokens: Prompt tokens (for accounting)
+            validator: validator(result) -> bool; None accepts any result
+            text: text(result) -> str for counting output tokens (default: result.text or result)
+
+        Returns:
+            The accepted result, or the last model's result
+        """
+        text = text or (lambda result: getattr(result, "text", result))
+        models = self._plan(route)
+        for attempt, model in enumerate(models):
+            start = time.perf_counter()
+            result = call(model)
+            self.record(route, model, time.perf_counter() - start, tokens,
+                        estimate_tokens(text(result)), escalated=attempt > 0)
+            if validator is None or attempt == len(models) - 1 or validator(result):
+                return result
+
+    async def arun(self, route, call, tokens=0, validator=None, text=None):
+        """run() for a coroutine call(model_name)"""
+        text = text or (lambda result: getattr(result, "text", result))
+        models = self._plan(route)
+        for attempt, model in enumerate(models):
+            start = time.perf_counter()
+            result = await call(model)
+            self.record(route, model, time.perf_counter() - start, tokens,
+                        estimate_tokens(text(result)), escalated=attempt > 0)
+            if validator is None or attempt == len(models) - 1 or validator(result):
+                return result
+
+    def stats(self):
+        """Calls, escalation rate, average latency, tokens and estimated cost per route and model"""
+        with self._lock:
+            snapshot = {}
+            for route, entry in self._stats.items():
+                models = {}
+                route_cost = 0.0
+                for model, per_model in entry["models"].items():
+                    cost = self.cost(model, per_model["input_tokens"], per_model["output_tokens"])
+                    route_cost += cost
+                    models[model] = {
+                        "calls": per_model["calls"],
+                        "avg_ms": round(per_model["seconds"] / per_model["calls"] * 1000, 1),
+                        "input_tokens": per_model["input_tokens"],
+                        "output_tokens": per_model["output_tokens"],
+                        "cost_usd": round(cost, 6),
+                    }
+                snapshot[route] = {
+                    "model": self.routes[route].model if route in self.routes else None,
+                    "calls": entry["calls"],
+                    "escalations": entry["escalations"],
+                    "avg_ms": round(entry["seconds"] / entry["calls"] * 1000, 1),
+                    "cost_usd": round(route_cost, 6),
+                    "models": models,
+                }
+            return snapshot
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_model_router():
+    """The process-wide router, configured from the environment on first use
+
+    MODEL_ROUTES: JSON (or a path to a JSON file) overriding DEFAULT_ROUTES,
+        e.g. {"summary": {"model": "gemini-2.0-flash-lite-001", "escalate_to": "gemini-2.5-flash"}}
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ModelRouter(load_routes(os.getenv('MODEL_ROUTES')))
+        return _shared
@@ -0,0 +1,272 @@
+"""
+Quota Coordinator
+One requests/minute and tokens/minute budget per backend (API key or Vertex AI project),
+shared by every bot, crew and web app, with interactive traffic served ahead of batch jobs
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from gemini_client import gemini_backend
+
+# Share of each bucket a priority class may not dip into: batch work leaves
+# the last quarter of the budget to interactive chat
+PRIORITY_RESERVE = {
+    "interactive": 0.0,
+    "batch": 0.25,
+}
+
+# Longest single sleep before re-checking; other processes may have refunded or changed quota
+MAX_POLL_SECONDS = 1.0
+
+
+def _take(levels, elapsed, demand, buckets, reserve):
+    """Refill levels by elapsed seconds and take demand if it fits above the reserve
+
+    Args:
+        levels: Current level per bucket name (updated in place)
+        elapsed: Seconds since levels were last updated
+        demand: Amount wanted per bucket name
+        buckets: (rate per second, capacity) per bucket name
+        reserve: Fraction of capacity this priority may not use
+
+    Returns:
+        0.0 if taken, otherwise the seconds until it would fit
+    """
+    wait = 0.0
+    for name, (rate, capacity) in buckets.items():
+        levels[name] = min(capacity, levels[name] + elapsed * rate)
+        floor = reserve * capacity
+        # A demand larger than the usable capacity could never fit; cap it
+        needed = min(demand.get(name, 0), capacity - floor)
+        if levels[name] - needed < floor:
+            wait = max(wait, (floor + needed - levels[name]) / rate)
+    if wait == 0.0:
+        # The reserve only gates admission; every request pays in full
+        for name in buckets:
+            levels[name] -= demand.get(name, 0)
+    return wait
+
+
+class _QuotaBase(ABC):
+    """Blocking/async acquisition loop shared by the local and SQLite coordinators"""
+
+    def __init__(self, rpm, tpm=None, burst=None, token_burst=None):
+        """
+        Args:
+            rpm: Requests per minute for the whole API key
+            tpm: Tokens per minute (None to ignore token usage)
+            burst: Requests allowed back to back when idle (default: rpm / 6)
+            token_burst: Tokens allowed back to back when idle (default: tpm / 6)
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.buckets = {"requests": (rpm / 60.0, burst or max(1, rpm // 6))}
+        if tpm:
+            self.buckets["tokens"] = (tpm / 60.0, token_burst or max(1, tpm // 6))
+
+    def _demand(self, tokens):
+        demand = {"requests": 1}
+        if "tokens" in self.buckets and tokens:
+            demand["tokens"] = tokens
+        return demand
+
+    @abstractmethod
+    def try_acquire(self, tokens=0, priority="interactive"):
+        """Take quota if available now; returns 0.0 on success or the seconds to wait"""
+
+    @abstractmethod
+    def record_tokens(self, tokens):
+        """Charge tokens only known after the call (e.g. the response)"""
+
+    def acquire(self, tokens=0, priority="interactive"):
+        """Block until the request fits the shared budget; returns seconds waited"""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(tokens, priority)
+            if wait == 0.0:
+                return waited
+            wait = min(wait, MAX_POLL_SECONDS)
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, tokens=0, priority="interactive"):
+        """Like acquire() but yields to the event loop while waiting"""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(tokens, priority)
+            if wait == 0.0:
+                return waited
+            wait = min(wait, MAX_POLL_SECONDS)
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def limiter(self, priority="interactive"):
+        """A RateLimiter-compatible view bound to one priority class"""
+        return PriorityLimiter(self, priority)
+
+
+class LocalQuotaCoordinator(_QuotaBase):
+    """In-process coordinator: same behaviour as the SQLite one without a file (tests, single process)"""
+
+    def __init__(self, rpm, tpm=None, burst=None, token_burst=None):
+        super().__init__(rpm, tpm, burst, token_burst)
+        self._levels = {name: capacity for name, (_, capacity) in self.buckets.items()}
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens=0, priority="interactive"):
+        with self._lock:
+            now = time.time()
+            wait = _take(self._levels, now - self._updated, self._demand(tokens),
+                         self.buckets, PRIORITY_RESERVE[priority])
+            self._updated = now
+            return wait
+
+    def record_tokens(self, tokens):
+        if "tokens" in self.buckets and tokens:
+            with self._lock:
+                self._levels["tokens"] -= tokens
+
+
+class SQLiteQuotaCoordinator(_QuotaBase):
+    """Bucket levels kept in a SQLite file so every process on the host draws from one budget
+
+    All processes sharing a name must be configured with the same rpm/tpm.
+    """
+
+    def __init__(self, db_path, rpm, tpm=None, burst=None, token_burst=None, name="gemini"):
+        super().__init__(rpm, tpm, burst, token_burst)
+        self.db_path = db_path
+        self.name = name
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''CREATE TABLE IF NOT EXISTS quota_buckets
+                        (name TEXT PRIMARY KEY,
+                         level REAL NOT NULL,
+                         updated REAL NOT NULL)''')
+        conn.commit()
+
+    def _update(self, change):
+        """Run change(levels, elapsed) on the stored levels inside one write transaction"""
+        conn = self._connect()
+        with conn:
+            # BEGIN IMMEDIATE serializes read-modify-write across processes
+            conn.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            rows = conn.execute(
+                'SELECT name, level, updated FROM quota_buckets WHERE name LIKE ?', (f"{self.name}:%",)
+            ).fetchall()
+            stored = {name.split(":", 1)[1]: (level, updated) for name, level, updated in rows}
+
+            levels = {}
+            updated = now
+            for bucket, (_, capacity) in self.buckets.items():
+                level, bucket_updated = stored.get(bucket, (capacity, now))
+                levels[bucket] = level
+                updated = min(updated, bucket_updated)
+
+            result = change(levels, max(0.0, now - updated))
+            conn.executemany(
+                'INSERT OR REPLACE INTO quota_buckets (name, level, updated) VALUES (?, ?, ?)',
+                [(f"{self.name}:{bucket}", level, now) for bucket, level in levels.items()]
+            )
+            return result
+
+    def try_acquire(self, tokens=0, priority="interactive"):
+        demand = self._demand(tokens)
+        reserve = PRIORITY_RESERVE[priority]
+        return self._update(lambda levels, elapsed: _take(levels, elapsed, demand, self.buckets, reserve))
+
+    def record_tokens(self, tokens):
+        if "tokens" in self.buckets and tokens:
+            def charge(levels, elapsed):
+                _take(levels, elapsed, {}, self.buckets, 0.0)  # Refill only
+                levels["tokens"] -= tokens
+            self._update(charge)
+
+
+class PriorityLimiter:
+    """Coordinator access for one priority class, with the RateLimiter call interface"""
+
+    def __init__(self, coordinator, priority):
+        self.coordinator = coordinator
+        self.priority = priority
+        self.rpm = coordinator.rpm
+
+    def acquire(self, tokens=0):
+        return self.coordinator.acquire(tokens, self.priority)
+
+    async def acquire_async(self, tokens=0):
+        return await self.coordinator.acquire_async(tokens, self.priority)
+
+    def record_tokens(self, tokens):
+        self.coordinator.record_tokens(tokens)
+
+
+def create_quota_coordinator(db_path=None, rpm=10, tpm=None, burst=None):
+    """SQLite coordinator when a path is given, otherwise in-process"""
+    if db_path:
+        return SQLiteQuotaCoordinator(db_path, rpm, tpm, burst)
+    return LocalQuotaCoordinator(rpm, tpm, burst)
+
+
+# Requests/minute per backend when GEMINI_<BACKEND>_RPM / GEMINI_RPM are unset:
+# free-tier API keys allow 10, Vertex AI projects start at far more
+DEFAULT_RPM = {
+    "api_key": 10,
+    "vertex": 60,
+}
+
+# Every process on the host shares this file unless GEMINI_QUOTA_DB says otherwise
+DEFAULT_QUOTA_DB = os.path.join(tempfile.gettempdir(), "gemini_quota.db")
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def _quota_setting(backend, name, default):
+    return os.getenv(f'GEMINI_{backend.upper()}_{name}') or os.getenv(f'GEMINI_{name}') or default
+
+
+def get_quota_coordinator(backend=None):
+    """The process-wide coordinator for one backend, configured from the environment on first use
+
+    API keys and Vertex AI projects have separate quotas, so each backend has its own budget.
+
+    Args:
+        backend: "api_key", "vertex" or "fake" (default: the configured backend)
+
+    GEMINI_QUOTA_DB: SQLite file shared by all processes using the same credentials
+        (default: DEFAULT_QUOTA_DB; empty for an in-process budget, e.g. in tests)
+    GEMINI_RPM / GEMINI_TPM: Quota for every backend (default: DEFAULT_RPM, no token limit)
+    GEMINI_<BACKEND>_RPM / GEMINI_<BACKEND>_TPM: Quota for one backend, e.g. GEMINI_VERTEX_RPM
+    """
+    if backend is None:
+        backend = gemini_backend() or "api_key"
+    with _shared_lock:
+        if backend not in _shared:
+            rpm = float(_quota_setting(backend, 'RPM', DEFAULT_RPM.get(backend, 10)))
+            tpm = int(_quota_setting(backend, 'TPM', 0)) or None
+            db_path = os.getenv('GEMINI_QUOTA_DB', DEFAULT_QUOTA_DB)
+            if db_path:
+                _shared[backend] = SQLiteQuotaCoordinator(db_path, rpm, tpm, name=f"gemini-{backend}")
+            else:
+                _shared[backend] = LocalQuotaCoordinator(rpm, tpm)
+        return _shared[backend]
@@ -1,44 +1,164 @@
 """
 Rate-Limited LLM Wrapper
-Adds automatic delay between API calls to avoid quota exhaustion
+Keeps API calls within the requests/minute and tokens/minute quota to avoid quota exhaustion
 """
 import time
+
+import litellm
 from crewai import LLM
 
-class RateLimitedLLM:
-    """Wrapper around CrewAI LLM that adds delay between calls"""
-    
-    def __init__(self, model, api_key, delay_seconds=6):
+from llm_cache import cache_key, get_llm_cache
+from llm_metrics import get_llm_metrics
+from model_router import get_model_router
+from quota_coordinator import get_quota_coordinator
+from rate_limiter import AdaptiveRateController, RateLimiter, estimate_tokens
+
+# crewai.LLM attributes besides temperature that are passed to the completion call
+# and change the response; credentials, timeout and callbacks do not change it
+_GENERATION_PARAMS = ("top_p", "n", "stop", "max_tokens", "max_completion_tokens", "presence_penalty",
+                      "frequency_penalty", "logit_bias", "response_format", "seed", "logprobs", "top_logprobs",
+                      "base_url", "api_version")
+_UNKEYED_PARAMS = ("api_key", "vertex_credentials", "timeout", "callbacks")
+
+
+class RateLimitedLLM(LLM):
+    """CrewAI LLM that waits for quota before each call
+
+    A subclass rather than a wrapper: CrewAI agents only keep llm objects
+    that are crewai.LLM instances and turn anything else into a model string.
+
+    By default every instance in every process draws from the shared quota
+    coordinator of its backend (see quota_coordinator.get_quota_coordinator).
+    Rate-limit errors slow the allowed rate down and are retried
+    (AdaptiveRateController). With LLM_CACHE_DB set, identical calls without
+    tools are answered from the response cache (see llm_cache.get_llm_cache)
+    without touching the quota. Every call is recorded by the shared
+    instrumentation (llm_metrics).
+
+    acall() and astream() are the event-loop equivalents of call(): they go
+    through the same limiter and cache but call LiteLLM's async API directly,
+    so concurrent requests need no thread each.
+    """
+
+    def __init__(self, model, api_key=None, delay_seconds=None, rpm=None, tpm=None, burst=None,
+                 limiter=None, priority="batch", cache=None, route=None, backend=None, **llm_kwargs):
         """
         Args:
             model: Gemini model name (e.g., "gemini/gemini-2.0-flash-exp")
-            api_key: Google API key
-            delay_seconds: Seconds to wait between API calls (default: 6)
+            api_key: Google API key (not needed for Vertex AI models)
+            delay_seconds: Legacy setting, converted to a private limiter with rpm = 60 / delay_seconds
+            rpm: Private requests/minute limit instead of the shared quota
+            tpm: Private tokens/minute limit (with rpm)
+            burst: Requests allowed back to back when idle (with rpm)
+            limiter: Explicit limiter (RateLimiter or a quota coordinator limiter)
+            priority: "interactive" or "batch" class on the shared quota
+            cache: LLMResponseCache to use (default: the environment-configured one, if any)
+            route: Call type to account calls to in the model router (e.g. "chat")
+            backend: Shared quota to draw from (default: "vertex" for vertex_ai/ models, else "api_key")
+            **llm_kwargs: Passed to crewai.LLM (e.g. vertex_project, temperature)
+        """
+        if api_key:
+            llm_kwargs["api_key"] = api_key
+        super().__init__(model=model, **llm_kwargs)
+        self._completion_kwargs = dict(model=model, **llm_kwargs)
+        if limiter is None:
+            if rpm is None and delay_seconds:
+                rpm = 60.0 / delay_seconds
+            if rpm is not None:
+                limiter = RateLimiter(rpm, tpm=tpm, burst=burst)
+            else:
+                backend = backend or ("vertex" if model.startswith("vertex_ai/") else "api_key")
+                limiter = get_quota_coordinator(backend).limiter(priority)
+        self.limiter = AdaptiveRateController(limiter)
+        self.cache = cache if cache is not None else get_llm_cache()
+        self.route = route
+
+    def _cached(self, messages, kwargs):
+        """(cache key or None, cached response or None) for a call"""
+        # Tool calls run functions with side effects; replaying a cached answer would skip them
+        if self.cache is None or kwargs.get("tools") or kwargs.get("available_functions"):
+            return None, None
+        params = {name: getattr(self, name, None) for name in _GENERATION_PARAMS}
+        params["temperature"] = self.temperature
+        params.update(getattr(self, "kwargs", None) or {})
+        params.update(kwargs)
+        for name in _UNKEYED_PARAMS:
+            params.pop(name, None)
+        key = cache_key(self.model, messages, **params)
+        return key, self.cache.get(key)
+
+    def _store(self, key, messages, result, started, call):
+        # Output tokens are only known now
+        output_tokens = estimate_tokens(result)
+        call["completion_tokens"] = output_tokens
+        self.limiter.record_tokens(output_tokens)
+        if self.route:
+            get_model_router().record(self.route, self.model, time.perf_counter() - started,
+                                      estimate_tokens(messages), output_tokens)
+        if key is not None and result:
+            self.cache.put(key, result)
+
+    def _track(self, messages):
+        return get_llm_metrics().track(self.model, self.route, estimate_tokens(messages))
+
+    def call(self, messages, *args, **kwargs):
+        """Override call method to serve cached responses, wait for quota and retry rate-limit errors"""
+        with self._track(messages) as call:
+            key, cached = self._cached(messages, kwargs) if not args else (None, None)
+            if cached is not None:
+                call["cache_hit"] = True
+                return cached
+
+            # Make the actual call (waits for quota, retries on 429)
+            started = time.perf_counter()
+            result = self.limiter.call(super().call, messages, *args, tokens=estimate_tokens(messages),
+                                       timing=call, **kwargs)
+            self._store(key, messages, result, started, call)
+            return result
+
+    def _completion_params(self, messages, kwargs):
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        params = dict(self._completion_kwargs, messages=messages)
+        params.update((name, value) for name, value in kwargs.items()
+                      if name not in ("callbacks", "available_functions") and value is not None)
+        return params
+
+    async def acall(self, messages, **kwargs):
+        """Async call(): waits for quota without blocking the event loop and returns the response text"""
+        with self._track(messages) as call:
+            key, cached = self._cached(messages, kwargs)
+            if cached is not None:
+                call["cache_hit"] = True
+                return cached
+
+            started = time.perf_counter()
+            response = await self.limiter.acall(litellm.acompletion, tokens=estimate_tokens(messages), timing=call,
+                                                **self._completion_params(messages, kwargs))
+            result = response.choices[0].message.content or ""
+            self._store(key, messages, result, started, call)
+            return result
+
+    async def astream(self, messages, **kwargs):
+        """Async generator of response text chunks; a cached response arrives as one chunk
+
+        Rate-limit errors are retried until the stream opens; errors after
+        the first chunk are raised to the caller.
         """
-        self.llm = LLM(model=model, api_key=api_key)
-        self.delay_seconds = delay_seconds
-        self.last_call_time = 0
-        
-    def __getattr__(self, name):
-        """Pass through all attributes to the underlying LLM"""
-        return getattr(self.llm, name)
-    
-    def call(self, *args, **kwargs):
-        """Override call method to add delay"""
-        # Calculate time since last call
-        current_time = time.time()
-        time_since_last_call = current_time - self.last_call_time
-        
-        # If not enough time has passed, wait
-        if time_since_last_call < self.delay_seconds:
-            wait_time = self.delay_seconds - time_since_last_call
-            print(f"⏰ Waiting {wait_time:.1f}s to avoid quota limit...")
-            time.sleep(wait_time)
-        
-        # Make the actual call
-        result = self.llm.call(*args, **kwargs)
-        
-        # Update last call time
-        self.last_call_time = time.time()
-        
-        return result
+        with self._track(messages) as call:
+            key, cached = self._cached(messages, kwargs)
+            if cached is not None:
+                call["cache_hit"] = True
+                yield cached
+                return
+
+            started = time.perf_counter()
+            stream = await self.limiter.acall(litellm.acompletion, tokens=estimate_tokens(messages), stream=True,
+                                              timing=call, **self._completion_params(messages, kwargs))
+            parts = []
+            async for chunk in stream:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    parts.append(text)
+                    yield text
+            self._store(key, messages, "".join(parts), started, call)
@@ -0,0 +1,309 @@
+"""
+Rate Limiter
+Token-bucket limiter for requests/minute and tokens/minute API quotas,
+usable from threads and asyncio alike
+"""
+
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_RETRY_AFTER_RE = re.compile(r"retry (?:in|after) ([\d.]+)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)|\"retryDelay\":\s*\"([\d.]+)s\"",
+                             re.IGNORECASE)
+
+
+def estimate_tokens(value):
+    """Rough token count (~4 characters per token) of a prompt, message list or response"""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value) // 4 + 1
+    if isinstance(value, dict):
+        return estimate_tokens(value.get("content"))
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_tokens(item) for item in value)
+    return estimate_tokens(str(value))
+
+
+def is_rate_limit_error(error):
+    """True for 429 / quota-exhausted errors from google-generativeai, Vertex AI or LiteLLM (CrewAI)"""
+    for source in (error, getattr(error, "response", None)):
+        for attribute in ("status_code", "code", "status"):
+            value = getattr(source, attribute, None)
+            if value == 429 or getattr(value, "value", None) == 429:
+                return True
+    if type(error).__name__ in ("ResourceExhausted", "TooManyRequests", "RateLimitError"):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in (
+        "429", "resource_exhausted", "rate limit", "quota exceeded", "exceeded your current quota"
+    ))
+
+
+def retry_after_hint(error):
+    """Seconds the API asked us to wait, from a Retry-After header or the error text; None if absent"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    match = _RETRY_AFTER_RE.search(str(error))
+    if match:
+        return float(next(group for group in match.groups() if group))
+    return None
+
+
+class TokenBucket:
+    """Refills at rate per second up to capacity; reservations may run into debt
+
+    Each reservation is taken immediately and the caller waits until the
+    bucket has refilled past it, so callers are served in arrival order.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount, now):
+        """Take amount; returns seconds until the reservation is covered"""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= amount
+        return -self.level / self.rate if self.level < 0 else 0.0
+
+    def refund(self, amount):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and (optionally) tokens-per-minute budget with burst capacity
+
+    Any 60 second window sees at most rpm + burst requests. Waiting happens
+    outside the lock, so blocked callers never hold up others' bookkeeping.
+    """
+
+    def __init__(self, rpm, tpm=None, burst=None, token_burst=None):
+        """
+        Args:
+            rpm: Requests per minute
+            tpm: Tokens per minute (None to ignore token usage)
+            burst: Requests allowed back to back when idle (default: rpm / 6, i.e. 10s worth)
+            token_burst: Tokens allowed back to back when idle (default: tpm / 6)
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = TokenBucket(rpm / 60.0, burst or max(1, rpm // 6))
+        self._tokens = TokenBucket(tpm / 60.0, token_burst or max(1, tpm // 6)) if tpm else None
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=0):
+        """Reserve one request (and tokens) without waiting; returns the seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._requests.reserve(1, now)
+            if self._tokens and tokens:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            return wait
+
+    def refund(self, tokens=0):
+        """Give back a reservation that was not used (e.g. the caller was cancelled)"""
+        with self._lock:
+            self._requests.refund(1)
+            if self._tokens and tokens:
+                self._tokens.refund(tokens)
+
+    def record_tokens(self, tokens):
+        """Charge tokens only known after the call (e.g. the response)"""
+        if self._tokens and tokens:
+            with self._lock:
+                self._tokens.reserve(tokens, time.monotonic())
+
+    def acquire(self, tokens=0):
+        """Block the calling thread until the request fits the budget; returns seconds waited"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens=0):
+        """Like acquire() but yields to the event loop while waiting"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.refund(tokens)
+                raise
+        return wait
+
+
+class AdaptiveRateController:
+    """AIMD rate control on top of a limiter, driven by the API's rate-limit errors
+
+    Every throttle (429 / quota error) multiplies the allowed rate by
+    decrease and pauses new calls for the server's retry-after hint; every
+    success adds increase back, up to the full configured rate. Throttled
+    calls are retried with jittered backoff, so long crew runs ride out
+    quota spikes instead of failing.
+    """
+
+    def __init__(self, limiter, rpm=None, decrease=0.5, increase=0.05, min_fraction=0.05,
+                 max_retries=5, base_delay=1.0, max_delay=60.0):
+        """
+        Args:
+            limiter: Underlying limiter (RateLimiter or a quota coordinator limiter)
+            rpm: Configured requests per minute (default: limiter.rpm)
+            decrease: Rate multiplier applied on each throttle
+            increase: Fraction of the full rate restored on each success
+            min_fraction: Lowest fraction of the configured rate
+            max_retries: Throttled attempts retried before the error is raised
+            base_delay: First backoff when the API gives no retry-after hint
+            max_delay: Longest backoff
+        """
+        self.limiter = limiter
+        self.rpm = rpm or limiter.rpm
+        self.decrease = decrease
+        self.increase = increase
+        self.min_fraction = min_fraction
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.fraction = 1.0
+        self.calls = 0
+        self.throttle_events = 0
+        self.retries = 0
+        self.failures = 0
+        self._gate = TokenBucket(self.rpm / 60.0, 1)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _gate_wait(self):
+        """Seconds to wait before the reduced rate (or a server pause) admits another call"""
+        with self._lock:
+            now = time.monotonic()
+            pause = max(0.0, self._paused_until - now)
+            if self.fraction >= 1.0:
+                return pause
+            return max(pause, self._gate.reserve(1, now))
+
+    def acquire(self, tokens=0):
+        wait = self._gate_wait()
+        if wait > 0:
+            time.sleep(wait)
+        return wait + self.limiter.acquire(tokens)
+
+    async def acquire_async(self, tokens=0):
+        wait = self._gate_wait()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait + await self.limiter.acquire_async(tokens)
+
+    def record_tokens(self, tokens):
+        self.limiter.record_tokens(tokens)
+
+    def on_success(self):
+        with self._lock:
+            self.calls += 1
+            if self.fraction < 1.0:
+                self.fraction = min(1.0, self.fraction + self.increase)
+                self._gate.rate = self.rpm * self.fraction / 60.0
+
+    def on_throttle(self, retry_after=None):
+        """Cut the rate and, with a server hint, pause every caller for that long"""
+        with self._lock:
+            self.throttle_events += 1
+            self.fraction = max(self.min_fraction, self.fraction * self.decrease)
+            self._gate.rate = self.rpm * self.fraction / 60.0
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        logger.warning(f"⚠️ Rate limited by the API; allowed rate now {self.effective_rpm:.1f}/min"
+                       + (f", pausing {retry_after:.1f}s" if retry_after else ""))
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Jittered delay before retry number attempt (0-based)"""
+        if retry_after:
+            return retry_after + random.uniform(0, min(1.0, retry_after * 0.1))
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @property
+    def effective_rpm(self):
+        return self.rpm * self.fraction
+
+    def call(self, fn, *args, tokens=0, timing=None, **kwargs):
+        """Run fn(*args, **kwargs) within the rate, retrying rate-limit errors
+
+        timing: Optional dict that receives the seconds spent waiting for quota or
+            backoff ("wait") and the retries made ("retries"), for instrumentation
+        """
+        for attempt in range(self.max_retries + 1):
+            waited = self.acquire(tokens)
+            if timing is not None:
+                timing["wait"] = timing.get("wait", 0.0) + waited
+                timing["retries"] = attempt
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                retry_after = retry_after_hint(e)
+                self.on_throttle(retry_after)
+                with self._lock:
+                    self.retries += 1
+                delay = self.backoff_delay(attempt, retry_after)
+                if timing is not None:
+                    timing["wait"] += delay
+                time.sleep(delay)
+            else:
+                self.on_success()
+                return result
+
+    async def acall(self, fn, *args, tokens=0, timing=None, **kwargs):
+        """Async variant of call() for coroutine functions"""
+        for attempt in range(self.max_retries + 1):
+            waited = await self.acquire_async(tokens)
+            if timing is not None:
+                timing["wait"] = timing.get("wait", 0.0) + waited
+                timing["retries"] = attempt
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                retry_after = retry_after_hint(e)
+                self.on_throttle(retry_after)
+                with self._lock:
+                    self.retries += 1
+                delay = self.backoff_delay(attempt, retry_after)
+                if timing is not None:
+                    timing["wait"] += delay
+                await asyncio.sleep(delay)
+            else:
+                self.on_success()
+                return result
+
+    def stats(self):
+        """Effective rate and throttle counters"""
+        with self._lock:
+            return {
+                "configured_rpm": self.rpm,
+                "effective_rpm": round(self.rpm * self.fraction, 2),
+                "rate_fraction": round(self.fraction, 3),
+                "calls": self.calls,
+                "throttle_events": self.throttle_events,
+                "retries": self.retries,
+                "failures": self.failures,
+                "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 1),
+            }
@@ -1,8 +1,248 @@
 """
-Response Formatter for WhatsApp Messages
-Formats AI responses for optimal WhatsApp display
+Response Formatter for WhatsApp and Telegram Messages
+Formats AI responses for optimal display on each channel
 """
 
+import bisect
+import html
+import re
+import unicodedata
+
+# Maximum characters per message for each channel
+CHANNEL_LIMITS = {
+    "telegram": 4096,
+    "whatsapp": 4096,
+}
+
+_SENTENCE_ENDS = tuple(f"{mark}{space}" for mark in ".!?؟…۔" for space in " \n")
+
+_ASTRAL_RE = re.compile('[\U00010000-\U0010FFFF]')
+
+
+def _utf16_length(text):
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _extends_cluster(char):
+    """True if char attaches to the previous character (combining marks, ZWJ, emoji modifiers...)"""
+    code = ord(char)
+    return (
+        code == 0x200D                      # Zero width joiner
+        or 0xFE00 <= code <= 0xFE0F         # Variation selectors
+        or 0x1F3FB <= code <= 0x1F3FF       # Skin tone modifiers
+        or 0xE0020 <= code <= 0xE007F       # Tag sequences (subdivision flags)
+        or unicodedata.category(char) in ('Mn', 'Me', 'Mc')  # Harakat, keycaps...
+    )
+
+
+def _is_grapheme_boundary(text, index):
+    """Whether text may be cut before text[index] without breaking a grapheme cluster"""
+    if index <= 0 or index >= len(text):
+        return True
+    previous, char = text[index - 1], text[index]
+    if previous == '\r' and char == '\n':
+        return False
+    if previous == '\u200d' or _extends_cluster(char):
+        return False
+    if 0x1F1E6 <= ord(char) <= 0x1F1FF:
+        # Regional indicators pair up into flags: count the run before index
+        run = 0
+        while index - run - 1 >= 0 and 0x1F1E6 <= ord(text[index - run - 1]) <= 0x1F1FF:
+            run += 1
+        return run % 2 == 0
+    return True
+
+
+def _find_break(text, start, end):
+    """Best cut point in text[start:end], preferring paragraph, sentence, line, then word breaks
+    
+    A break is only taken in the second half of the window so parts stay
+    reasonably full.
+    """
+    floor = start + (end - start) // 2
+    
+    cut = text.rfind('\n\n', floor, end)
+    if cut > start:
+        return cut
+    
+    cut = max(text.rfind(ending, floor, end) for ending in _SENTENCE_ENDS)
+    if cut > start:
+        return cut + 1
+    
+    for separator in ('\n', ' '):
+        cut = text.rfind(separator, floor, end)
+        if cut > start:
+            return cut
+    
+    cut = end
+    while cut > start + 1 and not _is_grapheme_boundary(text, cut):
+        cut -= 1
+    return cut
+
+
+CONTEXT_HEADERS = {
+    "coverage": {
+        "ar": "📋 معلومات التغطية",
+        "en": "📋 Coverage Information"
+    },
+    "claim": {
+        "ar": "📝 معلومات المطالبة",
+        "en": "📝 Claim Information"
+    },
+    "provider": {
+        "ar": "🏥 مقدمو الخدمة",
+        "en": "🏥 Healthcare Providers"
+    },
+    "faq": {
+        "ar": "❓ الأسئلة الشائعة",
+        "en": "❓ FAQ"
+    },
+    "contact": {
+        "ar": "📞 معلومات التواصل",
+        "en": "📞 Contact Information"
+    },
+    "general": {
+        "ar": "💡 معلومات عامة",
+        "en": "💡 General Information"
+    }
+}
+
+FOOTERS = {
+    "ar": "\n\n━━━━━━━━━━━━━━\n💬 هل تحتاج مساعدة إضافية؟\nاكتب 'مساعدة' لمزيد من الخيارات",
+    "en": "\n\n━━━━━━━━━━━━━━\n💬 Need more help?\nType 'help' for more options"
+}
+
+_HEADER_MARK_RE = re.compile(r'^#{1,6}\s+', re.MULTILINE)
+
+
+def _render_whatsapp(text):
+    """WhatsApp displays *bold*, _italic_, ~strike~ and code itself: only headers and ** need converting"""
+    if "#" in text:
+        text = _HEADER_MARK_RE.sub('', text)
+    return text.replace('**', '*')
+
+
+# Channels whose conversion is a function of the text alone; the others use CHANNEL_MARKUP
+CHANNEL_RENDERERS = {
+    "whatsapp": _render_whatsapp,
+}
+
+# Markup templates per channel; "escape" is applied to literal text first
+CHANNEL_MARKUP = {
+    # Telegram messages are sent without parse_mode, so markup is dropped
+    "telegram": {
+        "bold": "{}", "italic": "{}", "strike": "{}", "code": "{}",
+        "code_block": "{}", "header": "{}", "bullet": "{}• ",
+        "link": "{text} ({url})", "escape": None,
+    },
+    # For messages sent with parse_mode="HTML"
+    "telegram_html": {
+        "bold": "<b>{}</b>", "italic": "<i>{}</i>", "strike": "<s>{}</s>", "code": "<code>{}</code>",
+        "code_block": "<pre>{}</pre>", "header": "<b>{}</b>", "bullet": "{}• ",
+        "link": '<a href="{url}">{text}</a>', "escape": html.escape,
+    },
+}
+
+# Code, links and headers keep their content away from the emphasis passes: they are
+# rendered one by one and swapped for a placeholder while the rest is converted
+_PROTECTED_RE = re.compile(
+    r"(?=[`#\[])"  # Lets the engine skip ahead to candidate characters
+    r"(?:(?P<code_block>^```[^\n]*\n(?s:(?P<code_block_body>.*?))\n?```)"
+    r"|`(?P<code>[^`\n]+)`"
+    r"|(?P<header>^#{1,6}[ \t]+(?P<header_text>.+?)[ \t#]*$)"
+    r"|\[(?P<link_text>[^\]\n]+)\]\((?P<url>[^)\s]+)\))",
+    re.MULTILINE
+)
+_PLACEHOLDER = "\x00"  # Neither a word nor a space character, like the markup it stands for
+
+# (style, guard, pattern) in application order; each pattern captures the content to wrap.
+# Underscore and star italics run before bold, so WhatsApp's *bold* output is never re-read as italic.
+# Patterns start with their marker (lookbehinds come after it) so the engine can scan for it directly
+_EMPHASIS_PASSES = (
+    ("bullet", None, re.compile(r"^([ \t]*)[*+-][ \t]+", re.MULTILINE)),
+    ("italic", "_", re.compile(r"_(?<!\w_)(?![\s_])(.+?)(?<![\s_])_(?!\w)")),
+    ("italic", "*", re.compile(r"\*(?<![\w*]\*)(?![\s*])(.+?)(?<![\s*])\*(?![\w*])")),
+    ("bold", "**", re.compile(r"\*\*(.+?)\*\*")),
+    ("bold", "__", re.compile(r"__(.+?)__")),
+    ("strike", "~~", re.compile(r"~~(.+?)~~")),
+)
+
+_BULLET_LINE_RE = re.compile(r"\n[ \t]*[+-][ \t]")
+_BULLET_START_RE = re.compile(r"[ \t]*[+-][ \t]")
+
+
+def _has_markup(text):
+    """Cheap pre-check: False when render_markdown would return text unchanged"""
+    if "*" in text or "_" in text or "[" in text or "`" in text or "#" in text or "~" in text:
+        return True
+    # Bullets are the only construct without one of the characters above
+    return bool(_BULLET_LINE_RE.search(text) or _BULLET_START_RE.match(text))
+
+
+def _wrap_matches(pattern, text, template):
+    """Wrap every captured group of pattern in template ("<b>{}</b>") without a per-match callback"""
+    parts = pattern.split(text)
+    if len(parts) == 1:
+        return text
+    opening, closing = template.split("{}")
+    if opening == closing:
+        # parts alternate outside/captured, so joining on the marker wraps each capture
+        return opening.join(parts)
+    parts[1::2] = [opening + part + closing for part in parts[1::2]]
+    return "".join(parts)
+
+
+def _render_emphasis(text, markup):
+    """Bullets, bold, italic and strike; each pass is a C-level split and join"""
+    if "-" in text or "*" in text or "+" in text:
+        text = _wrap_matches(_EMPHASIS_PASSES[0][2], text, markup["bullet"].format("{}", ""))
+    for style, guard, pattern in _EMPHASIS_PASSES[1:]:
+        if guard in text:
+            text = _wrap_matches(pattern, text, markup[style])
+    return text
+
+
+def render_markdown(text, channel="whatsapp"):
+    """Convert model markdown (headers, lists, links, code, bold/italic/strike) to a channel's markup"""
+    if channel in CHANNEL_RENDERERS:
+        return CHANNEL_RENDERERS[channel](text)
+    markup = CHANNEL_MARKUP[channel]
+    if markup["escape"]:
+        text = markup["escape"](text)
+    if not _has_markup(text):
+        return text
+    text = text.replace(_PLACEHOLDER, "")
+
+    protected = []
+    if "`" in text or "[" in text or "#" in text:
+        def protect(match):
+            kind = match.lastgroup
+            if kind == "url":
+                link_text = match.group("link_text")
+                if _has_markup(link_text):
+                    link_text = _render_emphasis(link_text, markup)
+                protected.append(markup["link"].format(text=link_text, url=match.group("url")))
+            elif kind == "header":
+                # Emphasis inside a header would nest inside the header's own markup
+                protected.append(markup["header"].format(render_markdown(match.group("header_text"), "telegram")))
+            elif kind == "code":
+                protected.append(markup["code"].format(match.group("code")))
+            else:
+                protected.append(markup["code_block"].format(match.group("code_block_body")))
+            return _PLACEHOLDER
+
+        text = _PROTECTED_RE.sub(protect, text)
+
+    text = _render_emphasis(text, markup)
+    if not protected:
+        return text
+    parts = text.split(_PLACEHOLDER)
+    pieces = [None] * (len(parts) + len(protected))
+    pieces[0::2] = parts
+    pieces[1::2] = protected
+    return "".join(pieces)
+
+
 class ResponseFormatter:
     def __init__(self):
         self.max_message_length = 4000  # WhatsApp limit is ~4096
@@ -25,60 +265,57 @@ class ResponseFormatter:
         # Just ensure clean formatting
         return text
     
-    def split_long_message(self, text):
-        """Split long messages into multiple parts"""
-        if len(text) <= self.max_message_length:
-            return [text]
+    def split_long_message(self, text, channel=None, max_length=None):
+        """Split long messages into multiple parts
         
-        messages = []
-        current_message = ""
+        Breaks at the last paragraph, sentence, line or word boundary that fits,
+        falling back to a grapheme-cluster boundary for unbroken runs, so
+        Arabic marks and emoji sequences are never cut apart. Length is counted
+        in UTF-16 code units, which is how Telegram measures messages.
         
-        # Split by paragraphs first
-        paragraphs = text.split('\n\n')
+        Args:
+            text: Message text
+            channel: "telegram" or "whatsapp" to use that channel's limit
+            max_length: Explicit limit (overrides channel)
+        """
+        limit = max_length or CHANNEL_LIMITS.get(channel, self.max_message_length)
+        if len(text) <= limit // 2 or _utf16_length(text) <= limit:
+            return [text]
         
-        for para in paragraphs:
-            if len(current_message) + len(para) + 2 <= self.max_message_length:
-                current_message += para + '\n\n'
-            else:
-                if current_message:
-                    messages.append(current_message.strip())
-                current_message = para + '\n\n'
+        # Astral characters (most emoji) take two UTF-16 units
+        astral = [match.start() for match in _ASTRAL_RE.finditer(text)]
         
-        if current_message:
-            messages.append(current_message.strip())
+        messages = []
+        start = 0
+        length = len(text)
+        while start < length:
+            end = min(start + limit, length)
+            # Dropping half the overshoot in characters never undershoots by more than one
+            units = end - start + bisect.bisect_left(astral, end) - bisect.bisect_left(astral, start)
+            while units > limit:
+                end -= (units - limit + 1) // 2
+                units = end - start + bisect.bisect_left(astral, end) - bisect.bisect_left(astral, start)
+            
+            if end < length:
+                end = _find_break(text, start, end)
+            
+            part = text[start:end].strip()
+            if part:
+                messages.append(part)
+            start = end
         
         return messages
     
+    def complete_sentences_length(self, text):
+        """Length of the prefix of partial (streamed) text that ends on a sentence or line break"""
+        cut = max(text.rfind(ending) for ending in _SENTENCE_ENDS)
+        if cut >= 0:
+            cut += 1  # Keep the punctuation
+        return max(cut, text.rfind('\n'), 0)
+
     def add_context_header(self, text, context_type, language="ar"):
         """Add a header based on context type"""
-        headers = {
-            "coverage": {
-                "ar": "📋 معلومات التغطية",
-                "en": "📋 Coverage Information"
-            },
-            "claim": {
-                "ar": "📝 معلومات المطالبة",
-                "en": "📝 Claim Information"
-            },
-            "provider": {
-                "ar": "🏥 مقدمو الخدمة",
-                "en": "🏥 Healthcare Providers"
-            },
-            "faq": {
-                "ar": "❓ الأسئلة الشائعة",
-                "en": "❓ FAQ"
-            },
-            "contact": {
-                "ar": "📞 معلومات التواصل",
-                "en": "📞 Contact Information"
-            },
-            "general": {
-                "ar": "💡 معلومات عامة",
-                "en": "💡 General Information"
-            }
-        }
-        
-        header = headers.get(context_type, headers["general"]).get(language, "")
+        header = CONTEXT_HEADERS.get(context_type, CONTEXT_HEADERS["general"]).get(language, "")
         return f"{header}\n\n{text}"
     
     def format_error_message(self, language="ar"):
@@ -111,22 +348,23 @@ Please try again or contact customer service:
     
     def add_footer(self, text, language="ar"):
         """Add helpful footer to message"""
-        footers = {
-            "ar": "\n\n━━━━━━━━━━━━━━\n💬 هل تحتاج مساعدة إضافية؟\nاكتب 'مساعدة' لمزيد من الخيارات",
-            "en": "\n\n━━━━━━━━━━━━━━\n💬 Need more help?\nType 'help' for more options"
-        }
-        return text + footers.get(language, footers["ar"])
+        return text + FOOTERS.get(language, FOOTERS["ar"])
     
-    def clean_ai_formatting(self, text):
-        """Remove AI-specific formatting that doesn't work in WhatsApp"""
-        # Remove markdown headers (###, ##, etc) but keep bold (**)
-        import re
-        
-        # Keep bullet points
-        text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
+    def format_response(self, text, language="ar", channel="whatsapp", context_type=None, footer=False):
+        """Header, markup conversion, whitespace cleanup and footer in one pass
         
-        # Convert markdown bold to WhatsApp bold
-        text = text.replace('**', '*')
-        
-        # Keep emoji and other formatting
-        return text
+        Equivalent to chaining clean_ai_formatting, format_for_whatsapp,
+        add_context_header and add_footer, but builds the result string once.
+        """
+        parts = []
+        if context_type:
+            parts.append(CONTEXT_HEADERS.get(context_type, CONTEXT_HEADERS["general"]).get(language, ""))
+            parts.append("\n\n")
+        parts.append(render_markdown(text, channel).strip())
+        if footer:
+            parts.append(FOOTERS.get(language, FOOTERS["ar"]))
+        return "".join(parts)
+    
+    def clean_ai_formatting(self, text, channel="whatsapp"):
+        """Convert AI markdown into formatting the channel can display"""
+        return render_markdown(text, channel)
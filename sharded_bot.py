@@ -0,0 +1,197 @@
+"""
+Sharded Telegram Bot Deployment
+One dispatcher process polls Telegram and forwards each update to one of N worker
+processes chosen by consistent hashing on the user id, so a user's state stays local.
+
+Usage:
+    BOT_SHARDS=4 python sharded_bot.py
+
+Set CONVERSATION_DB to a SQLite path to share conversation history between workers
+(useful when the shard count changes and users move to another worker).
+"""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+from threading import Thread
+
+from dotenv import load_dotenv
+from flask import Flask
+from telegram import Update
+from telegram.ext import Application, TypeHandler
+
+logging.basicConfig(
+    format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+
+class ConsistentHashRing:
+    """Maps keys to shards; adding a shard only moves ~1/N of the keys"""
+
+    def __init__(self, nodes, replicas=100):
+        self._ring = []
+        for node in nodes:
+            for replica in range(replicas):
+                self._ring.append((self._hash(f"{node}:{replica}"), node))
+        self._ring.sort()
+        self._hashes = [h for h, _ in self._ring]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def get_node(self, key):
+        """Get the shard owning a key"""
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+def shard_key(update: Update):
+    """Partition by user, falling back to chat and then update id"""
+    if update.effective_user:
+        return str(update.effective_user.id)
+    if update.effective_chat:
+        return str(update.effective_chat.id)
+    return str(update.update_id)
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def run_worker(shard_id, queue, concurrency):
+    """Worker process entry point: runs the normal bot handlers on forwarded updates"""
+    # Imported here so the model, knowledge base and state live only in workers
+    import telegram_bot
+
+    logger.info(f"🧩 Shard {shard_id} starting")
+    asyncio.run(_worker_loop(telegram_bot.build_application(), shard_id, queue, concurrency))
+
+
+async def _worker_loop(application, shard_id, queue, concurrency):
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async with application:
+        logger.info(f"✅ Shard {shard_id} ready")
+        while True:
+            data = await loop.run_in_executor(None, queue.get)
+            if data is None:
+                break
+
+            update = Update.de_json(data, application.bot)
+            await slots.acquire()
+            task = asyncio.create_task(application.process_update(update))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    logger.info(f"🛑 Shard {shard_id} stopped")
+
+
+# ---------------------------------------------------------------------------
+# Dispatcher
+# ---------------------------------------------------------------------------
+
+class ShardDispatcher:
+    """Owns the worker processes and forwards updates to them"""
+
+    def __init__(self, num_shards, concurrency=16):
+        self.num_shards = num_shards
+        self.concurrency = concurrency
+        self._ctx = multiprocessing.get_context("spawn")
+        self.queues = [self._ctx.Queue() for _ in range(num_shards)]
+        self.workers = [None] * num_shards
+        self.ring = ConsistentHashRing(range(num_shards))
+
+    def _start_worker(self, shard_id):
+        worker = self._ctx.Process(
+            target=run_worker,
+            args=(shard_id, self.queues[shard_id], self.concurrency),
+            name=f"shard-{shard_id}",
+            daemon=True
+        )
+        worker.start()
+        self.workers[shard_id] = worker
+
+    def start(self):
+        for shard_id in range(self.num_shards):
+            self._start_worker(shard_id)
+        logger.info(f"✅ Started {self.num_shards} shard workers")
+
+    def stop(self):
+        for queue in self.queues:
+            queue.put(None)
+        for worker in self.workers:
+            if worker is not None:
+                worker.join(timeout=10)
+
+    def dispatch(self, update: Update):
+        """Send an update to the shard that owns its user"""
+        shard_id = self.ring.get_node(shard_key(update))
+        if not self.workers[shard_id].is_alive():
+            # Restart on the same shard id so its users keep hashing to it
+            logger.warning(f"⚠️ Shard {shard_id} died (exit code {self.workers[shard_id].exitcode}), restarting")
+            self._start_worker(shard_id)
+        self.queues[shard_id].put(update.to_dict())
+
+    def health(self):
+        alive = [w.is_alive() for w in self.workers]
+        status = 'healthy' if all(alive) else 'degraded'
+        return {'status': status, 'service': 'telegram-health-bot', 'shards': len(alive), 'alive': sum(alive)}
+
+
+def main():
+    """Start the dispatcher and its shard workers"""
+    token = os.getenv('TELEGRAM_BOT_TOKEN')
+    if not token:
+        logger.error("TELEGRAM_BOT_TOKEN not found in .env file!")
+        exit(1)
+
+    num_shards = int(os.getenv('BOT_SHARDS', os.cpu_count() or 1))
+    concurrency = int(os.getenv('BOT_SHARD_CONCURRENCY', 16))
+
+    logger.info("=" * 60)
+    logger.info(f"Starting sharded Telegram bot: {num_shards} shards")
+    logger.info("=" * 60)
+
+    dispatcher = ShardDispatcher(num_shards, concurrency)
+    dispatcher.start()
+
+    # Health check for AWS App Runner, reporting shard liveness
+    flask_app = Flask(__name__)
+
+    @flask_app.route('/')
+    @flask_app.route('/health')
+    def health_check():
+        health = dispatcher.health()
+        return health, 200 if health['status'] == 'healthy' else 503
+
+    port = int(os.getenv('PORT', 8080))
+    Thread(target=lambda: flask_app.run(host='0.0.0.0', port=port, debug=False), daemon=True).start()
+
+    async def forward(update: Update, _context):
+        dispatcher.dispatch(update)
+
+    application = Application.builder().token(token).build()
+    application.add_handler(TypeHandler(Update, forward))
+
+    try:
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
+    finally:
+        dispatcher.stop()
+
+
+if __name__ == '__main__':
+    main()
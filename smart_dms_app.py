@@ -15,7 +15,13 @@ import mimetypes
 import PyPDF2
 import docx
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+from batch_jobs import BatchJobStore, BatchRunner, create_batch_backend
+from gemini_client import gemini_backend, get_generative_model
+from llm_metrics import get_llm_metrics
+from model_router import get_model_router
+from quota_coordinator import PRIORITY_RESERVE, get_quota_coordinator
+from rate_limiter import AdaptiveRateController, estimate_tokens
 
 # Load environment variables
 load_dotenv()
@@ -28,31 +34,126 @@ app.config['ALLOWED_EXTENSIONS'] = {'txt', 'pdf', 'doc', 'docx', 'xls', 'xlsx',
 
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Configure Gemini AI - Support both API Key and Vertex AI
-api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
-use_vertex_ai = os.getenv('USE_VERTEX_AI', 'false').lower() == 'true'
-model = None
+# Shared API quota: chat answers go ahead of document summarize/enhance jobs;
+# rate-limit errors slow the rate down and are retried
+quota = {
+    priority: AdaptiveRateController(get_quota_coordinator().limiter(priority))
+    for priority in PRIORITY_RESERVE
+}
+
+# Model per call type (cheap model for summaries, escalated when the answer is malformed)
+model_router = get_model_router()
+
+def generate(prompt, priority="interactive", route="chat", validator=None):
+    """Call the route's model once the shared quota allows it
+
+    validator(text) -> bool: a rejected answer is retried once on the route's stronger model
+    """
+    limiter = quota[priority]
+    tokens = estimate_tokens(prompt)
+
+    def call(model_name):
+        with get_llm_metrics().track(model_name, route, tokens) as call_metrics:
+            response = limiter.call(get_generative_model(model_name).generate_content, prompt, tokens=tokens,
+                                    timing=call_metrics)
+            call_metrics["completion_tokens"] = estimate_tokens(response.text)
+        limiter.record_tokens(call_metrics["completion_tokens"])
+        return response
+
+    return model_router.run(route, call, tokens=tokens,
+                            validator=(lambda response: validator(response.text)) if validator else None)
+
+def has_sections(*markers):
+    """Validator: the answer contains every section marker the prompt asked for"""
+    return lambda text: all(marker in text for marker in markers)
+
+# Answers missing a section are escalated (interactive) or marked failed (Vertex batch)
+AI_VALIDATORS = {
+    "summary": has_sections("[ARABIC SUMMARY]", "[ENGLISH SUMMARY]"),
+    "enhance": has_sections("[ARABIC]", "[ENGLISH]"),
+}
+
+# Bulk summarize/enhance jobs; results land in ai_results and are served by the endpoints below
+batch_store = BatchJobStore('smart_dms.db')
+batch_runner = BatchRunner(batch_store, create_batch_backend(
+    lambda kind, prompt: generate(prompt, priority="batch", route=kind, validator=AI_VALIDATORS[kind]).text,
+    model_router.model_for,
+    AI_VALIDATORS.get
+))
+# Jobs left unfinished by a previous process (restart, redeploy) continue here once stale
+batch_runner.watch()
+
+# SQLite allows at most 999 bound parameters per statement
+ID_CHUNK_SIZE = 500
+
+def parse_ids(value):
+    """Deduplicated list of integer ids from a JSON body, or None if value is not a list of integers"""
+    if not isinstance(value, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in value):
+        return None
+    return list(dict.fromkeys(value))
+
+def fetch_by_ids(cursor, query, ids):
+    """Rows of query (with one {} for the placeholders) for every id, in chunks of ID_CHUNK_SIZE"""
+    rows = []
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        chunk = ids[start:start + ID_CHUNK_SIZE]
+        cursor.execute(query.format(",".join("?" * len(chunk))), chunk)
+        rows.extend(cursor.fetchall())
+    return rows
+
+def enhance_prompt(title, content):
+    """Prompt for the Arabic/English enhanced versions of a note"""
+    return f"""You are a professional writing assistant. Enhance this note into TWO versions (Arabic & English).
 
-if api_key and not use_vertex_ai:
-    try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash-001')
-        print("✅ AI Model: gemini-2.0-flash-001 (API Key)")
-    except Exception as e:
-        print(f"❌ AI Error: {e}")
-elif use_vertex_ai or os.getenv('GOOGLE_CLOUD_PROJECT'):
-    try:
-        from vertexai.preview.generative_models import GenerativeModel
-        import vertexai
-        project_id = os.getenv('GOOGLE_CLOUD_PROJECT', 'eg-konecta-sandbox')
-        location = os.getenv('VERTEX_AI_LOCATION', 'us-central1')
-        vertexai.init(project=project_id, location=location)
-        model = GenerativeModel('gemini-2.0-flash-001')
-        print(f"✅ AI Model: Vertex AI gemini-2.0-flash-001 ({project_id}/{location})")
-    except Exception as e:
-        print(f"❌ Vertex AI Error: {e}")
-else:
-    print("⚠️  No AI configured - set GEMINI_API_KEY or USE_VERTEX_AI=true")
+Make it:
+- Professional and eloquent
+- Well-structured with clear paragraphs
+- Grammatically perfect
+- Detailed and comprehensive
+
+Original Title: {title}
+Original Content: {content}
+
+Provide:
+1. Enhanced ARABIC version (احترافي وبليغ)
+2. Enhanced ENGLISH version (professional & eloquent)
+
+Format:
+[ARABIC]
+<enhanced arabic content>
+
+[ENGLISH]
+<enhanced english content>
+"""
+
+def summary_prompt(filename, content):
+    """Prompt for the Arabic/English summary of a document"""
+    preview = content[:8000]
+    return f"""Professional summary of document '{filename}' in BOTH languages.
+
+Requirements:
+- Provide summary in Arabic and English
+- Be professional and eloquent
+- Highlight key points
+- Max 250 words per language
+
+Document:
+{preview}
+
+Format:
+[ARABIC SUMMARY]
+<summary in Arabic>
+
+[ENGLISH SUMMARY]
+<summary in English>
+"""
+
+def split_enhanced(enhanced_text):
+    """(arabic, english) sections of an enhance answer"""
+    if "[ARABIC]" in enhanced_text and "[ENGLISH]" in enhanced_text:
+        parts = enhanced_text.split("[ENGLISH]")
+        return parts[0].replace("[ARABIC]", "").strip(), parts[1].strip() if len(parts) > 1 else ""
+    return enhanced_text, enhanced_text
 
 # Database initialization
 def init_db():
@@ -155,7 +256,7 @@ def search_in_database(query, search_type='keyword'):
     return files
 
 def ai_chat_response(user_message, context_files=None):
-    if not model:
+    if not get_generative_model():
         return "AI غير متصل. أضف GEMINI_API_KEY في .env"
     
     try:
@@ -166,7 +267,7 @@ def ai_chat_response(user_message, context_files=None):
                 context += f"- {file['filename']}\n"
         context += f"\nUser: {user_message}"
         
-        response = model.generate_content(context)
+        response = generate(context)
         return response.text
     except Exception as e:
         return f"AI Error: {str(e)}"
@@ -341,7 +442,7 @@ def delete_note(note_id):
 @app.route('/api/notes/<int:note_id>/enhance', methods=['POST'])
 def enhance_note(note_id):
     """AI-powered professional note enhancement in both languages"""
-    if not model:
+    if not get_generative_model():
         return jsonify({'error': 'AI not configured'}), 503
 
     conn = sqlite3.connect('smart_dms.db')
@@ -354,45 +455,18 @@ def enhance_note(note_id):
         return jsonify({'error': 'Note not found'}), 404
 
     title, content = result
+    prompt = enhance_prompt(title, content)
     
     try:
-        prompt = f"""You are a professional writing assistant. Enhance this note into TWO versions (Arabic & English).
-
-Make it:
-- Professional and eloquent
-- Well-structured with clear paragraphs
-- Grammatically perfect
-- Detailed and comprehensive
-
-Original Title: {title}
-Original Content: {content}
-
-Provide:
-1. Enhanced ARABIC version (احترافي وبليغ)
-2. Enhanced ENGLISH version (professional & eloquent)
-
-Format:
-[ARABIC]
-<enhanced arabic content>
-
-[ENGLISH]
-<enhanced english content>
-"""
-        
-        response = model.generate_content(prompt)
-        enhanced_text = response.text
+        # ?cached=1 serves a batch job's result for this exact note instead of a fresh one
+        enhanced_text = batch_store.stored_result("enhance", note_id, prompt) if request.args.get('cached') else None
+        if enhanced_text is None:
+            response = generate(prompt, priority="interactive", route="enhance", validator=AI_VALIDATORS["enhance"])
+            enhanced_text = response.text
+            batch_store.store_result("enhance", note_id, prompt, enhanced_text)
         
         # Extract sections
-        arabic_section = ""
-        english_section = ""
-        
-        if "[ARABIC]" in enhanced_text and "[ENGLISH]" in enhanced_text:
-            parts = enhanced_text.split("[ENGLISH]")
-            arabic_section = parts[0].replace("[ARABIC]", "").strip()
-            english_section = parts[1].strip() if len(parts) > 1 else ""
-        else:
-            arabic_section = enhanced_text
-            english_section = enhanced_text
+        arabic_section, english_section = split_enhanced(enhanced_text)
         
         return jsonify({
             'success': True,
@@ -406,7 +480,7 @@ Format:
 @app.route('/api/files/<int:file_id>/summarize', methods=['POST'])
 def summarize_file(file_id):
     """AI file summarization in both languages"""
-    if not model:
+    if not get_generative_model():
         return jsonify({'error': 'AI not configured'}), 503
 
     conn = sqlite3.connect('smart_dms.db')
@@ -423,31 +497,101 @@ def summarize_file(file_id):
     if not content:
         return jsonify({'error': 'No text content'}), 400
 
+    prompt = summary_prompt(filename, content)
+    
     try:
-        preview = content[:8000]
-        prompt = f"""Professional summary of document '{filename}' in BOTH languages.
+        # ?cached=1 serves a batch job's summary of this exact content instead of a fresh one
+        summary = batch_store.stored_result("summary", file_id, prompt) if request.args.get('cached') else None
+        if summary is None:
+            summary = generate(prompt, priority="interactive", route="summary", validator=AI_VALIDATORS["summary"]).text
+            batch_store.store_result("summary", file_id, prompt, summary)
+        return jsonify({'success': True, 'summary': summary, 'filename': filename})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-Requirements:
-- Provide summary in Arabic and English
-- Be professional and eloquent
-- Highlight key points
-- Max 250 words per language
+@app.route('/api/batch/summarize', methods=['POST'])
+def batch_summarize():
+    """Start a bulk summary job for the given file ids (default: every file without a current summary)"""
+    if not gemini_backend():
+        return jsonify({'error': 'AI not configured'}), 503
 
-Document:
-{preview}
+    data = request.json or {}
+    file_ids = data.get('file_ids')
+    if file_ids is not None:
+        file_ids = parse_ids(file_ids)
+        if file_ids is None:
+            return jsonify({'error': 'file_ids must be a list of integers'}), 400
+    conn = sqlite3.connect('smart_dms.db')
+    c = conn.cursor()
+    if file_ids:
+        rows = fetch_by_ids(c, 'SELECT id, original_filename, content_text FROM files WHERE id IN ({})', file_ids)
+    else:
+        c.execute('SELECT id, original_filename, content_text FROM files')
+        rows = c.fetchall()
+    conn.close()
 
-Format:
-[ARABIC SUMMARY]
-<summary in Arabic>
+    items = []
+    for file_id, filename, content in rows:
+        if not content:
+            continue
+        prompt = summary_prompt(filename, content)
+        if file_ids or batch_store.stored_result("summary", file_id, prompt) is None:
+            items.append((file_id, prompt))
+    if not items:
+        return jsonify({'success': True, 'job': None, 'message': 'Nothing to summarize'})
+
+    job_id = batch_runner.submit("summary", items)
+    return jsonify({'success': True, 'job': batch_store.job(job_id)}), 202
+
+@app.route('/api/batch/enhance', methods=['POST'])
+def batch_enhance():
+    """Start a bulk enhancement job for the given note ids (default: every note without a current one)"""
+    if not gemini_backend():
+        return jsonify({'error': 'AI not configured'}), 503
 
-[ENGLISH SUMMARY]
-<summary in English>
-"""
-        
-        response = model.generate_content(prompt)
-        return jsonify({'success': True, 'summary': response.text, 'filename': filename})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    data = request.json or {}
+    note_ids = data.get('note_ids')
+    if note_ids is not None:
+        note_ids = parse_ids(note_ids)
+        if note_ids is None:
+            return jsonify({'error': 'note_ids must be a list of integers'}), 400
+    conn = sqlite3.connect('smart_dms.db')
+    c = conn.cursor()
+    if note_ids:
+        rows = fetch_by_ids(c, 'SELECT id, title, content FROM notes WHERE id IN ({})', note_ids)
+    else:
+        c.execute('SELECT id, title, content FROM notes')
+        rows = c.fetchall()
+    conn.close()
+
+    items = []
+    for note_id, title, content in rows:
+        prompt = enhance_prompt(title, content)
+        if note_ids or batch_store.stored_result("enhance", note_id, prompt) is None:
+            items.append((note_id, prompt))
+    if not items:
+        return jsonify({'success': True, 'job': None, 'message': 'Nothing to enhance'})
+
+    job_id = batch_runner.submit("enhance", items)
+    return jsonify({'success': True, 'job': batch_store.job(job_id)}), 202
+
+@app.route('/api/batch/<int:job_id>')
+def batch_status(job_id):
+    """Progress of a bulk job (queued, running, completed or failed)"""
+    job = batch_store.job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """LLM call counters and latency histograms in Prometheus text format"""
+    return get_llm_metrics().prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+@app.route('/api/metrics/models')
+def model_metrics():
+    """Calls, escalations, latency and estimated cost per model route"""
+    return jsonify(model_router.stats())
 
 @app.route('/uploads/<filename>')
 def uploaded_file(filename):
@@ -458,6 +602,6 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
     print("🚀 Smart DMS Starting...")
     print(f"📁 Uploads: {app.config['UPLOAD_FOLDER']}")
-    print(f"🤖 AI: {'Enabled ✅' if model else 'Disabled ❌'}")
+    print(f"🤖 AI: {'Enabled ✅' if gemini_backend() else 'Disabled ❌'}")
     print(f"📡 Open your browser at: http://localhost:{port}")
     app.run(debug=False, host='0.0.0.0', port=port)
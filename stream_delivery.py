@@ -0,0 +1,97 @@
+"""
+Streaming Reply Delivery
+Shows a model answer while it is still being generated: the first message goes
+out as soon as the first sentence is complete and is then edited (or followed
+by new messages) as more text streams in
+"""
+
+import asyncio
+import logging
+import time
+
+from telegram.error import BadRequest, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingReply:
+    """Progressively delivers streamed text as one or more Telegram messages
+
+    Only complete sentences are shown until the stream ends, and edits are
+    throttled to min_edit_interval seconds to stay under Telegram's flood limits.
+    """
+
+    def __init__(self, message, formatter, channel="telegram", min_edit_interval=1.0):
+        """
+        Args:
+            message: The incoming telegram Message to reply to
+            formatter: ResponseFormatter used to clean and split the text
+            channel: Channel whose message length limit applies
+            min_edit_interval: Minimum seconds between Telegram updates
+        """
+        self.message = message
+        self.formatter = formatter
+        self.channel = channel
+        self.min_edit_interval = min_edit_interval
+        self.text = ""
+        self.first_message_at = None  # perf_counter() when the first message was sent
+        self._sent = []   # telegram Message objects, in order
+        self._shown = []  # Text currently displayed in each of them
+        self._next_update = 0.0
+
+    @property
+    def started(self):
+        """True once at least one message has been sent"""
+        return bool(self._sent)
+
+    async def feed(self, chunk):
+        """Append streamed text and update Telegram if it is due"""
+        self.text += chunk
+        if time.monotonic() >= self._next_update:
+            await self._sync(final=False)
+
+    async def finish(self):
+        """Show the complete text; returns it"""
+        delay = self._next_update - time.monotonic()
+        if self._sent and delay > 0:
+            await asyncio.sleep(delay)
+        await self._sync(final=True)
+        return self.text
+
+    async def _sync(self, final):
+        if final:
+            visible = self.text
+        else:
+            visible = self.text[:self.formatter.complete_sentences_length(self.text)]
+        visible = self.formatter.clean_ai_formatting(visible, channel=self.channel).strip()
+        if not visible:
+            return
+
+        parts = self.formatter.split_long_message(visible, channel=self.channel)
+        try:
+            for index, part in enumerate(parts):
+                if index < len(self._sent):
+                    if self._shown[index] != part:
+                        await self._sent[index].edit_text(part)
+                        self._shown[index] = part
+                else:
+                    self._sent.append(await self.message.reply_text(part))
+                    self._shown.append(part)
+                    if self.first_message_at is None:
+                        self.first_message_at = time.perf_counter()
+        except RetryAfter as e:
+            # Flood control: back off, the next sync resends whatever is missing
+            retry_after = e.retry_after
+            if hasattr(retry_after, "total_seconds"):  # timedelta in newer PTB releases
+                retry_after = retry_after.total_seconds()
+            logger.warning(f"⚠️ Telegram flood control, retrying in {retry_after}s")
+            self._next_update = time.monotonic() + retry_after
+            if final:
+                await asyncio.sleep(retry_after)
+                await self._sync(final=True)
+            return
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+
+        self._next_update = time.monotonic() + self.min_edit_interval
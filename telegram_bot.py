@@ -4,18 +4,29 @@ Adds a simple health check endpoint for AWS
 """
 
 import os
+import time
 import logging
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from dotenv import load_dotenv
-import google.generativeai as genai
 from threading import Thread
 from flask import Flask
 
 from knowledge_base import HealthInsuranceKnowledgeBase
-from language_detector import LanguageDetector
+from language_detector import LanguageDetector, LanguagePreferenceStore
 from response_formatter import ResponseFormatter
 from company_loader import CompanyKnowledge
+from intent_router import IntentRouter
+from canned_responses import CannedResponses
+from latency_tracer import LatencyTracer
+from conversation_store import create_history_store
+from stream_delivery import StreamingReply
+from answer_engine import TieredAnswerEngine
+from gemini_client import gemini_backend, get_generative_model
+from llm_metrics import get_llm_metrics
+from model_router import get_model_router
+from quota_coordinator import get_quota_coordinator
+from rate_limiter import AdaptiveRateController, estimate_tokens
 
 # Setup logging
 logging.basicConfig(
@@ -27,66 +38,59 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini - Support both API Key and Vertex AI
-api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
-use_vertex_ai = os.getenv('USE_VERTEX_AI', 'false').lower() == 'true'
-
-if api_key and not use_vertex_ai:
-    logger.info("🔑 Using Gemini API Key")
-    genai.configure(api_key=api_key)
-    # Using gemini-2.0-flash-001 for production
-    gemini_model = genai.GenerativeModel('gemini-2.0-flash-001')
-elif use_vertex_ai or (not api_key and os.getenv('GOOGLE_CLOUD_PROJECT')):
-    # Use Vertex AI (Service Account)
-    try:
-        logger.info("☁️ Using Google Cloud Vertex AI (Service Account)")
-        from vertexai.preview.generative_models import GenerativeModel
-        import vertexai
-        
-        project_id = os.getenv('GOOGLE_CLOUD_PROJECT', 'eg-konecta-sandbox')
-        location = os.getenv('VERTEX_AI_LOCATION', 'us-central1')
-        
-        vertexai.init(project=project_id, location=location)
-        gemini_model = GenerativeModel('gemini-2.0-flash-001')
-        logger.info(f"✅ Vertex AI initialized: {project_id} / {location}")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Vertex AI: {e}")
-        gemini_model = None
-        logger.warning("Falling back to knowledge base only")
-else:
-    gemini_model = None
+# Gemini (API key, Vertex AI or offline fake) is set up on the first model call
+if not gemini_backend():
     logger.warning("No Gemini API key or Vertex AI config found - using knowledge base only")
 
 # Initialize components
 kb = HealthInsuranceKnowledgeBase()
-lang_detector = LanguageDetector()
+# Set LANGUAGE_DB to persist language preferences across restarts
+lang_detector = LanguageDetector(LanguagePreferenceStore(db_path=os.getenv('LANGUAGE_DB')))
 formatter = ResponseFormatter()
 company_kb = CompanyKnowledge()  # Load company-specific knowledge
+canned = CannedResponses(kb, formatter)  # Static answers, formatted and split once
+tracer = LatencyTracer("telegram-health-bot")  # Per-update stage timings
+intent_router = IntentRouter(kb, threshold=float(os.getenv('INTENT_CONFIDENCE_THRESHOLD', 0.7)))
+# Stream AI answers into Telegram as they are generated (edits rate-limited per message)
+stream_replies = os.getenv('STREAM_REPLIES', 'true').lower() == 'true'
+stream_edit_interval = float(os.getenv('STREAM_EDIT_INTERVAL', 1.0))
+# Chat draws from the API quota shared with the other apps, ahead of batch jobs;
+# rate-limit errors slow the rate down and are retried
+gemini_quota = AdaptiveRateController(get_quota_coordinator().limiter("interactive"))
+# Chat model from the "chat" route (MODEL_ROUTES), with per-route latency/cost accounting
+model_router = get_model_router()
+# Confident FAQ/section matches are answered without calling Gemini
+answer_engine = TieredAnswerEngine(
+    kb, company_kb,
+    faq_threshold=float(os.getenv('FAQ_CONFIDENCE_THRESHOLD', 0.75)),
+    section_threshold=float(os.getenv('SECTION_CONFIDENCE_THRESHOLD', 0.85))
+)
+
+# Hot-reload knowledge_base.json and refresh everything derived from it
+kb.add_reload_listener(lambda _: canned.rebuild())
+kb.add_reload_listener(intent_router.retrain)
+kb.add_reload_listener(answer_engine.clear_cache)
+kb.watch()
+company_kb.add_reload_listener(answer_engine.clear_cache)
+company_kb.watch()  # Summary used in prompts is rebuilt with each reload
 
 logger.info(f"📚 Company knowledge loaded from: {company_kb.company_info['file_path']}")
 
 # Store conversation history per user
-conversation_history = {}
+# Set CONVERSATION_DB to share history through SQLite (e.g. across sharded workers)
+history_store = create_history_store(os.getenv('CONVERSATION_DB'), max_messages=10)
 
 def get_conversation_history(user_id: str) -> list:
-    """Get or create conversation history for a user"""
-    if user_id not in conversation_history:
-        conversation_history[user_id] = []
-    return conversation_history[user_id]
+    """Get conversation history for a user"""
+    return history_store.get(user_id)
 
 def add_to_history(user_id: str, role: str, content: str):
-    """Add message to conversation history"""
-    history = get_conversation_history(user_id)
-    history.append({"role": role, "content": content})
-    
-    # Keep only last 10 messages (5 exchanges)
-    if len(history) > 10:
-        conversation_history[user_id] = history[-10:]
+    """Add message to conversation history (keeps only the last 10 messages)"""
+    history_store.add(user_id, role, content)
 
 def clear_history(user_id: str):
     """Clear conversation history for a user"""
-    if user_id in conversation_history:
-        conversation_history[user_id] = []
+    history_store.clear(user_id)
 
 # Get Telegram token
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -105,6 +109,31 @@ def health_check():
     """Health check endpoint for AWS"""
     return {'status': 'healthy', 'service': 'telegram-health-bot'}, 200
 
+@flask_app.route('/metrics/latency')
+def latency_metrics():
+    """p50/p95 latency per message pipeline stage"""
+    return tracer.stats(), 200
+
+@flask_app.route('/metrics/answers')
+def answer_metrics():
+    """Requests served per answer tier (FAQ, section, LLM) and latency saved"""
+    return answer_engine.stats(), 200
+
+@flask_app.route('/metrics/models')
+def model_metrics():
+    """Calls, latency and estimated cost per model route"""
+    return model_router.stats(), 200
+
+@flask_app.route('/metrics')
+def prometheus_metrics():
+    """LLM call counters and latency histograms in Prometheus text format"""
+    return get_llm_metrics().prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+@flask_app.route('/metrics/quota')
+def quota_metrics():
+    """Effective Gemini request rate and rate-limit (429) events"""
+    return gemini_quota.stats(), 200
+
 def run_flask():
     """Run Flask in a separate thread"""
     port = int(os.getenv('PORT', 8080))
@@ -125,48 +154,38 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /help command"""
     user_id = str(update.effective_user.id)
-    language = lang_detector.user_languages.get(user_id, "ar")
+    language = lang_detector.get_user_language(user_id)
     help_msg = lang_detector.get_help_message(language)
     await update.message.reply_text(help_msg)
 
 async def coverage_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /coverage command"""
     user_id = str(update.effective_user.id)
-    language = lang_detector.user_languages.get(user_id, "ar")
-    
-    basic = kb.get_coverage_info("basic", language)
-    premium = kb.get_coverage_info("premium", language)
-    response = f"{basic}\n\n{premium}"
-    response = formatter.add_context_header(response, "coverage", language)
+    language = lang_detector.get_user_language(user_id)
     
-    messages = formatter.split_long_message(response)
-    for msg in messages:
+    for msg in canned.get("coverage", language):
         await update.message.reply_text(msg)
 
 async def claims_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /claims command"""
     user_id = str(update.effective_user.id)
-    language = lang_detector.user_languages.get(user_id, "ar")
-    
-    response = kb.get_claims_process(language)
-    response = formatter.add_context_header(response, "claim", language)
+    language = lang_detector.get_user_language(user_id)
     
-    messages = formatter.split_long_message(response)
-    for msg in messages:
+    for msg in canned.get("claim", language):
         await update.message.reply_text(msg)
 
 async def contact_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /contact command"""
     user_id = str(update.effective_user.id)
-    language = lang_detector.user_languages.get(user_id, "ar")
+    language = lang_detector.get_user_language(user_id)
     
-    response = kb.get_contact_info(language)
-    await update.message.reply_text(response)
+    for msg in canned.get("contact", language):
+        await update.message.reply_text(msg)
 
 async def clear_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /clear command - clear conversation history"""
     user_id = str(update.effective_user.id)
-    language = lang_detector.user_languages.get(user_id, "ar")
+    language = lang_detector.get_user_language(user_id)
     
     clear_history(user_id)
     
@@ -179,6 +198,11 @@ async def clear_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle regular text messages"""
+    with tracer.trace("telegram.update", update_id=update.update_id):
+        await _handle_message(update)
+
+async def _handle_message(update: Update):
+    """Message pipeline, timed stage by stage by the tracer"""
     try:
         user_id = str(update.effective_user.id)
         message_text = update.message.text
@@ -186,79 +210,107 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.info(f"Message from {user_id}: {message_text}")
         
         # Detect language
-        language = lang_detector.detect_language(message_text, user_id)
+        with tracer.span("language_detection"):
+            language = lang_detector.detect_language(message_text, user_id)
         
         # Check for greetings
         message_lower = message_text.lower().strip()
         if message_lower in ['hi', 'hello', 'مرحبا', 'السلام عليكم', 'أهلا']:
             response = lang_detector.get_greeting(language)
-            await update.message.reply_text(response)
+            with tracer.span("telegram_send", messages=1):
+                await update.message.reply_text(response)
             return
         
-        # Check for quick info requests
+        # Route quick info requests locally (keywords first, then the trained model)
         query_lower = message_text.lower()
+        with tracer.span("routing") as span:
+            intent = intent_router.route(message_text)
+            if span:
+                span.attributes["intent"] = intent or "llm"
         
         # Coverage request
-        if any(word in query_lower for word in ['coverage', 'تغطية', 'باقة', 'package']):
+        if intent == "coverage":
             if any(word in query_lower for word in ['premium', 'ممتازة', 'مميزة']):
-                response = kb.get_coverage_info("premium", language)
+                messages = canned.get("coverage_premium", language)
             else:
-                basic = kb.get_coverage_info("basic", language)
-                premium = kb.get_coverage_info("premium", language)
-                response = f"{basic}\n\n{premium}"
-            response = formatter.add_context_header(response, "coverage", language)
+                messages = canned.get("coverage", language)
             
         # Claims request
-        elif any(word in query_lower for word in ['claim', 'مطالبة', 'تقديم']):
-            response = kb.get_claims_process(language)
-            response = formatter.add_context_header(response, "claim", language)
+        elif intent == "claim":
+            messages = canned.get("claim", language)
             
         # Provider request
-        elif any(word in query_lower for word in ['provider', 'hospital', 'مستشفى', 'مقدم', 'عيادة']):
-            response = kb.get_providers(language)
-            response = formatter.add_context_header(response, "provider", language)
+        elif intent == "provider":
+            messages = canned.get("provider", language)
             
         # Contact request
-        elif any(word in query_lower for word in ['contact', 'phone', 'تواصل', 'هاتف', 'رقم']):
-            response = kb.get_contact_info(language)
+        elif intent == "contact":
+            messages = canned.get("contact", language)
             
-        # Complex query - use AI
+        # FAQ request - matching FAQ or the full list
+        elif intent == "faq":
+            faq_answer = kb.search_faq(message_text, language)
+            if faq_answer:
+                response = formatter.add_context_header(faq_answer, "faq", language)
+                messages = formatter.split_long_message(response, channel="telegram")
+            else:
+                messages = canned.get("faq", language)
+            
+        # Complex or uncertain query - answer locally if retrieval is confident, else use AI
         else:
-            response = await process_with_ai(message_text, language, user_id)
+            with tracer.span("local_answer") as span:
+                local = answer_engine.lookup(message_text, language)
+                if span:
+                    span.attributes["tier"] = local.tier if local else "llm"
+            
+            if local:
+                with tracer.span("markdown_render"):
+                    response = formatter.format_response(local.text, language, "telegram", local.context_type)
+                with tracer.span("message_split"):
+                    messages = formatter.split_long_message(response, channel="telegram")
+            elif stream_replies:
+                # Stream the AI answer as it is generated
+                await stream_ai_reply(update.message, message_text, language, user_id)
+                return
+            else:
+                # process_with_ai traces its own markdown_render span
+                response = await process_with_ai(message_text, language, user_id)
+                with tracer.span("message_split"):
+                    messages = formatter.split_long_message(response, channel="telegram")
         
-        # Format and send response
-        messages = formatter.split_long_message(response)
-        for msg in messages:
-            await update.message.reply_text(msg)
+        # Send response
+        with tracer.span("telegram_send", messages=len(messages)):
+            for msg in messages:
+                await update.message.reply_text(msg)
             
     except Exception as e:
         logger.error(f"Error handling message: {e}", exc_info=True)
         error_msg = formatter.format_error_message(language)
         await update.message.reply_text(error_msg)
 
-async def process_with_ai(query: str, language: str, user_id: str) -> str:
-    """Process query using Gemini AI with conversation history"""
-    try:
-        if not gemini_model:
-            raise Exception("Gemini API not configured")
-        
-        # Get conversation history
-        history = get_conversation_history(user_id)
-        
-        # Build context from history
-        context_messages = ""
-        if history:
-            context_messages = "\n\nPrevious conversation:\n"
-            for msg in history[-6:]:  # Last 3 exchanges
-                role = "User" if msg["role"] == "user" else "Assistant"
-                context_messages += f"{role}: {msg['content']}\n"
-        
-        # Get company knowledge summary
-        company_context = company_kb.get_summary()
-        
-        # Build prompt with history and personality
-        if language == "ar":
-            prompt = f"""أنت موظف خدمة عملاء محترف وودود في شركة تأمين صحي. اسمك "أحمد" وأنت هنا لمساعدة العملاء.
+def build_prompt(query: str, language: str, user_id: str):
+    """Build the Gemini prompt from company knowledge and conversation history
+    
+    Returns:
+        (prompt, history) tuple
+    """
+    # Get conversation history
+    history = get_conversation_history(user_id)
+    
+    # Build context from history
+    context_messages = ""
+    if history:
+        context_messages = "\n\nPrevious conversation:\n"
+        for msg in history[-6:]:  # Last 3 exchanges
+            role = "User" if msg["role"] == "user" else "Assistant"
+            context_messages += f"{role}: {msg['content']}\n"
+    
+    # Get company knowledge summary
+    company_context = company_kb.get_summary()
+    
+    # Build prompt with history and personality
+    if language == "ar":
+        prompt = f"""أنت موظف خدمة عملاء محترف وودود في شركة تأمين صحي. اسمك "أحمد" وأنت هنا لمساعدة العملاء.
 
 🎯 شخصيتك:
 - ودود ومرحب
@@ -283,8 +335,8 @@ async def process_with_ai(query: str, language: str, user_id: str) -> str:
 6. إذا لم تكن متأكداً، وجه العميل لخدمة العملاء: 19123
 
 تذكر: أنت تتحدث مع إنسان، كن طبيعياً وودوداً! 😊"""
-        else:
-            prompt = f"""You are a professional and friendly customer service representative at a health insurance company. Your name is "Ahmed" and you're here to help customers.
+    else:
+        prompt = f"""You are a professional and friendly customer service representative at a health insurance company. Your name is "Ahmed" and you're here to help customers.
 
 🎯 Your Personality:
 - Warm and welcoming
@@ -309,66 +361,116 @@ async def process_with_ai(query: str, language: str, user_id: str) -> str:
 6. If unsure, direct customer to support: 19123
 
 Remember: You're talking to a human, be natural and friendly! 😊"""
+    
+    return prompt, history
+
+async def process_with_ai(query: str, language: str, user_id: str) -> str:
+    """Process query using Gemini AI with conversation history"""
+    try:
+        if not get_generative_model(model_router.model_for("chat")):
+            raise Exception("Gemini API not configured")
+        
+        with tracer.span("prompt_build"):
+            prompt, history = build_prompt(query, language, user_id)
         
-        # Show what we're sending to Gemini
-        logger.info("=" * 60)
-        logger.info("🤖 GEMINI AI CONVERSATION")
-        logger.info("=" * 60)
-        logger.info(f"👤 USER ID: {user_id}")
-        logger.info(f"📤 USER QUERY ({language.upper()}):")
-        logger.info(f"   {query}")
-        logger.info(f"📚 CONVERSATION HISTORY: {len(history)} messages")
-        logger.info("-" * 60)
-        logger.info("📤 SENDING TO GEMINI:")
-        logger.info(f"   Model: gemini-2.0-flash-001")
-        logger.info(f"   Language: {language}")
-        logger.info(f"   Prompt length: {len(prompt)} characters")
-        logger.info("-" * 60)
+        logger.info(f"🤖 Gemini request: user={user_id} lang={language} "
+                    f"history={len(history)} prompt_chars={len(prompt)}")
         
-        # Call Gemini (Async)
-        response = await gemini_model.generate_content_async(prompt)
-        answer = response.text
+        async def call(model_name):
+            with get_llm_metrics().track(model_name, "chat", estimate_tokens(prompt)) as call_metrics:
+                response = await gemini_quota.acall(get_generative_model(model_name).generate_content_async, prompt,
+                                                    tokens=estimate_tokens(prompt), timing=call_metrics)
+                call_metrics["completion_tokens"] = estimate_tokens(response.text)
+                return response
         
-        # Show what Gemini responded
-        logger.info("📥 GEMINI RESPONSE:")
-        logger.info(f"   {answer[:200]}..." if len(answer) > 200 else f"   {answer}")
-        logger.info(f"   Response length: {len(answer)} characters")
-        logger.info("=" * 60)
+        # Call Gemini (Async), within the shared quota
+        with tracer.span("model_call", model=model_router.model_for("chat"), prompt_chars=len(prompt)), \
+                answer_engine.llm_call():
+            response = await model_router.arun("chat", call, tokens=estimate_tokens(prompt))
+            answer = response.text
+        gemini_quota.record_tokens(estimate_tokens(answer))
+        
+        logger.debug(f"📥 Gemini response ({len(answer)} chars): {answer[:200]}")
         
         # Add to history
         add_to_history(user_id, "user", query)
         add_to_history(user_id, "assistant", answer)
         
         # Clean formatting
-        answer = formatter.clean_ai_formatting(answer)
+        with tracer.span("markdown_render"):
+            answer = formatter.clean_ai_formatting(answer, channel="telegram")
         
         return answer
         
     except Exception as e:
         logger.error(f"❌ Error in AI processing: {e}")
         logger.error("=" * 60)
-        # Fallback to knowledge base
-        faq_answer = kb.search_faq(query, language)
-        if faq_answer:
-            return faq_answer
+        return fallback_answer(query, language)
+
+def fallback_answer(query: str, language: str) -> str:
+    """Knowledge base answer (or contact details) used when the AI is unavailable"""
+    faq_answer = kb.search_faq(query, language)
+    if faq_answer:
+        return faq_answer
+    else:
+        if language == "ar":
+            return f"شكراً لسؤالك. للحصول على مساعدة أفضل، يرجى التواصل مع خدمة العملاء على:\n📞 19123\n📧 support@insurance.com"
         else:
-            if language == "ar":
-                return f"شكراً لسؤالك. للحصول على مساعدة أفضل، يرجى التواصل مع خدمة العملاء على:\n📞 19123\n📧 support@insurance.com"
-            else:
-                return f"Thank you for your question. For better assistance, please contact customer service:\n📞 19123\n📧 support@insurance.com"
+            return f"Thank you for your question. For better assistance, please contact customer service:\n📞 19123\n📧 support@insurance.com"
 
-def main():
-    """Start the bot"""
-    logger.info("=" * 60)
-    logger.info("Starting Telegram Health Insurance Bot...")
-    logger.info("=" * 60)
-    
-    # Start Flask health check server in background
-    flask_thread = Thread(target=run_flask, daemon=True)
-    flask_thread.start()
-    logger.info("✅ Health check server started on port 8080")
-    
-    # Create application
+async def stream_ai_reply(message, query: str, language: str, user_id: str):
+    """Answer with Gemini streaming: the first sentence is sent as soon as it is
+    generated and the message is edited (or continued) as the rest arrives"""
+    reply = StreamingReply(message, formatter, channel="telegram", min_edit_interval=stream_edit_interval)
+    try:
+        chat_model = model_router.model_for("chat")
+        gemini_model = get_generative_model(chat_model)
+        if not gemini_model:
+            raise Exception("Gemini API not configured")
+        
+        with tracer.span("prompt_build"):
+            prompt, history = build_prompt(query, language, user_id)
+        
+        logger.info(f"🤖 Gemini stream request: user={user_id} lang={language} "
+                    f"history={len(history)} prompt_chars={len(prompt)}")
+        
+        started = time.perf_counter()
+        with tracer.span("model_call", model=chat_model, prompt_chars=len(prompt), streaming=True) as span, \
+                answer_engine.llm_call(), \
+                get_llm_metrics().track(chat_model, "chat", estimate_tokens(prompt)) as call_metrics:
+            response = await gemini_quota.acall(gemini_model.generate_content_async, prompt, stream=True,
+                                                tokens=estimate_tokens(prompt), timing=call_metrics)
+            streamed = []
+            async for chunk in response:
+                streamed.append(chunk.text)
+                await reply.feed(chunk.text)
+            call_metrics["completion_tokens"] = estimate_tokens("".join(streamed))
+            if span and reply.first_message_at:
+                span.attributes["first_message_ms"] = round((reply.first_message_at - started) * 1000, 1)
+        
+        with tracer.span("telegram_send", streaming=True):
+            answer = await reply.finish()
+        gemini_quota.record_tokens(estimate_tokens(answer))
+        model_router.record("chat", chat_model, time.perf_counter() - started,
+                            estimate_tokens(prompt), estimate_tokens(answer))
+        
+        logger.debug(f"📥 Gemini response ({len(answer)} chars): {answer[:200]}")
+        
+        # Add to history
+        add_to_history(user_id, "user", query)
+        add_to_history(user_id, "assistant", answer)
+        
+    except Exception as e:
+        logger.error(f"❌ Error in streaming AI processing: {e}")
+        if reply.started:
+            # Keep what the user has already seen and complete it
+            await reply.finish()
+        else:
+            for msg in formatter.split_long_message(fallback_answer(query, language), channel="telegram"):
+                await message.reply_text(msg)
+
+def build_application():
+    """Create the Telegram application with all handlers registered"""
     application = Application.builder().token(TELEGRAM_TOKEN).build()
     
     # Add command handlers
@@ -382,6 +484,22 @@ def main():
     # Add message handler
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     
+    return application
+
+def main():
+    """Start the bot"""
+    logger.info("=" * 60)
+    logger.info("Starting Telegram Health Insurance Bot...")
+    logger.info("=" * 60)
+    
+    # Start Flask health check server in background
+    flask_thread = Thread(target=run_flask, daemon=True)
+    flask_thread.start()
+    logger.info("✅ Health check server started on port 8080")
+    
+    # Create application
+    application = build_application()
+    
     # Start bot
     logger.info("✅ Bot is ready!")
     logger.info("🤖 You can now send messages to your bot on Telegram")
@@ -9,13 +9,14 @@ import asyncio
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from dotenv import load_dotenv
-from crewai import Crew, Process
 
 # Import our CrewAI components
 from health_insurance_agent import HealthInsuranceAgentConfig
 from health_insurance_tasks import HealthInsuranceTasks
+from crew_pool import CrewWorkerPool, CrewPoolBusy
 from knowledge_base import HealthInsuranceKnowledgeBase
-from language_detector import LanguageDetector
+from language_detector import LanguageDetector, LanguagePreferenceStore
+from intent_router import IntentRouter
 
 # Setup logging
 logging.basicConfig(
@@ -29,9 +30,25 @@ load_dotenv()
 
 # Initialize components
 kb = HealthInsuranceKnowledgeBase()
-lang_detector = LanguageDetector()
+# Set LANGUAGE_DB to persist language preferences across restarts
+lang_detector = LanguageDetector(LanguagePreferenceStore(db_path=os.getenv('LANGUAGE_DB')))
 agent_config = HealthInsuranceAgentConfig()
 tasks_config = HealthInsuranceTasks(kb)
+intent_router = IntentRouter(kb, threshold=float(os.getenv('INTENT_CONFIDENCE_THRESHOLD', 0.7)))
+
+# Dedicated pool for blocking crew kickoffs; crews are built once per worker and language
+crew_pool = CrewWorkerPool(
+    agent_config,
+    tasks_config,
+    max_workers=int(os.getenv('CREW_POOL_WORKERS', 4)),
+    max_pending=int(os.getenv('CREW_POOL_MAX_PENDING', 32)),
+    timeout_seconds=float(os.getenv('CREW_POOL_TIMEOUT', 120))
+)
+
+# Hot-reload knowledge_base.json; crew task templates embed its text
+kb.add_reload_listener(lambda _: crew_pool.invalidate())
+kb.add_reload_listener(intent_router.retrain)
+kb.watch()
 
 # Get Telegram token
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -58,47 +75,24 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # 1. Detect language
         language = lang_detector.detect_language(message_text, user_id)
         
-        # 2. Create Agents
-        # We create fresh agents for each request to ensure no state leakage in this simple demo
-        classifier_agent = agent_config.create_query_classifier_agent(language)
-        insurance_agent = agent_config.create_insurance_agent(language)
-        
-        # 3. Define Tasks
-        # First: Classify the query
-        classify_task = tasks_config.classify_query_task(classifier_agent, message_text, language)
-        
-        # Second: We need to dynamically decide the next task based on classification, 
-        # but for this simple CrewAI demo, we will create a generic "Answer" task 
-        # that takes the classification context if possible, or just answers directly.
-        # To keep it simple and robust, we'll ask the insurance agent to answer based on the query type.
-        
-        # Let's create a specialized task for the insurance agent
-        # We'll use the 'answer_general_task' which is flexible enough
-        answer_task = tasks_config.answer_general_task(insurance_agent, message_text, language)
+        # 2. Route locally; the classifier agent only runs when the router is unsure
+        intent = intent_router.route(message_text)
+        logger.info(f"Local intent: {intent or 'uncertain - using classifier agent'}")
         
-        # 4. Create Crew
-        # We put both agents in the crew. 
-        # Note: In a more complex setup, we might pass the output of classify_task to answer_task
-        crew = Crew(
-            agents=[classifier_agent, insurance_agent],
-            tasks=[classify_task, answer_task],
-            process=Process.sequential, # Run sequentially: Classify -> Answer
-            verbose=True
-        )
-        
-        # 5. Kickoff!
-        # Since CrewAI is blocking, we run it in a way that doesn't block the async Telegram loop
-        # We use asyncio.to_thread to run the blocking kickoff
-        result = await asyncio.to_thread(crew.kickoff)
-        
-        # 6. Send Response
-        final_answer = str(result)
+        # 3. Run the crew on the worker pool
+        # Agents, tasks and the crew are reused; only the query is interpolated per message
+        final_answer = await crew_pool.kickoff(message_text, language, intent)
         
+        # 4. Send Response
         # Delete the "thinking" message
         await context.bot.delete_message(chat_id=update.effective_chat.id, message_id=status_msg.message_id)
         
         # Send the final answer
         await update.message.reply_text(final_answer)
+    
+    except (CrewPoolBusy, asyncio.TimeoutError) as e:
+        logger.warning(f"Crew pool unavailable: {e!r} - metrics: {crew_pool.metrics.snapshot()}")
+        await update.message.reply_text("⏳ الخدمة مشغولة حالياً، يرجى المحاولة بعد قليل.\n⏳ The service is busy right now, please try again shortly.")
             
     except Exception as e:
         logger.error(f"Error in CrewAI processing: {e}", exc_info=True)
@@ -108,12 +102,19 @@ def main():
     """Start the bot"""
     logger.info("Starting Telegram Health Insurance Bot (CrewAI Version)...")
     
+    # Build crew templates up front so the first messages don't pay for construction
+    crew_pool.warm_up()
+    logger.info(f"✅ Crew pool ready: {crew_pool.metrics.snapshot()}")
+    
     application = Application.builder().token(TELEGRAM_TOKEN).build()
     
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     
-    application.run_polling()
+    try:
+        application.run_polling()
+    finally:
+        crew_pool.shutdown(wait=False)
 
 if __name__ == '__main__':
     main()
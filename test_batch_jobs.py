@@ -0,0 +1,109 @@
+"""
+Batch job tracking: progress, stored results, heartbeats and resuming interrupted jobs
+"""
+import time
+
+import pytest
+
+from batch_jobs import BatchJobStore, BatchRunner, LocalBatchBackend
+
+ITEMS = [(1, "Summarize: one"), (2, "Summarize: two"), (3, "Summarize: three")]
+
+
+def generate(kind, prompt):
+    if "two" in prompt:
+        raise ValueError("model refused")
+    return f"{kind}: {prompt.split(': ')[1]}"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BatchJobStore(str(tmp_path / "jobs.db"))
+
+
+@pytest.fixture
+def runner(store):
+    return BatchRunner(store, LocalBatchBackend(generate, chunk_size=2), stale_seconds=60)
+
+
+def make_stale(store, job_id, age=3600):
+    conn = store._connect()
+    with conn:
+        conn.execute('UPDATE batch_jobs SET updated = ? WHERE id = ?', (time.time() - age, job_id))
+
+
+def wait_until_finished(store, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while store.job(job_id)["status"] not in ("completed", "failed"):
+        assert time.time() < deadline, "job did not finish"
+        time.sleep(0.01)
+    return store.job(job_id)
+
+
+def test_job_runs_and_records_progress(store, runner):
+    job_id = store.create_job("summary", ITEMS, "local")
+    assert store.job(job_id)["status"] == "queued"
+
+    runner._run(job_id, "summary", ITEMS)
+    job = store.job(job_id)
+    assert (job["status"], job["total"], job["succeeded"], job["failed"]) == ("completed", 3, 2, 1)
+    assert job["failed_items"] == [{"item_id": 2, "error": "model refused"}]
+    assert store.pending_items(job_id) == []
+
+
+def test_results_are_tied_to_their_prompt(store, runner):
+    job_id = store.create_job("summary", ITEMS, "local")
+    runner._run(job_id, "summary", ITEMS)
+    assert store.stored_result("summary", 1, "Summarize: one") == "summary: one"
+    # Edited content has no result yet
+    assert store.stored_result("summary", 1, "Summarize: one, edited") is None
+    assert store.stored_result("enhance", 1, "Summarize: one") is None
+
+    store.store_result("summary", 1, "Summarize: one, edited", "new")
+    assert store.stored_result("summary", 1, "Summarize: one, edited") == "new"
+
+
+def test_only_stale_jobs_are_claimed_and_only_once(store):
+    fresh = store.create_job("summary", ITEMS, "local")
+    stale = store.create_job("summary", ITEMS, "local")
+    make_stale(store, stale)
+
+    assert store.claim_stale("local", stale_seconds=60) == [(stale, "summary", None)]
+    # Claiming refreshed the heartbeat, so another worker finds nothing
+    assert store.claim_stale("local", stale_seconds=60) == []
+    assert store.job(fresh)["status"] == "queued"
+
+
+def test_heartbeat_keeps_a_job_from_being_claimed(store):
+    job_id = store.create_job("summary", ITEMS, "local")
+    make_stale(store, job_id)
+    store.touch(job_id)
+    assert store.claim_stale("local", stale_seconds=60) == []
+
+
+def test_stale_jobs_of_another_backend_fail(store):
+    job_id = store.create_job("summary", ITEMS, "vertex")
+    make_stale(store, job_id)
+    assert store.claim_stale("local", stale_seconds=60) == []
+    job = store.job(job_id)
+    assert job["status"] == "failed"
+    assert "vertex" in job["error"]
+
+
+def test_resume_finishes_the_remaining_items(store, runner):
+    job_id = store.create_job("summary", ITEMS, "local")
+    store.save_results(job_id, "summary", [(1, "Summarize: one", "done before the restart", None)])
+    make_stale(store, job_id)
+    assert store.pending_items(job_id) == ITEMS[1:]
+
+    runner.resume()
+    job = wait_until_finished(store, job_id)
+    assert (job["status"], job["succeeded"], job["failed"]) == ("completed", 2, 1)
+    # The result from before the restart was not regenerated
+    assert store.stored_result("summary", 1, "Summarize: one") == "done before the restart"
+    assert store.stored_result("summary", 3, "Summarize: three") == "summary: three"
+
+
+def test_submit_runs_in_the_background(store, runner):
+    job = wait_until_finished(store, runner.submit("summary", ITEMS))
+    assert (job["status"], job["succeeded"]) == ("completed", 2)
@@ -0,0 +1,105 @@
+"""
+REST client token caching and the 401 retry, with stand-in service account credentials
+"""
+import datetime
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("google.oauth2")
+sys.path.insert(0, str(Path(__file__).parent / "gemini_tool"))
+
+import gemini_rest_api_example as rest  # noqa: E402
+
+
+class FakeCredentials:
+    """Mints numbered tokens that live lifetime seconds"""
+
+    def __init__(self, lifetime=3600):
+        self.lifetime = lifetime
+        self.token = None
+        self.expiry = None
+        self.refreshes = 0
+
+    def refresh(self, _request):
+        time.sleep(0.01)  # Lets concurrent callers pile up on the lock
+        self.refreshes += 1
+        self.token = f"token-{self.refreshes}"
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        self.expiry = now + datetime.timedelta(seconds=self.lifetime)
+
+
+@pytest.fixture
+def credentials(monkeypatch):
+    credentials = FakeCredentials()
+    monkeypatch.setattr(rest.service_account.Credentials, "from_service_account_file",
+                        lambda *_args, **_kwargs: credentials)
+    return credentials
+
+
+def test_token_is_reused_until_close_to_expiry(credentials):
+    provider = rest.CachedTokenProvider("key.json", refresh_margin=300)
+    assert provider.token() == "token-1"
+    assert provider.token() == "token-1"
+    assert credentials.refreshes == 1
+
+    credentials.expiry -= datetime.timedelta(seconds=3400)  # 200 s left
+    assert provider.token() == "token-2"
+
+
+def test_concurrent_callers_refresh_once(credentials):
+    provider = rest.CachedTokenProvider("key.json")
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(provider.token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tokens == ["token-1"] * 8
+    assert credentials.refreshes == 1
+
+
+def test_providers_are_shared_per_key_file(credentials, monkeypatch):
+    monkeypatch.setattr(rest, "_providers", {})
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(rest.get_access_token("key.json")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert set(tokens) == {"token-1"}
+    assert list(rest._providers) == ["key.json"]
+    assert credentials.refreshes == 1
+
+
+def response(status_code, text="hi"):
+    return mock.Mock(status_code=status_code, text=text,
+                     json=lambda: {"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+
+@pytest.fixture
+def client(credentials):  # noqa: ARG001 - patches the key file loader
+    client = rest.GeminiRestClient("key.json", project_id="project")
+    client.session = mock.Mock()
+    return client
+
+
+def test_unauthorized_call_refreshes_and_retries_once(client, credentials):
+    client.session.post.side_effect = [response(401, "expired"), response(200, "hello")]
+    assert client.generate("Hi") == "hello"
+    assert credentials.refreshes == 2
+    tokens = [call.kwargs["headers"]["Authorization"] for call in client.session.post.call_args_list]
+    assert tokens == ["Bearer token-1", "Bearer token-2"]
+
+
+def test_other_errors_are_not_retried(client):
+    client.session.post.side_effect = [response(500, "API Error 401 in the body")]
+    with pytest.raises(rest.requests.HTTPError) as error:
+        client.generate("Hi")
+    assert error.value.response.status_code == 500
+    assert client.session.post.call_count == 1
@@ -0,0 +1,64 @@
+"""
+Local intent routing: keywords first, the Naive Bayes model second, the LLM when unsure
+"""
+import pytest
+
+from intent_router import IntentRouter, NaiveBayesIntentModel, tokenize
+from knowledge_base import HealthInsuranceKnowledgeBase
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter(HealthInsuranceKnowledgeBase())
+
+
+def test_tokenize_adds_trigrams_and_drops_diacritics():
+    assert tokenize("Hi") == ["hi", "<hi", "hi>"]
+    assert tokenize("مُطالبة")[0] == "مطالبة"
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("what's my coverage", "coverage"),
+    ("أقرب مستشفى", "provider"),
+    ("Contact details", "contact"),
+])
+def test_single_keyword_is_certain(router, text, intent):
+    assert router.classify(text) == (intent, 1.0, "keyword")
+
+
+def test_several_keywords_follow_priority_with_less_confidence(router):
+    assert router.classify("claim at the hospital") == ("claim", 0.75, "keyword")
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("how do i get reimbursed for my bill", "claim"),
+    ("which pharmacy is near me", "provider"),
+    ("كيف أسترد المبلغ", "claim"),
+])
+def test_model_routes_queries_without_keywords(router, text, intent):
+    result = router.classify(text)
+    assert (result.intent, result.source) == (intent, "model")
+    assert router.route(text) == intent
+
+
+def test_unsure_queries_fall_back_to_the_llm(router):
+    assert router.classify("zzzz qqqq") == ("general", 0.0, "none")
+    assert router.route("zzzz qqqq") is None
+    assert IntentRouter(HealthInsuranceKnowledgeBase(), threshold=1.01).route("which pharmacy is near me") is None
+
+
+def test_naive_bayes_model():
+    model = NaiveBayesIntentModel().train([
+        ("dental cleaning", "dental"), ("teeth whitening", "dental"),
+        ("eye exam", "vision"), ("glasses lenses", "vision"),
+    ])
+    intent, probability = model.predict("teeth")
+    assert intent == "dental" and 0.5 < probability <= 1.0
+    assert model.predict("glasses")[0] == "vision"
+    assert model.predict("xyz") == (None, 0.0)
+    assert NaiveBayesIntentModel().predict("teeth") == (None, 0.0)
+
+
+def test_unseen_features_lower_confidence():
+    model = NaiveBayesIntentModel().train([("dental cleaning", "dental"), ("eye exam", "vision")])
+    assert model.predict("dental qqqq zzzz")[1] < model.predict("dental")[1]
@@ -0,0 +1,110 @@
+"""
+Knowledge snapshot invalidation and hot reload
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+import knowledge_base
+from knowledge_base import HealthInsuranceKnowledgeBase, load_compiled_knowledge
+
+SOURCE = Path(knowledge_base.__file__).parent / "knowledge_base.json"
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "knowledge_base.json"
+    shutil.copy(SOURCE, path)
+    return path
+
+
+def edit(path, change, mtime_step=1):
+    """Rewrite the JSON with change(data) applied and move the mtime forward"""
+    stat = path.stat()
+    data = json.loads(path.read_text(encoding="utf-8"))
+    change(data)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_step * 1_000_000_000))
+
+
+def first_question(data):
+    return data["faq"]["en"][0]["q"]
+
+
+def test_snapshot_is_written_and_reused(data_file, monkeypatch):
+    knowledge, digest = load_compiled_knowledge(str(data_file))
+    assert Path(f"{data_file}.snapshot").exists()
+
+    # A current snapshot is used without reading the JSON
+    monkeypatch.setattr(knowledge_base.json, "loads", pytest.fail)
+    again, again_digest = load_compiled_knowledge(str(data_file))
+    assert again_digest == digest
+    assert first_question(again) == first_question(knowledge)
+
+
+def test_changed_file_invalidates_the_snapshot(data_file):
+    load_compiled_knowledge(str(data_file))
+
+    def rename(data):
+        data["faq"]["en"][0]["q"] = "Changed?"
+
+    edit(data_file, rename)
+    knowledge, _ = load_compiled_knowledge(str(data_file))
+    assert first_question(knowledge) == "Changed?"
+
+
+def test_same_size_edit_is_detected_by_mtime(data_file):
+    edit(data_file, lambda _data: None)  # Same formatting as the edit below
+    load_compiled_knowledge(str(data_file))
+    size = data_file.stat().st_size
+    original = first_question(json.loads(data_file.read_text(encoding="utf-8")))
+
+    def swap_case(data):
+        data["faq"]["en"][0]["q"] = original.swapcase()
+
+    edit(data_file, swap_case)
+    assert data_file.stat().st_size == size
+    knowledge, _ = load_compiled_knowledge(str(data_file))
+    assert first_question(knowledge) == original.swapcase()
+
+
+def test_touched_file_keeps_its_digest(data_file, monkeypatch):
+    _, digest = load_compiled_knowledge(str(data_file))
+    stat = data_file.stat()
+    os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    # Read and hashed again, but not parsed: the content did not change
+    monkeypatch.setattr(knowledge_base.json, "loads", pytest.fail)
+    assert load_compiled_knowledge(str(data_file))[1] == digest
+
+
+def test_corrupt_snapshot_is_rebuilt(data_file):
+    _, digest = load_compiled_knowledge(str(data_file))
+    Path(f"{data_file}.snapshot").write_bytes(b"not a snapshot")
+    assert load_compiled_knowledge(str(data_file))[1] == digest
+
+
+def test_knowledge_is_read_only(data_file):
+    knowledge, _ = load_compiled_knowledge(str(data_file))
+    with pytest.raises(TypeError):
+        knowledge["faq"] = {}
+
+
+def test_reload_swaps_content_and_notifies(data_file):
+    kb = HealthInsuranceKnowledgeBase(str(data_file))
+    reloaded = []
+    kb.add_reload_listener(reloaded.append)
+    assert kb.reload() is False
+
+    def add_faq(data):
+        data["faq"]["en"].append({"q": "Do you cover dental implants?", "a": "Only on the premium plan."})
+
+    edit(data_file, add_faq)
+    old_version = kb.version
+    assert kb.reload() is True
+    assert reloaded == [kb]
+    assert kb.version != old_version
+    assert kb.faq_index["en"].search("dental implants")[0][1]["a"] == "Only on the premium plan."
@@ -0,0 +1,93 @@
+"""
+Language classification and the per-user preference store
+"""
+import pytest
+
+import language_detector
+from language_detector import LanguageDetector, LanguagePreferenceStore
+
+
+@pytest.fixture
+def detector():
+    return LanguageDetector(LanguagePreferenceStore())
+
+
+@pytest.mark.parametrize("text", [
+    "my claims were rejected",
+    "hospital list",
+    "show me 3 options",
+    "Hello, what does my policy cover?",
+])
+def test_latin_text_is_english(detector, text):
+    assert detector.detect_language(text) == "en"
+
+
+@pytest.mark.parametrize("text", [
+    "مرحبا، ما هي التغطية؟",
+    "ana 3ayez a3raf el taghtiya",
+])
+def test_arabic_and_arabizi_are_arabic(detector, text):
+    assert detector.detect_language(text) == "ar"
+
+
+def test_text_without_signal_keeps_previous_language(detector):
+    detector.detect_language("hospital list", user_id=1)
+    assert detector.detect_language("12345 👍", user_id=1) == "en"
+
+
+def test_switch_commands(detector):
+    assert detector.detect_language("switch to english", user_id=2) == "en"
+    assert detector.get_user_language(2) == "en"
+    assert detector.detect_language("تحويل للعربية", user_id=2) == "ar"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000]
+    monkeypatch.setattr(language_detector.time, "time", lambda: now[0])
+    return now
+
+
+def test_reads_do_not_create_entries():
+    store = LanguagePreferenceStore()
+    assert store.get(1) == "ar"
+    assert store.get(1, default=None) is None
+    assert 1 not in store
+    assert len(store) == 0
+
+
+def test_preferences_expire_after_the_ttl(clock):
+    store = LanguagePreferenceStore(ttl_seconds=100)
+    store.set(1, "en")
+    clock[0] += 100
+    assert store.get(1) == "en"  # Still valid at exactly the TTL; reading does not extend it
+    clock[0] += 1
+    assert store.get(1) == "ar"
+    assert len(store) == 0
+
+
+def test_least_recently_used_users_are_evicted():
+    store = LanguagePreferenceStore(max_users=2)
+    store.set("a", "en")
+    store.set("b", "en")
+    store.get("a")
+    store.set("c", "en")
+    assert "a" in store and "c" in store
+    assert "b" not in store
+
+
+def test_preferences_survive_restarts(tmp_path, clock):
+    path = str(tmp_path / "languages.db")
+    store = LanguagePreferenceStore(ttl_seconds=100, db_path=path)
+    store.set(1, "en")
+    store.set(2, "en")
+    clock[0] += 50
+    store.set(2, "ar")
+
+    restarted = LanguagePreferenceStore(ttl_seconds=100, db_path=path)
+    assert (restarted.get(1), restarted.get(2)) == ("en", "ar")
+
+    # Expired rows are purged when the file is opened again
+    clock[0] += 60
+    assert LanguagePreferenceStore(ttl_seconds=100, db_path=path).purge_expired() == 0
+    assert LanguagePreferenceStore(ttl_seconds=100, db_path=path).get(1, default=None) is None
@@ -0,0 +1,100 @@
+"""
+Model choice per call type, escalation on rejected answers and per-route accounting
+"""
+import asyncio
+import json
+
+import pytest
+
+from model_router import DEFAULT_ROUTES, ModelRouter, Route, load_routes
+
+ROUTES = {
+    "summary": Route("small", "large"),
+    "chat": Route("chat-model", None),
+}
+PRICES = {"small": (1.0, 2.0), "large": (10.0, 20.0)}
+
+
+class Model:
+    """call(model_name) stand-in that answers per model and remembers the order"""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.models = []
+
+    def __call__(self, model):
+        self.models.append(model)
+        return self.answers[model]
+
+
+@pytest.fixture
+def router():
+    return ModelRouter(dict(ROUTES), PRICES)
+
+
+def test_accepted_answer_does_not_escalate(router):
+    model = Model({"small": "a fine summary", "large": "unused"})
+    assert router.run("summary", model, validator=lambda text: len(text) > 5) == "a fine summary"
+    assert model.models == ["small"]
+    assert router.stats()["summary"]["escalations"] == 0
+
+
+def test_rejected_answer_escalates_once(router):
+    model = Model({"small": "", "large": "a better summary"})
+    assert router.run("summary", model, tokens=100, validator=bool) == "a better summary"
+    assert model.models == ["small", "large"]
+
+    stats = router.stats()["summary"]
+    assert (stats["calls"], stats["escalations"]) == (2, 1)
+    assert set(stats["models"]) == {"small", "large"}
+    assert stats["models"]["large"]["input_tokens"] == 100
+
+
+def test_last_model_answer_is_returned_even_if_rejected(router):
+    model = Model({"small": "", "large": ""})
+    assert router.run("summary", model, validator=bool) == ""
+    assert model.models == ["small", "large"]
+
+
+def test_route_without_escalation(router):
+    model = Model({"chat-model": ""})
+    assert router.run("chat", model, validator=bool) == ""
+    assert model.models == ["chat-model"]
+
+
+def test_async_run_escalates(router):
+    answers = {"small": "", "large": "ok"}
+    models = []
+
+    async def call(model):
+        models.append(model)
+        return answers[model]
+
+    assert asyncio.run(router.arun("summary", call, validator=bool)) == "ok"
+    assert models == ["small", "large"]
+
+
+def test_unknown_route(router):
+    with pytest.raises(ValueError):
+        router.model_for("translation")
+
+
+def test_cost_uses_the_model_without_its_provider_prefix(router):
+    assert router.cost("vertex_ai/large", 1_000_000, 500_000) == pytest.approx(20.0)
+    assert router.cost("unpriced", 1000, 1000) == 0.0
+
+    router.record("summary", "gemini/small", 0.5, input_tokens=1_000_000, output_tokens=1_000_000)
+    assert router.stats()["summary"]["cost_usd"] == pytest.approx(3.0)
+    assert router.stats()["summary"]["avg_ms"] == 500.0
+
+
+def test_load_routes_from_json_and_files(tmp_path):
+    routes = load_routes('{"summary": "gemini-2.5-flash", "translate": {"model": "a", "escalate_to": "b"}}')
+    assert routes["summary"] == Route("gemini-2.5-flash", None)
+    assert routes["translate"] == Route("a", "b")
+    assert routes["chat"] == DEFAULT_ROUTES["chat"]
+
+    path = tmp_path / "routes.json"
+    path.write_text(json.dumps({"chat": "gemini-2.5-pro"}), encoding="utf-8")
+    assert load_routes(str(path))["chat"] == Route("gemini-2.5-pro", None)
+    assert load_routes(None) == DEFAULT_ROUTES
@@ -0,0 +1,107 @@
+"""
+Shared quota: priority reserve, the SQLite-backed budget and per-backend coordinators
+"""
+import pytest
+
+import quota_coordinator
+from quota_coordinator import (
+    LocalQuotaCoordinator,
+    SQLiteQuotaCoordinator,
+    _QuotaBase,
+    _take,
+    get_quota_coordinator,
+)
+
+BUCKETS = {"requests": (1.0, 4)}
+
+
+def test_batch_stops_at_the_reserve_interactive_does_not():
+    levels = {"requests": 4}
+    for _ in range(3):
+        assert _take(levels, 0, {"requests": 1}, BUCKETS, reserve=0.25) == 0.0
+    # One request left: the last quarter of the bucket is kept for interactive traffic
+    assert _take(levels, 0, {"requests": 1}, BUCKETS, reserve=0.25) == pytest.approx(1.0)
+    assert levels["requests"] == 1
+    assert _take(levels, 0, {"requests": 1}, BUCKETS, reserve=0.0) == 0.0
+    assert levels["requests"] == 0
+
+
+def test_refill_is_capped_at_capacity():
+    levels = {"requests": 0}
+    assert _take(levels, 100, {}, BUCKETS, reserve=0.0) == 0.0
+    assert levels["requests"] == 4
+
+
+def test_oversized_demand_is_admitted_when_full_and_paid_in_full():
+    buckets = {"requests": (1.0, 4), "tokens": (10.0, 100)}
+    levels = {"requests": 4, "tokens": 100}
+    assert _take(levels, 0, {"requests": 1, "tokens": 500}, buckets, reserve=0.0) == 0.0
+    assert levels["tokens"] == -400
+    # The debt is worked off before the next request fits
+    assert _take(levels, 0, {"requests": 1, "tokens": 10}, buckets, reserve=0.0) == pytest.approx(41.0)
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        _QuotaBase(10)
+
+
+def test_local_coordinator_priorities():
+    coordinator = LocalQuotaCoordinator(rpm=60, burst=4)
+    batch = coordinator.limiter("batch")
+    assert [coordinator.try_acquire(priority="batch") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert coordinator.try_acquire(priority="batch") > 0
+    assert coordinator.try_acquire(priority="interactive") == 0.0
+    assert batch.rpm == 60
+
+
+def test_processes_share_the_sqlite_budget(tmp_path):
+    path = str(tmp_path / "quota.db")
+    first = SQLiteQuotaCoordinator(path, rpm=60, burst=2)
+    second = SQLiteQuotaCoordinator(path, rpm=60, burst=2)
+    assert first.try_acquire() == 0.0
+    assert second.try_acquire() == 0.0
+    assert first.try_acquire() > 0
+    assert second.try_acquire() > 0
+
+    # Another name is another budget
+    assert SQLiteQuotaCoordinator(path, rpm=60, burst=2, name="other").try_acquire() == 0.0
+
+
+def test_sqlite_records_response_tokens(tmp_path):
+    coordinator = SQLiteQuotaCoordinator(str(tmp_path / "quota.db"), rpm=600, tpm=600, token_burst=100)
+    assert coordinator.try_acquire(tokens=50) == 0.0
+    coordinator.record_tokens(50)
+    assert coordinator.try_acquire(tokens=10) == pytest.approx(1.0, abs=0.05)
+
+
+@pytest.fixture
+def fresh_coordinators(monkeypatch):
+    monkeypatch.setattr(quota_coordinator, "_shared", {})
+    for name in ("GEMINI_QUOTA_DB", "GEMINI_RPM", "GEMINI_TPM", "GEMINI_VERTEX_RPM"):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+def test_default_coordinator_is_a_shared_file(fresh_coordinators, tmp_path):
+    default_db = str(tmp_path / "gemini_quota.db")
+    fresh_coordinators.setattr(quota_coordinator, "DEFAULT_QUOTA_DB", default_db)
+    coordinator = get_quota_coordinator("api_key")
+    assert isinstance(coordinator, SQLiteQuotaCoordinator)
+    assert coordinator.db_path == default_db
+    assert get_quota_coordinator("api_key") is coordinator
+
+
+def test_empty_quota_db_keeps_the_budget_in_process(fresh_coordinators):
+    fresh_coordinators.setenv("GEMINI_QUOTA_DB", "")
+    assert isinstance(get_quota_coordinator("api_key"), LocalQuotaCoordinator)
+
+
+def test_each_backend_has_its_own_quota(fresh_coordinators):
+    fresh_coordinators.setenv("GEMINI_QUOTA_DB", "")
+    fresh_coordinators.setenv("GEMINI_RPM", "30")
+    fresh_coordinators.setenv("GEMINI_VERTEX_RPM", "300")
+    api_key = get_quota_coordinator("api_key")
+    vertex = get_quota_coordinator("vertex")
+    assert api_key is not vertex
+    assert (api_key.rpm, vertex.rpm) == (30, 300)
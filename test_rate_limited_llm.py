@@ -0,0 +1,53 @@
+"""
+RateLimitedLLM must stay a crewai.LLM so agents keep it (and its quota, cache and metrics)
+"""
+import pytest
+
+pytest.importorskip("crewai")
+
+from crewai import LLM, Agent  # noqa: E402
+
+from llm_cache import LLMResponseCache  # noqa: E402
+from quota_coordinator import LocalQuotaCoordinator  # noqa: E402
+from rate_limited_llm import RateLimitedLLM  # noqa: E402
+
+
+def make_llm(cache=None):
+    return RateLimitedLLM(model="gemini/gemini-2.0-flash-001", api_key="fake", mock_response="Hello",
+                          limiter=LocalQuotaCoordinator(rpm=600).limiter("interactive"), cache=cache)
+
+
+def test_agent_keeps_rate_limited_llm():
+    wrapper = make_llm()
+    agent = Agent(role="Tester", goal="Check the LLM", backstory="Checks things", llm=wrapper)
+    assert isinstance(wrapper, LLM)
+    assert agent.llm is wrapper
+
+
+def test_call_goes_through_limiter():
+    wrapper = make_llm()
+    assert wrapper.call([{"role": "user", "content": "Hi"}]) == "Hello"
+
+
+def test_tool_calls_skip_cache(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"))
+    wrapper = make_llm(cache)
+    messages = [{"role": "user", "content": "Hi"}]
+    wrapper.call(messages)
+    wrapper.call(messages)
+    assert (cache.hits, cache.writes) == (1, 1)
+
+    key, cached = wrapper._cached(messages, {"available_functions": {"search": print}})
+    assert (key, cached) == (None, None)
+
+
+def test_generation_params_are_keyed(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"))
+    messages = [{"role": "user", "content": "Hi"}]
+    key, _ = make_llm(cache)._cached(messages, {})
+    short_key, _ = make_llm(cache)._cached(messages, {"max_tokens": 10})
+    stop_llm = make_llm(cache)
+    stop_llm.stop = ["Observation:"]
+    stop_key, _ = stop_llm._cached(messages, {"callbacks": []})
+    assert len({key, short_key, stop_key}) == 3
+    assert make_llm(cache)._cached(messages, {"callbacks": []})[0] == key
@@ -0,0 +1,222 @@
+"""
+Token buckets, the requests/tokens per minute limiter and adaptive rate control
+"""
+import asyncio
+
+import pytest
+
+import rate_limiter
+from rate_limiter import (
+    AdaptiveRateController,
+    RateLimiter,
+    TokenBucket,
+    estimate_tokens,
+    is_rate_limit_error,
+    retry_after_hint,
+)
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_serves_burst_then_makes_callers_wait():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    now = bucket.updated
+    assert bucket.reserve(1, now) == 0.0
+    assert bucket.reserve(1, now) == 0.0
+    # Reservations run into debt, so each caller waits behind the previous one
+    assert bucket.reserve(1, now) == pytest.approx(1.0)
+    assert bucket.reserve(1, now) == pytest.approx(2.0)
+
+
+def test_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(rate=2.0, capacity=4)
+    now = bucket.updated
+    bucket.reserve(4, now)
+    assert bucket.reserve(1, now + 1.0) == 0.0  # Two back after a second
+    assert bucket.reserve(10, now + 100.0) == pytest.approx(3.0)  # Capped at 4, 6 short
+
+    bucket.refund(100)
+    assert bucket.level == 4
+
+
+def test_limiter_allows_burst_then_spaces_requests(clock):
+    limiter = RateLimiter(rpm=60, burst=3)
+    assert [limiter.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.reserve() == pytest.approx(1.0)
+
+    clock.now += 10
+    assert limiter.reserve() == 0.0
+
+
+@pytest.mark.usefixtures("clock")
+def test_limiter_default_burst_is_ten_seconds_of_requests():
+    limiter = RateLimiter(rpm=60)
+    waits = [limiter.reserve() for _ in range(11)]
+    assert waits[:10] == [0.0] * 10
+    assert waits[10] > 0
+
+
+def test_token_budget(clock):
+    limiter = RateLimiter(rpm=600, tpm=600, token_burst=100)
+    assert limiter.reserve(tokens=100) == 0.0
+    assert limiter.reserve(tokens=50) == pytest.approx(5.0)  # 10 tokens/s
+
+    # Response tokens are charged after the call
+    clock.now += 100
+    limiter.record_tokens(100)
+    assert limiter.reserve(tokens=10) == pytest.approx(1.0)
+
+
+@pytest.mark.usefixtures("clock")
+def test_refund_returns_the_reservation():
+    limiter = RateLimiter(rpm=60, burst=1)
+    limiter.reserve()
+    limiter.refund()
+    assert limiter.reserve() == 0.0
+
+
+@pytest.mark.usefixtures("clock")
+def test_cancelled_async_wait_is_refunded(monkeypatch):
+    limiter = RateLimiter(rpm=60, burst=1)
+    limiter.reserve()
+
+    async def cancelled_sleep(_seconds):
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", cancelled_sleep)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(limiter.acquire_async())
+    # Only the first request is still charged
+    assert limiter.reserve() == pytest.approx(1.0)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens(None) == 0
+    assert estimate_tokens("x" * 40) == 11
+    assert estimate_tokens([{"role": "user", "content": "x" * 40}, {"content": "abcd"}]) == 13
+
+
+class RateLimitError(Exception):
+    """Shaped like LiteLLM's error: the name alone marks it as a rate limit"""
+
+
+class Flaky:
+    """Raises the given errors in turn, then returns ok"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(rate_limiter.time, "sleep", slept.append)
+    return slept
+
+
+@pytest.fixture
+def controller():
+    return AdaptiveRateController(RateLimiter(rpm=6000), max_retries=2)
+
+
+@pytest.mark.parametrize("error", [
+    RateLimitError("slow down"),
+    Exception("429 Too Many Requests"),
+    Exception("RESOURCE_EXHAUSTED: quota"),
+    type("HTTPError", (Exception,), {"status_code": 429})("x"),
+])
+def test_rate_limit_errors_are_recognized(error):
+    assert is_rate_limit_error(error)
+
+
+def test_other_errors_are_not_rate_limits():
+    assert not is_rate_limit_error(ValueError("bad request"))
+
+
+def test_retry_after_hint():
+    assert retry_after_hint(Exception("Please retry in 7.5s")) == 7.5
+    assert retry_after_hint(Exception('"retryDelay": "12s"')) == 12.0
+    assert retry_after_hint(Exception("no hint")) is None
+
+
+def test_throttle_is_retried_and_halves_the_rate(controller, sleeps):
+    fn = Flaky(RateLimitError("slow down"))
+    timing = {}
+    assert controller.call(fn, timing=timing) == "ok"
+    assert fn.calls == 2
+    assert timing["retries"] == 1 and timing["wait"] >= 0
+    assert len(sleeps) >= 1
+    stats = controller.stats()
+    assert (stats["throttle_events"], stats["retries"], stats["calls"]) == (1, 1, 1)
+    # Halved, then one success adds 5% of the full rate back
+    assert stats["rate_fraction"] == pytest.approx(0.55)
+
+
+def test_server_hint_sets_the_backoff(controller, sleeps):
+    controller.call(Flaky(RateLimitError("retry in 3s")))
+    assert 3.0 <= max(sleeps) <= 3.3
+    assert controller.stats()["paused_for_seconds"] > 0
+
+
+def test_rate_recovers_and_never_drops_below_the_floor(controller):
+    for _ in range(10):
+        controller.on_throttle()
+    assert controller.fraction == controller.min_fraction
+    for _ in range(40):
+        controller.on_success()
+    assert controller.effective_rpm == controller.rpm
+
+
+@pytest.mark.usefixtures("sleeps")
+def test_gives_up_after_max_retries(controller):
+    fn = Flaky(*[RateLimitError("slow down")] * 5)
+    with pytest.raises(RateLimitError):
+        controller.call(fn)
+    assert fn.calls == 3
+    assert controller.stats()["failures"] == 1
+
+
+def test_other_errors_are_raised_at_once(controller, sleeps):
+    fn = Flaky(ValueError("bad request"))
+    with pytest.raises(ValueError):
+        controller.call(fn)
+    assert fn.calls == 1 and sleeps == []
+    assert controller.stats()["throttle_events"] == 0
+
+
+def test_async_call_retries(controller, monkeypatch):
+    slept = []
+
+    async def sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", sleep)
+    fn = Flaky(RateLimitError("slow down"))
+
+    async def call():
+        return fn()
+
+    assert asyncio.run(controller.acall(call)) == "ok"
+    assert fn.calls == 2 and slept
@@ -0,0 +1,109 @@
+"""
+Message splitting at natural boundaries, counted in UTF-16 code units, and markdown rendering per channel
+"""
+import pytest
+
+from response_formatter import ResponseFormatter, _utf16_length, render_markdown
+
+
+@pytest.fixture
+def formatter():
+    return ResponseFormatter()
+
+
+def test_short_text_is_one_part(formatter):
+    assert formatter.split_long_message("Hello", max_length=10) == ["Hello"]
+
+
+def test_prefers_paragraph_then_sentence_breaks(formatter):
+    text = "First paragraph here.\n\nSecond sentence. Third sentence."
+    assert formatter.split_long_message(text, max_length=30) == [
+        "First paragraph here.", "Second sentence.", "Third sentence.",
+    ]
+
+
+def test_arabic_sentence_ends(formatter):
+    text = "ما هي التغطية؟ وما هي الاستثناءات؟"
+    assert formatter.split_long_message(text, max_length=20) == ["ما هي التغطية؟", "وما هي الاستثناءات؟"]
+
+
+def test_words_are_not_cut(formatter):
+    text = " ".join(["coverage"] * 50)
+    parts = formatter.split_long_message(text, max_length=40)
+    assert all(len(part) <= 40 for part in parts)
+    assert all(word == "coverage" for part in parts for word in part.split(" "))
+    assert " ".join(parts) == text
+
+
+def test_emoji_count_as_two_utf16_units(formatter):
+    text = "😀" * 30  # 60 UTF-16 units
+    parts = formatter.split_long_message(text, max_length=20)
+    assert all(_utf16_length(part) <= 20 for part in parts)
+    assert "".join(parts) == text
+
+
+@pytest.mark.parametrize("cluster", [
+    "👍🏽",  # Skin tone modifier
+    "👨‍👩‍👧",  # ZWJ family
+    "🇪🇬",  # Regional indicator flag
+    "مُ",  # Letter with a haraka
+    "1️⃣",  # Keycap
+])
+def test_grapheme_clusters_are_never_split(formatter, cluster):
+    text = cluster * 40
+    for limit in (9, 10, 13):  # The longest cluster takes 8 units
+        parts = formatter.split_long_message(text, max_length=limit)
+        assert all(_utf16_length(part) <= limit for part in parts)
+        assert all(part.replace(cluster, "") == "" for part in parts)
+        assert "".join(parts) == text
+
+
+def test_channel_limit(formatter):
+    text = "word " * 2000
+    parts = formatter.split_long_message(text, channel="telegram")
+    assert len(parts) == 3
+    assert all(len(part) <= 4096 for part in parts)
+
+
+def test_complete_sentences_length(formatter):
+    assert formatter.complete_sentences_length("One. Two is still stream") == 4
+    assert formatter.complete_sentences_length("line\npartial") == 4
+    assert formatter.complete_sentences_length("no break yet") == 0
+
+
+MARKDOWN = "## Coverage\n\n* **Dental** is _covered_\n- see [policy](https://example.com/p?a=1&b=2) or `code`"
+
+
+def test_whatsapp_keeps_its_own_markup():
+    assert render_markdown(MARKDOWN, "whatsapp") == (
+        "Coverage\n\n* *Dental* is _covered_\n- see [policy](https://example.com/p?a=1&b=2) or `code`"
+    )
+
+
+def test_telegram_drops_markup():
+    assert render_markdown(MARKDOWN, "telegram") == (
+        "Coverage\n\n• Dental is covered\n• see policy (https://example.com/p?a=1&b=2) or code"
+    )
+
+
+def test_telegram_html_escapes_and_converts():
+    assert render_markdown(MARKDOWN, "telegram_html") == (
+        "<b>Coverage</b>\n\n• <b>Dental</b> is <i>covered</i>\n"
+        '• see <a href="https://example.com/p?a=1&amp;b=2">policy</a> or <code>code</code>'
+    )
+    assert render_markdown('1 < 2 & "x"', "telegram_html") == "1 &lt; 2 &amp; &quot;x&quot;"
+
+
+@pytest.mark.parametrize("text", ["snake_case_name", "2*3*4", "a - b", "plain answer."])
+def test_text_without_markup_is_unchanged(text):
+    assert render_markdown(text, "telegram") == text
+
+
+def test_code_content_is_not_rendered():
+    assert render_markdown("`**x**` and **y**", "telegram_html") == "<code>**x**</code> and <b>y</b>"
+
+
+def test_format_response_adds_header_and_footer(formatter):
+    text = formatter.format_response("  **Hi**  ", "en", "whatsapp", context_type="faq", footer=True)
+    assert text.startswith("❓ FAQ\n\n*Hi*\n\n")
+    assert text.endswith("Type 'help' for more options")
@@ -0,0 +1,80 @@
+"""
+Arabic normalization, light stemming and BM25 ranking
+"""
+import pytest
+
+from text_search import BM25Index, analyze, light_stem, normalize_arabic
+
+FAQS = [
+    {"q": "How do I submit a claim?", "a": "Send the claim form and receipts."},
+    {"q": "Which hospitals are in the network?", "a": "See the provider list."},
+    {"q": "كيف أقدم مطالبة؟", "a": "أرسل نموذج المطالبة والإيصالات."},
+    {"q": "ما هي المستشفيات المعتمدة؟", "a": "راجع قائمة مقدمي الخدمة."},
+]
+
+
+@pytest.fixture
+def index():
+    return BM25Index().build(FAQS, lambda faq: faq["q"])
+
+
+@pytest.mark.parametrize("raw, normalized", [
+    ("أحمد", "احمد"),
+    ("إسلام", "اسلام"),
+    ("مستشفى", "مستشفي"),
+    ("مطالبة", "مطالبه"),
+    ("مُطَالَبَة", "مطالبه"),  # Harakat
+    ("مطـــالبة", "مطالبه"),  # Tatweel
+    ("Claim", "claim"),
+])
+def test_normalize_arabic(raw, normalized):
+    assert normalize_arabic(raw) == normalized
+
+
+@pytest.mark.parametrize("token, stem", [
+    ("claims", "claim"),
+    ("hospitals", "hospital"),
+    ("covered", "cover"),
+    ("bus", "bus"),  # Too short to strip
+    ("والمستشفي", "مستشف"),
+    ("المطالبات", "مطالب"),
+])
+def test_light_stem(token, stem):
+    assert light_stem(token) == stem
+
+
+def test_analyze_drops_stop_words():
+    assert analyze("What is the claim limit?") == ["claim", "limit"]
+    assert analyze("ما هي المطالبة") == analyze("مطالبة")
+
+
+def test_ranks_matching_document_first(index):
+    assert index.search("submit claims")[0][1] is FAQS[0]
+    assert index.search("hospital network")[0][1] is FAQS[1]
+
+
+def test_spelling_variants_match_arabic_documents(index):
+    # Hamza, ta marbuta and alef maqsura differences do not matter
+    assert index.search("كيف اقدم مطالبه")[0][1] is FAQS[2]
+    assert index.search("المستشفيات")[0][1] is FAQS[3]
+
+
+def test_scores_are_descending_and_limited(index):
+    results = index.search("claim hospital network مطالبة", top_k=2)
+    assert len(results) == 2
+    assert results[0][0] >= results[1][0]
+
+
+def test_unknown_terms_match_nothing(index):
+    assert index.search("xylophone") == []
+    assert index.search("the and of") == []
+
+
+def test_coverage(index):
+    score, coverage, faq = index.search_with_coverage("submit claim")[0]
+    assert faq is FAQS[0] and coverage == pytest.approx(1.0)
+
+    # An unseen term weighs like the rarest possible term, so coverage drops below half
+    _, coverage, faq = index.search_with_coverage("claim xylophone")[0]
+    assert faq is FAQS[0] and coverage < 0.5
+    assert index.search_with_coverage("the") == []
@@ -0,0 +1,152 @@
+"""
+Bilingual Text Search
+Arabic/English normalization, light stemming and a BM25 inverted index
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+# Harakat, tatweel and Quranic marks
+_DIACRITICS_RE = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u0621-\u064A]+")
+
+_ARABIC_FOLDING = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي",
+    "ؤ": "و",
+    "ة": "ه",
+})
+
+STOP_WORDS = {
+    # English
+    "a", "an", "the", "is", "are", "am", "was", "be", "do", "does", "did", "i", "my", "me",
+    "you", "your", "we", "it", "of", "to", "in", "on", "for", "and", "or", "how", "what",
+    "when", "where", "who", "why", "can", "could", "would", "should", "will", "this", "that",
+    "with", "about", "there", "any", "please",
+    # Arabic (already normalized)
+    "في", "من", "الي", "علي", "عن", "مع", "هل", "ما", "ماذا", "كيف", "متي", "اين", "لماذا",
+    "هو", "هي", "انا", "انت", "هذا", "هذه", "ذلك", "التي", "الذي", "او", "و", "ثم", "كم",
+    "لو", "ان", "اذا", "هناك", "لي", "عندي",
+}
+
+# Longest first so e.g. "وال" is stripped before "و"
+_AR_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال", "و")
+_AR_SUFFIXES = ("هما", "كما", "ات", "ان", "ون", "ين", "ها", "يه", "ه", "ي")
+_EN_SUFFIXES = ("ing", "ies", "es", "ed", "s")
+
+
+def normalize_arabic(text):
+    """Lower-case, remove diacritics/tatweel and fold alef, ya and ta-marbuta variants"""
+    return _DIACRITICS_RE.sub("", text.lower()).translate(_ARABIC_FOLDING)
+
+
+def light_stem(token):
+    """Strip common Arabic affixes / English plural and tense suffixes"""
+    if token.isascii():
+        for suffix in _EN_SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+                return token[:-len(suffix)]
+        return token
+
+    for prefix in _AR_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            token = token[len(prefix):]
+            break
+    for suffix in _AR_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+            token = token[:-len(suffix)]
+            break
+    return token
+
+
+def analyze(text):
+    """Normalized, stop-word filtered, stemmed tokens"""
+    return [
+        light_stem(token)
+        for token in _TOKEN_RE.findall(normalize_arabic(text))
+        if token not in STOP_WORDS
+    ]
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring
+
+    Per-posting BM25 weights are precomputed at build time, so a query is just a
+    sum over the postings of its terms.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> [(doc_id, bm25 weight)]
+        self.idf = {}
+        self.documents = []
+        self._unseen_idf = 0.0
+
+    def build(self, documents, text_fn):
+        """Index documents; text_fn(doc) returns the searchable text"""
+        self.documents = list(documents)
+        analyzed = [Counter(analyze(text_fn(document))) for document in self.documents]
+
+        num_docs = len(self.documents)
+        doc_lengths = [sum(terms.values()) for terms in analyzed]
+        avg_length = (sum(doc_lengths) / num_docs) if num_docs else 1.0
+
+        term_docs = defaultdict(list)
+        for doc_id, terms in enumerate(analyzed):
+            for term, frequency in terms.items():
+                term_docs[term].append((doc_id, frequency))
+
+        k1, b = self.k1, self.b
+        postings = {}
+        idfs = {}
+        for term, docs in term_docs.items():
+            idf = idfs[term] = math.log(1 + (num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            postings[term] = [
+                (doc_id, idf * frequency * (k1 + 1) /
+                 (frequency + k1 * (1 - b + b * doc_lengths[doc_id] / (avg_length or 1.0))))
+                for doc_id, frequency in docs
+            ]
+        self.postings = postings
+        self.idf = idfs
+        # Query terms that appear in no document count as maximally specific
+        self._unseen_idf = math.log(1 + (num_docs + 0.5) / 0.5)
+        return self
+
+    def search(self, query, top_k=3):
+        """Get up to top_k (score, document) pairs, best first"""
+        scores = defaultdict(float)
+        for term in set(analyze(query)):
+            for doc_id, weight in self.postings.get(term, ()):
+                scores[doc_id] += weight
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(score, self.documents[doc_id]) for doc_id, score in best]
+
+    def search_with_coverage(self, query, top_k=3):
+        """Like search(), plus how much of the query each hit explains
+
+        Coverage is the idf-weighted share of query terms found in the
+        document (0-1), a length-independent confidence that BM25 scores lack.
+
+        Returns:
+            List of (score, coverage, document) triples, best first
+        """
+        terms = set(analyze(query))
+        if not terms:
+            return []
+
+        scores = defaultdict(float)
+        matched = defaultdict(float)
+        total_idf = 0.0
+        for term in terms:
+            idf = self.idf.get(term, self._unseen_idf)
+            total_idf += idf
+            for doc_id, weight in self.postings.get(term, ()):
+                scores[doc_id] += weight
+                matched[doc_id] += idf
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(score, matched[doc_id] / total_idf, self.documents[doc_id]) for doc_id, score in best]
@@ -12,7 +12,9 @@ from crewai import Crew, Process
 from agents import AINewsLetterAgents
 from tasks import AINewsLetterTasks
 from file_io import save_markdown
-from rate_limited_llm import RateLimitedLLM
+from gemini_client import get_crewai_llm
+from llm_metrics import get_llm_metrics
+from model_router import get_model_router
 from dotenv import load_dotenv
 import threading
 import time
@@ -90,47 +92,17 @@ def run_crew_workflow():
         # Initialize the Google Gemini language model
         update_agent_status('editor', 'working', 'Connecting to AI...', 20)
         
-        api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
-        use_vertex = os.environ.get("USE_VERTEX_AI", "false").lower() == "true"
-        
-        from crewai import LLM
-        gemini_llm = None
-        
-        if use_vertex:
-            print("☁️ Using Google Cloud Vertex AI (Service Account)")
-            project_id = os.environ.get("GOOGLE_CLOUD_PROJECT", "eg-konecta-sandbox")
-            location = os.environ.get("VERTEX_AI_LOCATION", "us-central1")
-            
-            try:
-                import vertexai
-                vertexai.init(project=project_id, location=location)
-                print(f"✅ Vertex AI initialized: {project_id} / {location}")
-            except Exception as e:
-                print(f"⚠️ Vertex AI init warning: {e}")
-            
-            gemini_llm = LLM(
-                model="vertex_ai/gemini-2.0-flash-001",
-                vertex_project=project_id,
-                vertex_location=location,
-                max_rpm=60  # Faster processing
-            )
-            print("✅ Vertex AI LLM ready (optimized)!")
-        elif api_key:
-            print("🔑 Using Gemini API Key")
-            gemini_llm = RateLimitedLLM(
-                model="gemini/gemini-2.0-flash-exp",
-                api_key=api_key,
-                delay_seconds=6
-            )
-        else:
-            raise ValueError("No AI model available. Set USE_VERTEX_AI=true or provide GEMINI_API_KEY")
+        # Shared clients for the configured backend (API key or Vertex AI), model per route;
+        # batch priority keeps them behind interactive chat on the shared quota
+        summary_llm = get_crewai_llm(priority="batch", route="summary")
+        compile_llm = get_crewai_llm(priority="batch", route="newsletter_compile")
         
         # Instantiate the agents
         update_agent_status('editor', 'working', 'Setting up all agents...', 30)
-        editor = agents.editor_agent(llm=gemini_llm)
-        news_fetcher = agents.news_fetcher_agent(llm=gemini_llm)
-        news_analyzer = agents.news_analyzer_agent(llm=gemini_llm)
-        newsletter_compiler = agents.newsletter_compiler_agent(llm=gemini_llm)
+        editor = agents.editor_agent(llm=compile_llm)
+        news_fetcher = agents.news_fetcher_agent(llm=summary_llm)
+        news_analyzer = agents.news_analyzer_agent(llm=summary_llm)
+        newsletter_compiler = agents.newsletter_compiler_agent(llm=compile_llm)
         
         # Instantiate the tasks
         update_agent_status('news_fetcher', 'working', 'Preparing to fetch news...', 40)
@@ -193,6 +165,16 @@ def get_status():
         'results': crew_results
     })
 
+@app.route('/api/metrics/models')
+def get_model_metrics():
+    """Calls, latency and estimated cost per model route"""
+    return jsonify(get_model_router().stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """LLM call counters and latency histograms in Prometheus text format"""
+    return get_llm_metrics().prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""